@@ -7,7 +7,9 @@ from sqlalchemy import pool
 from alembic import context
 
 # Import your project's Base from the database module
-from app.database import Base
+from app.database import Base, SQLALCHEMY_DATABASE_URL
+import app.models  # noqa: F401  (registers the tables on Base.metadata)
+import app.models.frontend  # noqa: F401  (landing page tables, not re-exported by app.models)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -15,9 +17,11 @@ config = context.config
 
 # Get the database URL from an environment variable
 # and update the config object.
-database_url = os.getenv("DATABASE_URL")
+# Falls back to the URL app.database loaded from .env.
+database_url = os.getenv("DATABASE_URL") or SQLALCHEMY_DATABASE_URL
 if database_url:
-    config.set_main_option("sqlalchemy.url", database_url)
+    # ConfigParser treats % as interpolation (URL-encoded passwords)
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,48 @@
+"""Index the booking and room lookup paths
+
+Revision ID: 0001_booking_indexes
+Revises:
+Create Date: 2026-10-17 10:00:00
+
+Existing databases were created with Base.metadata.create_all, so every index is
+created with IF NOT EXISTS and the revision is safe to run on a database that
+already has some of them. On PostgreSQL the indexes are built CONCURRENTLY so the
+live tables stay writable.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_booking_indexes"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_booking_rooms_booking_id", "booking_rooms", ["booking_id"]),
+    ("ix_booking_rooms_room_id", "booking_rooms", ["room_id"]),
+    ("ix_package_booking_rooms_package_booking_id", "package_booking_rooms", ["package_booking_id"]),
+    ("ix_package_booking_rooms_room_id", "package_booking_rooms", ["room_id"]),
+    ("ix_bookings_status_dates", "bookings", ["status", "check_in", "check_out"]),
+    ("ix_bookings_guest_contact", "bookings", ["guest_email", "guest_mobile"]),
+    ("ix_package_bookings_status_dates", "package_bookings", ["status", "check_in", "check_out"]),
+    ("ix_package_bookings_guest_contact", "package_bookings", ["guest_email", "guest_mobile"]),
+    ("ix_rooms_status_lower", "rooms", [sa.text("lower(status)")]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
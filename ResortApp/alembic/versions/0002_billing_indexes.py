@@ -0,0 +1,42 @@
+"""Index unbilled charge lookups and checkout dates
+
+Revision ID: 0002_billing_indexes
+Revises: 0001_booking_indexes
+Create Date: 2026-10-17 10:05:00
+
+ix_checkouts_checkout_day is an expression index on date(checkout_date), matching
+the func.date(Checkout.checkout_date) == today filter of the checkout endpoint.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_billing_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_booking_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_food_orders_room_billing", "food_orders", ["room_id", "billing_status"]),
+    ("ix_food_order_items_order_id", "food_order_items", ["order_id"]),
+    ("ix_assigned_services_room_billing", "assigned_services", ["room_id", "billing_status"]),
+    ("ix_checkouts_checkout_date", "checkouts", ["checkout_date"]),
+    ("ix_checkouts_checkout_day", "checkouts", [sa.text("date(checkout_date)")]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,37 @@
+"""Index per-employee attendance, working log and leave lookups
+
+Revision ID: 0003_staff_indexes
+Revises: 0002_billing_indexes
+Create Date: 2026-10-17 10:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_staff_indexes"
+down_revision: Union[str, Sequence[str], None] = "0002_billing_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_working_logs_employee_date", "working_logs", ["employee_id", "date"]),
+    ("ix_attendances_employee_date", "attendances", ["employee_id", "date"]),
+    ("ix_leaves_employee_status", "leaves", ["employee_id", "status"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
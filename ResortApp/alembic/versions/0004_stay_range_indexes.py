@@ -0,0 +1,52 @@
+"""GiST indexes on the stay date range of bookings and package bookings
+
+Revision ID: 0004_stay_range_indexes
+Revises: 0003_staff_indexes
+Create Date: 2026-10-17 11:00:00
+
+PostgreSQL only. Indexes the expression daterange(check_in, check_out, '[)') that
+app.utils.availability.stay_covers (@>) filters on. Other databases use the btree
+(status, check_in, check_out) indexes from revision 0001.
+
+Per-room double bookings are already rejected by the database through the unique
+(room_id, night) constraint of room_nights, so no exclusion constraint is added here.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_stay_range_indexes"
+down_revision: Union[str, Sequence[str], None] = "0003_staff_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STAY_RANGE = sa.text("daterange(check_in, check_out, '[)')")
+
+INDEXES = [
+    ("ix_bookings_stay", "bookings"),
+    ("ix_package_bookings_stay", "package_bookings"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, [STAY_RANGE], postgresql_using="gist",
+                if_not_exists=True, postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,47 @@
+"""Add image_variants to tables holding uploaded images
+
+Revision ID: 0005_image_variants
+Revises: 0004_stay_range_indexes
+Create Date: 2026-10-17 12:00:00
+
+Nullable JSON, filled by app.utils.images.make_variants for uploads made from now
+on; rows without variants keep being served from image_url.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_image_variants"
+down_revision: Union[str, Sequence[str], None] = "0004_stay_range_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = [
+    "header_banner",
+    "gallery",
+    "signature_experiences",
+    "plan_weddings",
+    "nearby_attractions",
+    "package_images",
+    "service_images",
+    "food_item_images",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        # deploy.sh runs create_all first, which makes missing tables with the column already there
+        if "image_variants" not in {column["name"] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("image_variants", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("image_variants")
@@ -0,0 +1,45 @@
+"""Create the room_nights occupancy ledger
+
+Revision ID: 0006_room_nights
+Revises: 0005_image_variants
+Create Date: 2026-10-18 09:00:00
+
+One row per room per occupied night; the unique (room_id, night) constraint rejects
+double bookings. Databases where create_all already made the table are left as
+they are. Fill the ledger from existing bookings with `python -m app.utils.room_nights`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_room_nights"
+down_revision: Union[str, Sequence[str], None] = "0005_image_variants"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "room_nights",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("night", sa.Date(), nullable=False),
+        sa.Column("booking_id", sa.Integer(), sa.ForeignKey("bookings.id", ondelete="CASCADE"), nullable=True),
+        sa.Column(
+            "package_booking_id", sa.Integer(), sa.ForeignKey("package_bookings.id", ondelete="CASCADE"), nullable=True,
+        ),
+        sa.UniqueConstraint("room_id", "night", name="uq_room_nights_room_night"),
+        sa.CheckConstraint("(booking_id IS NULL) <> (package_booking_id IS NULL)", name="ck_room_nights_single_owner"),
+        if_not_exists=True,
+    )
+    for column in ("id", "night", "booking_id", "package_booking_id"):
+        op.create_index(f"ix_room_nights_{column}", "room_nights", [column], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("room_nights", if_exists=True)
@@ -0,0 +1,43 @@
+"""Create the daily_rollups table
+
+Revision ID: 0007_daily_rollups
+Revises: 0006_room_nights
+Create Date: 2026-10-18 09:10:00
+
+Revenue and occupancy per calendar day, maintained by app/utils/rollups.py. Databases
+where create_all already made the table are left as they are. Fill it from existing
+data with `python -m app.utils.rollups`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_daily_rollups"
+down_revision: Union[str, Sequence[str], None] = "0006_room_nights"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AMOUNTS = [
+    "room_revenue", "package_revenue", "food_revenue", "service_revenue", "tax", "discount", "grand_total",
+    "food_order_amount", "expenses",
+]
+COUNTS = ["checkouts", "food_orders", "expense_count", "occupied_rooms"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "daily_rollups",
+        sa.Column("date", sa.Date(), primary_key=True),
+        *[sa.Column(name, sa.Float(), nullable=False) for name in AMOUNTS],
+        *[sa.Column(name, sa.Integer(), nullable=False) for name in COUNTS],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_rollups", if_exists=True)
@@ -0,0 +1,48 @@
+"""Create the email_outbox table
+
+Revision ID: 0008_email_outbox
+Revises: 0007_daily_rollups
+Create Date: 2026-10-18 09:20:00
+
+Outgoing emails for the background sender in app/utils/email_outbox.py. Databases
+where create_all already made the table are left as they are.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_email_outbox"
+down_revision: Union[str, Sequence[str], None] = "0007_daily_rollups"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("to_email", sa.String(), nullable=False),
+        sa.Column("to_name", sa.String(), nullable=True),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("html_content", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_email_outbox_id", "email_outbox", ["id"], if_not_exists=True)
+    op.create_index(
+        "ix_email_outbox_status_next_attempt", "email_outbox", ["status", "next_attempt_at"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("email_outbox", if_exists=True)
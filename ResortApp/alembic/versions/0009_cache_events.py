@@ -0,0 +1,40 @@
+"""Create the cache_events table
+
+Revision ID: 0009_cache_events
+Revises: 0008_email_outbox
+Create Date: 2026-10-18 09:30:00
+
+Invalidation events of the polling cache bus transport (app/utils/cache_bus.py,
+CACHE_BUS=poll). Databases where create_all already made the table are left as
+they are.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_cache_events"
+down_revision: Union[str, Sequence[str], None] = "0008_email_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "cache_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    for column in ("id", "created_at"):
+        op.create_index(f"ix_cache_events_{column}", "cache_events", [column], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("cache_events", if_exists=True)
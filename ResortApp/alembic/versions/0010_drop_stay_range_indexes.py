@@ -0,0 +1,50 @@
+"""Drop the GiST stay range indexes
+
+Revision ID: 0010_drop_stay_range_indexes
+Revises: 0009_cache_events
+Create Date: 2026-10-18 14:00:00
+
+PostgreSQL only. Revision 0004 indexed daterange(check_in, check_out) for the
+checked-in rooms lookup of the assigned services list, which now reads tonight's
+rows of the room_nights ledger like every other availability and conflict check.
+Nothing filters on the stay range any more, so the indexes only cost writes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_drop_stay_range_indexes"
+down_revision: Union[str, Sequence[str], None] = "0009_cache_events"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STAY_RANGE = sa.text("daterange(check_in, check_out, '[)')")
+
+INDEXES = [
+    ("ix_bookings_stay", "bookings"),
+    ("ix_package_bookings_stay", "package_bookings"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for name, table in INDEXES:
+            op.create_index(
+                name, table, [STAY_RANGE], postgresql_using="gist",
+                if_not_exists=True, postgresql_concurrently=True,
+            )
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.database import SessionLocal
 from app.schemas.auth import LoginRequest, Token
-from app.utils import auth
+from app.utils import auth, hashing
 from app.curd import user as crud_user
 from fastapi import Depends
 from app.utils.auth import get_current_user
@@ -34,6 +34,11 @@ def login(request: LoginRequest, db: Session = Depends(auth.get_db)):
         if not user.role:
             print(f"Login attempt: User {request.email} has no role assigned")
             raise HTTPException(status_code=400, detail="User role not assigned. Please contact administrator.")
+
+        # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plain password
+        if hashing.needs_rehash(user.hashed_password):
+            user.hashed_password = auth.get_password_hash(request.password)
+            db.commit()
         
         # Create access token
         access_token = auth.create_access_token(
@@ -1,19 +1,27 @@
 # booking.py
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from sqlalchemy.orm import Session, joinedload, load_only
-from sqlalchemy import or_, and_
-from typing import List, Union
-from app.utils.auth import get_db, get_current_user
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query, Response
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, and_, select
+from typing import List, Optional, Union
+from app.utils.auth import get_db, get_async_db, db_mode_route, get_current_user
 from app.utils.booking_id import parse_display_id
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER, count_total, keyset_filter, keyset_order, paginate, set_pagination_headers, split_page,
+)
+from app.utils.availability import ensure_rooms_available, find_conflicting_night
+from app.utils.room_nights import reserve_nights, release_nights
+from app.utils.room_status import recompute_room_statuses
+from app.curd.user import get_or_create_guest_user
 from app.models.booking import Booking, BookingRoom
 from app.models.user import User
 from app.models.room import Room
 from app.models.Package import Package, PackageBooking, PackageBookingRoom
 from app.schemas.booking import BookingCreate, BookingOut
 from app.schemas.room import RoomOut
+from app.utils.uploads import save_upload
 from fastapi.responses import FileResponse
 import os
-import shutil
 import uuid
 
 UPLOAD_DIR = "uploads/checkin_proofs"
@@ -22,57 +30,110 @@ from app.schemas.booking import BookingOut, BookingRoomOut
 from pydantic import BaseModel
 
 class PaginatedBookingResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     bookings: List[BookingOut]
+    next_cursor: Optional[str] = None
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
-@router.get("", response_model=PaginatedBookingResponse)
-def get_bookings(db: Session = Depends(get_db), skip: int = 0, limit: int = 20, order_by: str = "id", order: str = "desc"):
+def _booking_sort(order_by: str, order: str):
+    """(order column, descending) for the bookings list; latest first by default."""
+    column = {"id": Booking.id, "check_in": Booking.check_in}.get(order_by)
+    if column is None or order not in ("asc", "desc"):
+        return Booking.id, True
+    return column, order == "desc"
+
+
+def _booking_out(booking: Booking) -> BookingOut:
+    return BookingOut(
+        id=booking.id,
+        guest_name=booking.guest_name,
+        guest_mobile=booking.guest_mobile,
+        guest_email=booking.guest_email,
+        status=booking.status,
+        check_in=booking.check_in,
+        check_out=booking.check_out,
+        adults=booking.adults,
+        children=booking.children,
+        id_card_image_url=getattr(booking, 'id_card_image_url', None),
+        guest_photo_url=getattr(booking, 'guest_photo_url', None),
+        user=booking.user,
+        is_package=False,
+        rooms=[br.room for br in booking.booking_rooms if br.room]
+    )
+
+
+@db_mode_route(router.get("", response_model=PaginatedBookingResponse), use_async=False)
+def get_bookings(
+    response: Response,
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 20,
+    order_by: str = "id",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    total: str = Query("estimate", pattern="^(exact|estimate|none)$"),
+):
     try:
-        # Get regular bookings with room details, ordered by latest first
+        # Get regular bookings with room details, ordered by latest first.
+        # Pass the returned next_cursor back as `cursor` for the next page (keyset pagination).
+        # total defaults to the planner estimate (no COUNT over the whole table on PostgreSQL);
+        # total=exact opts in to the COUNT, total=none skips it.
         query = db.query(Booking).options(
             joinedload(Booking.booking_rooms).joinedload(BookingRoom.room),
             joinedload(Booking.user).joinedload(User.role)
         )
-        
-        # Apply ordering
-        if order_by == "id" and order == "desc":
-            query = query.order_by(Booking.id.desc())
-        elif order_by == "id" and order == "asc":
-            query = query.order_by(Booking.id.asc())
-        elif order_by == "check_in" and order == "desc":
-            query = query.order_by(Booking.check_in.desc())
-        elif order_by == "check_in" and order == "asc":
-            query = query.order_by(Booking.check_in.asc())
-        
-        regular_bookings = query.offset(skip).limit(limit).all()
+        order_column, descending = _booking_sort(order_by, order)
+        regular_bookings = paginate(query, order_column, Booking.id, limit, cursor=cursor, skip=skip,
+                                    descending=descending, response=response)
         
         # Convert to BookingOut format
-        booking_results = []
-        for booking in regular_bookings:
-            booking_out = BookingOut(
-                id=booking.id,
-                guest_name=booking.guest_name,
-                guest_mobile=booking.guest_mobile,
-                guest_email=booking.guest_email,
-                status=booking.status,
-                check_in=booking.check_in,
-                check_out=booking.check_out,
-                adults=booking.adults,
-                children=booking.children,
-                id_card_image_url=getattr(booking, 'id_card_image_url', None),
-                guest_photo_url=getattr(booking, 'guest_photo_url', None),
-                user=booking.user,
-                is_package=False,
-                rooms=[br.room for br in booking.booking_rooms if br.room]
-            )
-            booking_results.append(booking_out)
+        booking_results = [_booking_out(booking) for booking in regular_bookings]
         
-        # Get total count
-        total_count = db.query(Booking).count()
+        total_count = count_total(db.query(Booking), total)
         
-        return {"total": total_count, "bookings": booking_results}
+        return {"total": total_count, "bookings": booking_results,
+                "next_cursor": response.headers.get(NEXT_CURSOR_HEADER)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching bookings: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching bookings: {str(e)}")
+
+
+@db_mode_route(router.get("", response_model=PaginatedBookingResponse), use_async=True)
+async def get_bookings_async(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = 0,
+    limit: int = 20,
+    order_by: str = "id",
+    order: str = "desc",
+    cursor: Optional[str] = None,
+    total: str = Query("estimate", pattern="^(exact|estimate|none)$"),
+):
+    try:
+        # selectinload rather than joinedload: relationships can't lazy-load on an AsyncSession,
+        # and LIMIT applies to bookings rather than joined rows
+        order_column, descending = _booking_sort(order_by, order)
+        stmt = select(Booking).options(
+            selectinload(Booking.booking_rooms).selectinload(BookingRoom.room),
+            selectinload(Booking.user).selectinload(User.role)
+        ).order_by(*keyset_order(order_column, Booking.id, descending))
+        if cursor:
+            stmt = stmt.where(keyset_filter(order_column, Booking.id, cursor, descending))
+        elif skip:
+            stmt = stmt.offset(skip)
+
+        rows = (await db.execute(stmt.limit(limit + 1))).scalars().all()
+        regular_bookings, next_cursor = split_page(rows, limit, order_column, Booking.id)
+        set_pagination_headers(response, next_cursor)
+        total_count = await db.run_sync(lambda s: count_total(s.query(Booking), total))
+
+        return {"total": total_count, "bookings": [_booking_out(booking) for booking in regular_bookings],
+                "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching bookings: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching bookings: {str(e)}")
@@ -151,103 +212,6 @@ def get_booking_details(booking_id: Union[str, int], is_package: bool, db: Sessi
         )
 
 
-# -------------------------------
-# Helper function to get or create guest user
-# -------------------------------
-def get_or_create_guest_user(db: Session, email: str, mobile: str, name: str):
-    """
-    Find or create a guest user based on email and mobile number.
-    Returns the user_id to link bookings to the same user.
-    """
-    from app.models.user import User, Role
-    import bcrypt
-    
-    # Normalize empty strings to None for easier handling
-    email = email.strip() if email and isinstance(email, str) else None
-    mobile = mobile.strip() if mobile and isinstance(mobile, str) else None
-    name = name.strip() if name and isinstance(name, str) else "Guest User"
-    
-    # Need at least one identifier (email or mobile)
-    if not email and not mobile:
-        raise ValueError("Either email or mobile number must be provided")
-    
-    # First, try to find user by email (most reliable identifier)
-    user = None
-    if email:
-        user = db.query(User).filter(User.email == email).first()
-    
-    # If not found by email, try by mobile/phone
-    if not user and mobile:
-        user = db.query(User).filter(User.phone == mobile).first()
-    
-    # If user exists, return the user_id
-    if user:
-        # Update name if provided and different
-        if name and user.name != name:
-            user.name = name
-            db.commit()
-        return user.id
-    
-    # If user doesn't exist, create a new guest user
-    try:
-        # First, ensure 'guest' role exists
-        guest_role = db.query(Role).filter(Role.name == "guest").first()
-        if not guest_role:
-            # Create guest role if it doesn't exist
-            guest_role = Role(name="guest", permissions="[]")
-            db.add(guest_role)
-            db.commit()
-            db.refresh(guest_role)
-        
-        # Generate a placeholder password for guest users (they won't log in)
-        password_bytes = "guest_user_no_password".encode("utf-8")
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
-        
-        # Create email if not provided (use mobile-based email or generate unique one)
-        if not email:
-            if mobile:
-                user_email = f"guest_{mobile}@temp.com"
-            else:
-                # Generate a unique email based on timestamp
-                import time
-                user_email = f"guest_{int(time.time())}@temp.com"
-        else:
-            user_email = email
-        
-        # Check if email already exists (race condition check)
-        existing_user = db.query(User).filter(User.email == user_email).first()
-        if existing_user:
-            # User was created between our check and creation attempt
-            return existing_user.id
-        
-        # Create new guest user
-        new_user = User(
-            name=name,
-            email=user_email,
-            phone=mobile if mobile else None,
-            hashed_password=hashed_password,
-            role_id=guest_role.id,
-            is_active=True
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return new_user.id
-    except Exception as e:
-        # If user creation fails due to unique constraint or other DB error, try to find existing user
-        db.rollback()  # Rollback the failed transaction
-        if email:
-            existing_user = db.query(User).filter(User.email == email).first()
-            if existing_user:
-                return existing_user.id
-        if mobile:
-            existing_user = db.query(User).filter(User.phone == mobile).first()
-            if existing_user:
-                return existing_user.id
-        # Re-raise if we can't find existing user
-        raise ValueError(f"Failed to create or find guest user: {str(e)}")
-
 # -------------------------------
 # POST a new booking
 # -------------------------------
@@ -288,30 +252,8 @@ def create_booking(booking: BookingCreate, db: Session = Depends(get_db), curren
         # If a guest with the same email and mobile exists, use their established name
         guest_name_to_use = existing_booking.guest_name
 
-    # Check if rooms are available for the requested dates
-    for room_id in booking.room_ids:
-        # Check if room is already booked by regular bookings for overlapping dates (only check active bookings, not cancelled or checked-out)
-        conflicting_regular_booking = db.query(BookingRoom).join(Booking).filter(
-            BookingRoom.room_id == room_id,
-            Booking.status.in_(['booked', 'checked-in']),  # Only check for active bookings
-            Booking.check_in < booking.check_out,
-            Booking.check_out > booking.check_in
-        ).first()
-        
-        # Check if room is already booked by package bookings for overlapping dates
-        conflicting_package_booking = db.query(PackageBookingRoom).join(PackageBooking).filter(
-            PackageBookingRoom.room_id == room_id,
-            PackageBooking.status.in_(['booked', 'checked-in']),  # Only check for active bookings
-            PackageBooking.check_in < booking.check_out,
-            PackageBooking.check_out > booking.check_in
-        ).first()
-        
-        if conflicting_regular_booking or conflicting_package_booking:
-            room = db.query(Room).filter(Room.id == room_id).first()
-            raise HTTPException(
-                status_code=400,
-                detail=f"Room {room.number if room else room_id} is not available for the selected dates."
-            )
+    # Check if rooms are available for the requested dates (one query for all rooms, both booking tables)
+    ensure_rooms_available(db, booking.room_ids, booking.check_in, booking.check_out)
 
     db_booking = Booking(
         guest_name=guest_name_to_use,
@@ -324,21 +266,15 @@ def create_booking(booking: BookingCreate, db: Session = Depends(get_db), curren
         user_id=guest_user_id,  # Link booking to guest user
     )
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-
-    # Create BookingRoom links and update room status
-    for room_id in booking.room_ids:
-        room = db.query(Room).filter(Room.id == room_id).first()
-        if room:
-            room.status = "Booked"
-        db.add(BookingRoom(booking_id=db_booking.id, room_id=room_id))
-    
-    db.commit()
+    db.flush()
 
-    db.refresh(db_booking)
-    
-    # Reload with room details for response
+    # Create BookingRoom links, hold the room nights and update room status in the same transaction
+    db.add_all([BookingRoom(booking_id=db_booking.id, room_id=room_id) for room_id in booking.room_ids])
+    reserve_nights(db, booking.room_ids, booking.check_in, booking.check_out, booking_id=db_booking.id)
+    recompute_room_statuses(db, booking.room_ids)
+    db.flush()
+
+    # Reload with room details for response (same transaction; committed once at the end)
     booking_with_rooms = (
         db.query(Booking)
         .options(joinedload(Booking.booking_rooms).joinedload(BookingRoom.room))
@@ -364,10 +300,10 @@ def create_booking(booking: BookingCreate, db: Session = Depends(get_db), curren
         rooms=[br.room for br in booking_with_rooms.booking_rooms if br.room]
     )
     
-    # Calculate booking charges and send confirmation email if email address is provided
+    # Calculate booking charges and queue a confirmation email if email address is provided
     if booking.guest_email:
         try:
-            from app.utils.email import send_email, create_booking_confirmation_email
+            from app.utils.email import queue_email, create_booking_confirmation_email
             from datetime import datetime, date
             
             # Calculate stay duration
@@ -406,7 +342,8 @@ def create_booking(booking: BookingCreate, db: Session = Depends(get_db), curren
                 stay_nights=stay_nights
             )
             
-            send_email(
+            queue_email(
+                db,
                 to_email=booking.guest_email,
                 subject=f"Booking Confirmation {formatted_booking_id} - Elysian Retreat",
                 html_content=email_html,
@@ -414,8 +351,10 @@ def create_booking(booking: BookingCreate, db: Session = Depends(get_db), curren
             )
         except Exception as e:
             # Log error but don't fail the booking
-            print(f"Failed to send confirmation email: {str(e)}")
-    
+            print(f"Failed to queue confirmation email: {str(e)}")
+
+    # Guest user, booking, rooms, room nights and outbox email in one commit
+    db.commit()
     return booking_out
 
 @router.post("/guest", response_model=BookingOut, summary="Create a booking as a guest")
@@ -496,22 +435,8 @@ def create_guest_booking(booking: BookingCreate, db: Session = Depends(get_db)):
             # If a guest with the same email and mobile exists, use their established name
             guest_name_to_use = existing_booking.guest_name
 
-        # Check if rooms are available for the requested dates
-        for room_id in booking.room_ids:
-            # Check if room is already booked for overlapping dates
-            conflicting_booking = db.query(BookingRoom).join(Booking).filter(
-                BookingRoom.room_id == room_id,
-                Booking.status.in_(['booked', 'checked-in']),
-                Booking.check_in < booking.check_out,
-                Booking.check_out > booking.check_in
-            ).first()
-            
-            if conflicting_booking:
-                room = db.query(Room).filter(Room.id == room_id).first()
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Room {room.number if room else room_id} is not available for the selected dates."
-                )
+        # Check if rooms are available for the requested dates, including package bookings
+        ensure_rooms_available(db, booking.room_ids, booking.check_in, booking.check_out)
 
         db_booking = Booking(
             guest_name=guest_name_to_use,
@@ -524,17 +449,15 @@ def create_guest_booking(booking: BookingCreate, db: Session = Depends(get_db)):
             user_id=guest_user_id,  # Link booking to guest user
         )
         db.add(db_booking)
-        db.commit()
-        db.refresh(db_booking)
+        db.flush()
 
-        # Create BookingRoom links and update room status
-        for room_id in booking.room_ids:
-            db.query(Room).filter(Room.id == room_id).update({"status": "Booked"})
-            db.add(BookingRoom(booking_id=db_booking.id, room_id=room_id))
-        db.commit()
-        db.refresh(db_booking)
-        
-        # Reload with room details for email and response
+        # Create BookingRoom links, hold the room nights and update room status in the same transaction
+        db.add_all([BookingRoom(booking_id=db_booking.id, room_id=room_id) for room_id in booking.room_ids])
+        reserve_nights(db, booking.room_ids, booking.check_in, booking.check_out, booking_id=db_booking.id)
+        recompute_room_statuses(db, booking.room_ids)
+        db.flush()
+
+        # Reload with room details for email and response (committed once at the end)
         booking_with_rooms = (
             db.query(Booking)
             .options(joinedload(Booking.booking_rooms).joinedload(BookingRoom.room))
@@ -542,10 +465,10 @@ def create_guest_booking(booking: BookingCreate, db: Session = Depends(get_db)):
             .first()
         )
         
-        # Calculate booking charges and send confirmation email if email address is provided
+        # Calculate booking charges and queue a confirmation email if email address is provided
         if guest_email or booking.guest_email:
             try:
-                from app.utils.email import send_email, create_booking_confirmation_email
+                from app.utils.email import queue_email, create_booking_confirmation_email
                 from datetime import datetime, date
                 
                 # Calculate stay duration
@@ -586,7 +509,8 @@ def create_guest_booking(booking: BookingCreate, db: Session = Depends(get_db)):
                         stay_nights=stay_nights
                     )
                     
-                    send_email(
+                    queue_email(
+                        db,
                         to_email=email_to_use,
                         subject=f"Booking Confirmation {formatted_booking_id} - Elysian Retreat",
                         html_content=email_html,
@@ -594,9 +518,12 @@ def create_guest_booking(booking: BookingCreate, db: Session = Depends(get_db)):
                     )
             except Exception as e:
                 # Log error but don't fail the booking
-                print(f"Failed to send confirmation email: {str(e)}")
-        
-        return booking_with_rooms
+                print(f"Failed to queue confirmation email: {str(e)}")
+
+        # Serialise before the commit expires the loaded rooms
+        booking_out = _booking_out(booking_with_rooms)
+        db.commit()
+        return booking_out
         
     except HTTPException:
         # Re-raise HTTP exceptions (like validation errors) as-is
@@ -641,15 +568,13 @@ def check_in_booking(
     # Save ID card image
     id_card_filename = f"id_{booking_id}_{uuid.uuid4().hex}.jpg"
     id_card_path = os.path.join(UPLOAD_DIR, id_card_filename)
-    with open(id_card_path, "wb") as buffer:
-        shutil.copyfileobj(id_card_image.file, buffer)
+    save_upload(id_card_image, id_card_path)
     booking.id_card_image_url = id_card_filename
 
     # Save guest photo
     guest_photo_filename = f"guest_{booking_id}_{uuid.uuid4().hex}.jpg"
     guest_photo_path = os.path.join(UPLOAD_DIR, guest_photo_filename)
-    with open(guest_photo_path, "wb") as buffer:
-        shutil.copyfileobj(guest_photo.file, buffer)
+    save_upload(guest_photo, guest_photo_path)
     booking.guest_photo_url = guest_photo_filename
 
     booking.status = "checked-in"
@@ -657,10 +582,8 @@ def check_in_booking(
     # Save the ID of the user who performed the check-in
     booking.user_id = current_user.id
 
-    # CRITICAL FIX: Update the status of the associated rooms to 'Checked-in'
-    if booking.booking_rooms:
-        room_ids = [br.room_id for br in booking.booking_rooms]
-        db.query(Room).filter(Room.id.in_(room_ids)).update({"status": "Checked-in"}, synchronize_session=False)
+    # Rooms held tonight by the booking show as occupied
+    recompute_room_statuses(db, [br.room_id for br in booking.booking_rooms])
 
     db.commit()
     db.refresh(booking)
@@ -684,11 +607,10 @@ def cancel_booking(booking_id: Union[str, int], db: Session = Depends(get_db), c
         raise HTTPException(status_code=404, detail="Booking not found")
 
     # Free up the rooms associated with the booking
-    if booking.booking_rooms:
-        room_ids = [br.room_id for br in booking.booking_rooms]
-        db.query(Room).filter(Room.id.in_(room_ids)).update({"status": "Available"}, synchronize_session=False)
-
     booking.status = "cancelled"
+    release_nights(db, booking_id=booking.id)
+    recompute_room_statuses(db, [br.room_id for br in booking.booking_rooms])
+
     db.commit()
     db.refresh(booking)
     return booking
@@ -742,45 +664,19 @@ def extend_checkout(booking_id: Union[str, int], new_checkout: str, db: Session
     # Check for conflicts with other bookings on the same rooms
     room_ids = [br.room_id for br in booking.booking_rooms if br.room_id]
     
-    if room_ids:
-        # Check for conflicts with regular bookings
-        # A conflict exists if another booking overlaps with the extended period
-        # Extended period: from booking.check_out (exclusive) to new_checkout_date (inclusive)
-        conflicting_bookings = db.query(Booking).join(BookingRoom).filter(
-            Booking.id != booking_id,
-            BookingRoom.room_id.in_(room_ids),
-            Booking.status.in_(['booked', 'checked-in', 'checked_in']),
-            and_(
-                Booking.check_in < new_checkout_date,
-                Booking.check_out > booking.check_out
-            )
-        ).first()
-        
-        if conflicting_bookings:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Cannot extend checkout date. Room(s) are already booked by another booking (ID: {conflicting_bookings.id}) during the extended period."
-            )
-        
-        # Check for conflicts with package bookings
-        # A conflict exists if a package booking overlaps with the extended period
-        conflicting_package_bookings = db.query(PackageBooking).join(PackageBookingRoom).filter(
-            PackageBookingRoom.room_id.in_(room_ids),
-            PackageBooking.status.in_(['booked', 'checked-in', 'checked_in']),
-            and_(
-                PackageBooking.check_in < new_checkout_date,
-                PackageBooking.check_out > booking.check_out
-            )
-        ).first()
-        
-        if conflicting_package_bookings:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Cannot extend checkout date. Room(s) are already booked by a package booking (ID: {conflicting_package_bookings.id}) during the extended period."
-            )
-    
-    # Update the checkout date
+    # A conflict exists if any other booking holds one of these rooms on a night of the extended period
+    conflict = find_conflicting_night(db, room_ids, booking.check_out, new_checkout_date)
+    if conflict is not None:
+        if conflict.booking_id is not None:
+            detail = f"Cannot extend checkout date. Room(s) are already booked by another booking (ID: {conflict.booking_id}) during the extended period."
+        else:
+            detail = f"Cannot extend checkout date. Room(s) are already booked by a package booking (ID: {conflict.package_booking_id}) during the extended period."
+        raise HTTPException(status_code=400, detail=detail)
+
+    # Hold the extra nights and update the checkout date
+    reserve_nights(db, room_ids, booking.check_out, new_checkout_date, booking_id=booking.id)
     booking.check_out = new_checkout_date
+    recompute_room_statuses(db, room_ids)
     db.commit()
     db.refresh(booking)
     
@@ -1,19 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Optional
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select
 from typing import List
 from datetime import date, datetime
 
 # Assume your utility and model imports are set up correctly
 from app.utils.auth import get_db, get_current_user
+from app.utils.pagination import paginate
+from app.utils.room_nights import release_nights
+from app.utils.room_status import recompute_room_statuses
+from app.utils.cache_bus import publish
 from app.models.room import Room
 from app.models.booking import Booking, BookingRoom
 from app.models.Package import Package, PackageBooking, PackageBookingRoom
 from app.models.user import User
 from app.models.foodorder import FoodOrder, FoodOrderItem
 from app.models.service import AssignedService, Service
+from app.models.food_item import FoodItem
 from app.models.checkout import Checkout
-from app.schemas.checkout import BillSummary, BillBreakdown, CheckoutFull, CheckoutSuccess, CheckoutRequest
+from app.schemas.checkout import BillSummary, BillBreakdown, BatchBillSummary, CheckoutFull, CheckoutSuccess, CheckoutRequest
 
 router = APIRouter(prefix="/bill", tags=["checkout"])
 
@@ -23,9 +29,9 @@ router = APIRouter(prefix="/bill", tags=["checkout"])
 
 
 @router.get("/checkouts", response_model=List[CheckoutFull])
-def get_all_checkouts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user), skip: int = 0, limit: int = 20):
+def get_all_checkouts(response: Response, db: Session = Depends(get_db), current_user: User = Depends(get_current_user), skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Retrieves a list of all completed checkouts, ordered by most recent."""
-    checkouts = db.query(Checkout).order_by(Checkout.id.desc()).offset(skip).limit(limit).all()
+    checkouts = paginate(db.query(Checkout), Checkout.id, Checkout.id, limit, cursor=cursor, skip=skip, response=response)
     return checkouts if checkouts else []
 
 @router.get("/active-rooms", response_model=List[dict])
@@ -141,6 +147,37 @@ def get_active_rooms(db: Session = Depends(get_db), current_user: User = Depends
         print(traceback.format_exc())
         return []
 
+def _apply_gst(charges: BillBreakdown) -> BillBreakdown:
+    """Fill in the GST breakdown and total_due of a bill from its charge lines."""
+    # Room charges: 12% GST if <= 7500, 18% GST if > 7500
+    room_charge_amount = charges.room_charges or 0
+    if room_charge_amount > 0:
+        if room_charge_amount <= 7500:
+            charges.room_gst = room_charge_amount * 0.12
+        else:
+            charges.room_gst = room_charge_amount * 0.18
+    
+    # Package charges: Same rule as room charges (12% if <= 7500, 18% if > 7500)
+    package_charge_amount = charges.package_charges or 0
+    if package_charge_amount > 0:
+        if package_charge_amount <= 7500:
+            charges.package_gst = package_charge_amount * 0.12
+        else:
+            charges.package_gst = package_charge_amount * 0.18
+    
+    # Food charges: 5% GST always
+    food_charge_amount = charges.food_charges or 0
+    if food_charge_amount > 0:
+        charges.food_gst = food_charge_amount * 0.05
+    
+    # Total GST
+    charges.total_gst = (charges.room_gst or 0) + (charges.food_gst or 0) + (charges.package_gst or 0)
+    
+    # Total due (subtotal before GST)
+    charges.total_due = sum([charges.room_charges, charges.food_charges, charges.service_charges, charges.package_charges])
+    return charges
+
+
 def _calculate_bill_for_single_room(db: Session, room_number: str):
     """
     Calculates bill for a single room only, regardless of how many rooms are in the booking.
@@ -212,33 +249,7 @@ def _calculate_bill_for_single_room(db: Session, room_number: str):
     charges.food_items = [{"item_name": item.food_item.name, "quantity": item.quantity, "amount": item.quantity * item.food_item.price} for item in unbilled_food_order_items if item.food_item]
     charges.service_items = [{"service_name": ass.service.name, "charges": ass.service.charges} for ass in unbilled_services]
     
-    # Calculate GST
-    # Room charges: 12% GST if <= 7500, 18% GST if > 7500
-    room_charge_amount = charges.room_charges or 0
-    if room_charge_amount > 0:
-        if room_charge_amount <= 7500:
-            charges.room_gst = room_charge_amount * 0.12
-        else:
-            charges.room_gst = room_charge_amount * 0.18
-    
-    # Package charges: Same rule as room charges (12% if <= 7500, 18% if > 7500)
-    package_charge_amount = charges.package_charges or 0
-    if package_charge_amount > 0:
-        if package_charge_amount <= 7500:
-            charges.package_gst = package_charge_amount * 0.12
-        else:
-            charges.package_gst = package_charge_amount * 0.18
-    
-    # Food charges: 5% GST always
-    food_charge_amount = charges.food_charges or 0
-    if food_charge_amount > 0:
-        charges.food_gst = food_charge_amount * 0.05
-    
-    # Total GST
-    charges.total_gst = (charges.room_gst or 0) + (charges.food_gst or 0) + (charges.package_gst or 0)
-    
-    # Total due (subtotal before GST)
-    charges.total_due = sum([charges.room_charges, charges.food_charges, charges.service_charges, charges.package_charges])
+    _apply_gst(charges)
     
     number_of_guests = getattr(booking, 'number_of_guests', 1)
     
@@ -331,9 +342,10 @@ def _calculate_bill_for_entire_booking(db: Session, room_number: str):
                                  .join(FoodOrder)
                                  .options(joinedload(FoodOrderItem.food_item))
                                  .filter(FoodOrder.room_id.in_(room_ids), FoodOrder.billing_status == "unbilled")
+                                 .order_by(FoodOrderItem.id)
                                  .all())
 
-    unbilled_services = db.query(AssignedService).options(joinedload(AssignedService.service)).filter(AssignedService.room_id.in_(room_ids), AssignedService.billing_status == "unbilled").all()
+    unbilled_services = db.query(AssignedService).options(joinedload(AssignedService.service)).filter(AssignedService.room_id.in_(room_ids), AssignedService.billing_status == "unbilled").order_by(AssignedService.id).all()
 
     # Calculate total food charges from the individual items.
     charges.food_charges = sum(item.quantity * item.food_item.price for item in unbilled_food_order_items if item.food_item)
@@ -343,33 +355,7 @@ def _calculate_bill_for_entire_booking(db: Session, room_number: str):
     charges.food_items = [{"item_name": item.food_item.name, "quantity": item.quantity, "amount": item.quantity * item.food_item.price} for item in unbilled_food_order_items if item.food_item]
     charges.service_items = [{"service_name": ass.service.name, "charges": ass.service.charges} for ass in unbilled_services]
 
-    # Calculate GST
-    # Room charges: 12% GST if <= 7500, 18% GST if > 7500
-    room_charge_amount = charges.room_charges or 0
-    if room_charge_amount > 0:
-        if room_charge_amount <= 7500:
-            charges.room_gst = room_charge_amount * 0.12
-        else:
-            charges.room_gst = room_charge_amount * 0.18
-    
-    # Package charges: Same rule as room charges (12% if <= 7500, 18% if > 7500)
-    package_charge_amount = charges.package_charges or 0
-    if package_charge_amount > 0:
-        if package_charge_amount <= 7500:
-            charges.package_gst = package_charge_amount * 0.12
-        else:
-            charges.package_gst = package_charge_amount * 0.18
-    
-    # Food charges: 5% GST always
-    food_charge_amount = charges.food_charges or 0
-    if food_charge_amount > 0:
-        charges.food_gst = food_charge_amount * 0.05
-    
-    # Total GST
-    charges.total_gst = (charges.room_gst or 0) + (charges.food_gst or 0) + (charges.package_gst or 0)
-
-    # Total due (subtotal before GST)
-    charges.total_due = sum([charges.room_charges, charges.food_charges, charges.service_charges, charges.package_charges])
+    _apply_gst(charges)
 
     # Assume number_of_guests is a field on the booking model. Default to 1 if not present.
     number_of_guests = getattr(booking, 'number_of_guests', 1)
@@ -381,6 +367,125 @@ def _calculate_bill_for_entire_booking(db: Session, room_number: str):
     }
 
 
+def _unbilled_charges_by_room(db: Session, room_ids: List[int]):
+    """
+    Unbilled food and service charges for many rooms in two queries.
+    Returns {room_id: {"food": total, "service": total, "food_items": [...], "service_items": [...]}},
+    with one line item per food order item / assigned service, in the shape of the
+    single-room bill. Items are (id, line item) pairs so a booking's rooms can be merged in id order.
+    """
+    by_room = {room_id: {"food": 0.0, "service": 0.0, "food_items": [], "service_items": []} for room_id in room_ids}
+    if not room_ids:
+        return by_room
+
+    food_rows = db.execute(
+        select(FoodOrderItem.id, FoodOrder.room_id, FoodItem.name, FoodOrderItem.quantity, FoodItem.price)
+        .join(FoodOrder, FoodOrder.id == FoodOrderItem.order_id)
+        .join(FoodItem, FoodItem.id == FoodOrderItem.food_item_id)
+        .where(FoodOrder.room_id.in_(room_ids), FoodOrder.billing_status == "unbilled")
+        .order_by(FoodOrderItem.id)
+    ).all()
+    for item_id, room_id, name, quantity, price in food_rows:
+        amount = quantity * price
+        by_room[room_id]["food"] += amount
+        by_room[room_id]["food_items"].append((item_id, {"item_name": name, "quantity": quantity, "amount": amount}))
+
+    service_rows = db.execute(
+        select(AssignedService.id, AssignedService.room_id, Service.name, Service.charges)
+        .join(Service, Service.id == AssignedService.service_id)
+        .where(AssignedService.room_id.in_(room_ids), AssignedService.billing_status == "unbilled")
+        .order_by(AssignedService.id)
+    ).all()
+    for assigned_id, room_id, name, charges in service_rows:
+        by_room[room_id]["service"] += charges
+        by_room[room_id]["service_items"].append((assigned_id, {"service_name": name, "charges": charges}))
+    return by_room
+
+
+def _merge_line_items(room_extras, key: str) -> list:
+    """Line items of several rooms in id order, as the single-room bill lists them."""
+    return [item for _, item in sorted((entry for e in room_extras for entry in e[key]), key=lambda entry: entry[0])]
+
+
+@router.get("/batch", response_model=List[BatchBillSummary])
+def get_bills_batch(
+    checkout_mode: str = Query("single", pattern="^(single|multiple)$"),
+    include_booked: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Bill summaries for every active room (checkout_mode=single) or every active booking
+    (checkout_mode=multiple) at once, for end-of-day settlement and the checkout screen.
+    Uses the same pricing as GET /bill/{room_number}, with food and service charges
+    summed per room in grouped queries instead of per-room lookups.
+    By default only checked-in stays are included; include_booked=true adds 'booked' ones.
+    """
+    statuses = ['checked-in', 'checked_in'] + (['booked'] if include_booked else [])
+
+    active_bookings = db.query(Booking).options(
+        joinedload(Booking.booking_rooms).joinedload(BookingRoom.room)
+    ).filter(Booking.status.in_(statuses)).order_by(Booking.id.desc()).all()
+    active_package_bookings = db.query(PackageBooking).options(
+        joinedload(PackageBooking.rooms).joinedload(PackageBookingRoom.room),
+        joinedload(PackageBooking.package)
+    ).filter(PackageBooking.status.in_(statuses)).order_by(PackageBooking.id.desc()).all()
+
+    # A room is billed to its most recent active regular booking, else its package booking,
+    # matching the lookup order of the single-room bill
+    stays = []
+    claimed_rooms = set()
+    for is_package, bookings in ((False, active_bookings), (True, active_package_bookings)):
+        for booking in bookings:
+            links = booking.rooms if is_package else booking.booking_rooms
+            rooms = [link.room for link in links if link.room and link.room.id not in claimed_rooms]
+            if rooms:
+                claimed_rooms.update(room.id for room in rooms)
+                stays.append((booking, is_package, sorted(rooms, key=lambda r: str(r.number))))
+
+    extras = _unbilled_charges_by_room(db, list(claimed_rooms))
+    today = date.today()
+
+    def bill(booking, is_package, rooms, mode):
+        effective_checkout_date = max(today, booking.check_out)
+        stay_days = max(1, (effective_checkout_date - booking.check_in).days)
+        charges = BillBreakdown()
+        if is_package:
+            package_price_per_room = booking.package.price if booking.package else 0
+            charges.package_charges = package_price_per_room * len(rooms) * stay_days
+            charges.room_charges = 0
+        else:
+            charges.package_charges = 0
+            charges.room_charges = sum((room.price or 0) * stay_days for room in rooms)
+        room_extras = [extras[room.id] for room in rooms]
+        charges.food_charges = sum(e["food"] for e in room_extras)
+        charges.service_charges = sum(e["service"] for e in room_extras)
+        charges.food_items = _merge_line_items(room_extras, "food_items")
+        charges.service_items = _merge_line_items(room_extras, "service_items")
+        _apply_gst(charges)
+        return BatchBillSummary(
+            guest_name=booking.guest_name,
+            room_numbers=[str(room.number) for room in rooms],
+            number_of_guests=getattr(booking, 'number_of_guests', 1),
+            stay_nights=stay_days,
+            check_in=booking.check_in,
+            check_out=effective_checkout_date,
+            charges=charges,
+            room_number=str(rooms[0].number),
+            booking_id=booking.id,
+            booking_type="package" if is_package else "regular",
+            checkout_mode=mode,
+        )
+
+    result = []
+    for booking, is_package, rooms in stays:
+        if checkout_mode == "single":
+            result.extend(bill(booking, is_package, [room], "single") for room in rooms)
+        else:
+            result.append(bill(booking, is_package, rooms, "multiple"))
+    return result
+
+
 @router.get("/{room_number}", response_model=BillSummary)
 def get_bill_for_booking(room_number: str, checkout_mode: str = "multiple", db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     """
@@ -519,6 +624,14 @@ def process_booking_checkout(room_number: str, request: CheckoutRequest, db: Ses
             
             # Update room status only (don't change booking status)
             room.status = "Available"
+            # Free the room's remaining nights; nights already stayed stay in the ledger as history
+            release_nights(
+                db,
+                booking_id=booking.id if not is_package else None,
+                package_booking_id=booking.id if is_package else None,
+                room_ids=[room.id],
+                from_night=date.today(),
+            )
             
             # Check if all rooms in booking are checked out, then update booking status
             if is_package:
@@ -529,6 +642,9 @@ def process_booking_checkout(room_number: str, request: CheckoutRequest, db: Ses
             if not remaining_rooms:
                 # All rooms checked out, mark booking as checked out
                 booking.status = "checked_out"
+
+            # The room may already be held tonight by the next booking
+            recompute_room_statuses(db, [room.id])
             
             db.commit()
             db.refresh(new_checkout)
@@ -625,6 +741,15 @@ def process_booking_checkout(room_number: str, request: CheckoutRequest, db: Ses
             
             booking.status = "checked_out"
             db.query(Room).filter(Room.id.in_(room_ids)).update({"status": "Available"})
+            for room_id in room_ids:
+                publish(db, "rooms", room_id)
+            release_nights(
+                db,
+                booking_id=booking.id if not is_package else None,
+                package_booking_id=booking.id if is_package else None,
+                from_night=date.today(),
+            )
+            recompute_room_statuses(db, room_ids)
 
             db.commit()
             db.refresh(new_checkout)
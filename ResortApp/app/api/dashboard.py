@@ -1,125 +1,183 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from sqlalchemy import func, Date
-from datetime import date, timedelta
-
-from app.utils.auth import get_db
-from app.models.checkout import Checkout
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, case, true
+from datetime import date, datetime, time, timedelta
+import json
+import os
+
+from app.utils.auth import get_db, get_async_db, db_mode_route
+from app.utils.response_cache import Cache
+from app.models.daily_rollup import DailyRollup
 from app.models.room import Room
 from app.models.booking import Booking, BookingRoom
-from app.models.Package import Package, PackageBooking, PackageBookingRoom
-from app.models.foodorder import FoodOrder
+from app.models.Package import Package, PackageBooking
 from app.models.food_item import FoodItem
 from app.models.expense import Expense
 from app.models.employee import Employee
-from app.models.service import Service, AssignedService
+from app.models.service import AssignedService
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Dashboard results are shared by all workers (CACHE_BACKEND) for this many seconds, so many
+# staff polling the dashboard cost one set of queries per period instead of one per request;
+# 0 turns the cache off
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "45"))
+_cache = Cache("dashboard", ttl=DASHBOARD_CACHE_TTL)
+
+
+def _day_start(day: date) -> datetime:
+    """Midnight at the start of a day, so DateTime columns are filtered by range (index friendly)."""
+    return datetime.combine(day, time.min)
+
+
+def _sum_if(condition, value=1):
+    """Conditional aggregate: SUM(CASE WHEN condition THEN value ELSE 0 END), 0 when no rows."""
+    return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+
+def _encode(value) -> bytes:
+    return json.dumps(jsonable_encoder(value)).encode("utf-8")
+
+
+def _cached(key: str, compute) -> Response:
+    """compute() as a JSON response, from the dashboard cache; one worker computes a missing entry."""
+    if DASHBOARD_CACHE_TTL <= 0:
+        body = _encode(compute())
+    else:
+        body, _ = _cache.get_or_compute(key, lambda: _encode(compute()))
+    return Response(content=body, media_type="application/json")
+
+
+async def _cached_async(db: AsyncSession, key: str, compute) -> Response:
+    """Async twin of _cached: on a miss, run the sync compute(session) on the async connection."""
+    body = _cache.get(key) if DASHBOARD_CACHE_TTL > 0 else None
+    if body is None:
+        body = _encode(await db.run_sync(compute))
+        if DASHBOARD_CACHE_TTL > 0:
+            _cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
 
-@router.get("/kpis")
+def _one_row(db: Session, *subqueries):
+    """Fetch single-row aggregate subqueries side by side in one round trip."""
+    stmt = select(*[c for sq in subqueries for c in sq.c]).select_from(subqueries[0])
+    for sq in subqueries[1:]:
+        stmt = stmt.join(sq, true())
+    return db.execute(stmt).one()
+
+
+@db_mode_route(router.get("/kpis"), use_async=False)
 def get_kpis(db: Session = Depends(get_db)):
     """
     Calculates and returns key performance indicators for the dashboard.
     """
     today = date.today()
+    return _cached(f"dashboard:kpis:{today}", lambda: _compute_kpis(db, today))
+
 
-    # 1. Checkout KPIs
-    checkouts_today = db.query(Checkout).filter(func.cast(Checkout.checkout_date, Date) == today).count()
-    checkouts_total = db.query(Checkout).count()
-
-    # 2. Room Status KPIs
-    all_rooms = db.query(Room).all()
-    booked_room_ids = set()
-
-    # Find rooms booked via regular bookings
-    active_bookings = db.query(BookingRoom.room_id).join(Booking).filter(
-        Booking.status == "booked",
-        Booking.check_in <= today,
-        Booking.check_out > today,
-    ).all()
-    booked_room_ids.update([r.room_id for r in active_bookings])
-
-    # Find rooms booked via package bookings
-    active_package_bookings = db.query(PackageBookingRoom.room_id).join(PackageBooking).filter(
-        PackageBooking.status == "booked",
-        PackageBooking.check_in <= today,
-        PackageBooking.check_out > today,
-    ).all()
-    booked_room_ids.update([r.room_id for r in active_package_bookings])
-
-    booked_rooms_count = len(booked_room_ids)
-    maintenance_rooms_count = db.query(Room).filter(func.lower(Room.status) == "maintenance").count()
-    total_rooms_count = len(all_rooms)
-    available_rooms_count = total_rooms_count - booked_rooms_count - maintenance_rooms_count
-
-    # 3. Food Revenue KPI
-    # Assuming FoodOrder has a 'created_at' field. If not, this needs adjustment.
-    food_revenue_today = db.query(func.sum(FoodOrder.amount)).filter(
-        func.cast(FoodOrder.created_at, Date) == today
-    ).scalar() or 0
-
-    # 4. Package Booking KPI
-    package_bookings_today = db.query(PackageBooking).filter(
-        func.cast(PackageBooking.check_in, Date) == today
-    ).count()
+@db_mode_route(router.get("/kpis"), use_async=True)
+async def get_kpis_async(db: AsyncSession = Depends(get_async_db)):
+    today = date.today()
+    return await _cached_async(db, f"dashboard:kpis:{today}", lambda s: _compute_kpis(s, today))
+
+
+def _compute_kpis(db: Session, today: date):
+    # Checkout, food and occupancy figures come from the daily rollups; all in a single round trip
+    rollups = select(
+        _sum_if(DailyRollup.date == today, DailyRollup.checkouts).label("checkouts_today"),
+        func.coalesce(func.sum(DailyRollup.checkouts), 0).label("checkouts_total"),
+        # Rooms held tonight by regular or package bookings
+        _sum_if(DailyRollup.date == today, DailyRollup.occupied_rooms).label("booked_rooms"),
+        _sum_if(DailyRollup.date == today, DailyRollup.food_order_amount).label("food_revenue_today"),
+    ).subquery()
+    rooms = select(
+        func.count(Room.id).label("total_rooms"),
+        _sum_if(func.lower(Room.status) == "maintenance").label("maintenance_rooms"),
+    ).subquery()
+    packages = select(
+        func.count(PackageBooking.id).label("package_bookings_today"),
+    ).where(PackageBooking.check_in == today).subquery()
+
+    row = _one_row(db, rollups, rooms, packages)
+
+    available_rooms_count = row.total_rooms - row.booked_rooms - row.maintenance_rooms
 
     return [{
-        "checkouts_today": checkouts_today,
-        "checkouts_total": checkouts_total,
-        "available_rooms": available_rooms_count,
-        "booked_rooms": booked_rooms_count,
-        "food_revenue_today": food_revenue_today,
-        "package_bookings_today": package_bookings_today,
+        "checkouts_today": int(row.checkouts_today),
+        "checkouts_total": int(row.checkouts_total),
+        "available_rooms": int(available_rooms_count),
+        "booked_rooms": int(row.booked_rooms),
+        "food_revenue_today": row.food_revenue_today or 0,
+        "package_bookings_today": int(row.package_bookings_today),
     }]
 
-@router.get("/charts")
+
+@db_mode_route(router.get("/charts"), use_async=False)
 def get_chart_data(db: Session = Depends(get_db)):
     """Dashboard chart data with sensible fallbacks.
     - Primary source: Checkout totals (actual billed revenue)
     - Fallback: Estimated revenue from current bookings if no checkouts exist
     """
-    from sqlalchemy import cast
+    today = date.today()
+    return _cached(f"dashboard:charts:{today}", lambda: _compute_chart_data(db, today))
+
+
+@db_mode_route(router.get("/charts"), use_async=True)
+async def get_chart_data_async(db: AsyncSession = Depends(get_async_db)):
+    today = date.today()
+    return await _cached_async(db, f"dashboard:charts:{today}", lambda s: _compute_chart_data(s, today))
+
+
+def _day_key(value) -> str:
+    """Normalise a grouped date value (date on PostgreSQL, 'YYYY-MM-DD' string on SQLite)."""
+    return str(value)[:10]
+
 
-    # --- Primary: use billed totals from Checkout ---
-    room_total = db.query(func.coalesce(func.sum(Checkout.room_total), 0)).scalar() or 0
-    package_total = db.query(func.coalesce(func.sum(Checkout.package_total), 0)).scalar() or 0
-    food_total = db.query(func.coalesce(func.sum(Checkout.food_total), 0)).scalar() or 0
+def _compute_chart_data(db: Session, today: date):
+    week_start = today - timedelta(days=6)
+
+    # --- Primary: use billed totals from Checkout (pre-aggregated per day) ---
+    totals = db.execute(
+        select(
+            func.coalesce(func.sum(DailyRollup.room_revenue), 0),
+            func.coalesce(func.sum(DailyRollup.package_revenue), 0),
+            func.coalesce(func.sum(DailyRollup.food_revenue), 0),
+        )
+    ).one()
+    room_total, package_total, food_total = totals
 
     # If everything is zero, build a lightweight estimate from active data to avoid empty charts
     if (room_total + package_total + food_total) == 0:
-        # Estimate room revenue: sum(room.price * nights) for recent bookings (last 30 days)
-        thirty_days_ago = date.today() - timedelta(days=30)
-        recent_bookings = (
-            db.query(Booking)
-            .options()
-            .filter(Booking.check_in >= thirty_days_ago)
-            .all()
-        )
-        est_room = 0.0
-        for b in recent_bookings:
-            nights = max(1, (b.check_out - b.check_in).days)
-            # load linked rooms
-            brs = db.query(BookingRoom).filter(BookingRoom.booking_id == b.id).all()
-            for br in brs:
-                room = db.query(Room).filter(Room.id == br.room_id).first()
-                if room and room.price:
-                    est_room += float(room.price) * nights
-
-        # Estimate package revenue: count * average price from packages linked to recent package bookings
-        recent_pkg_bookings = (
-            db.query(PackageBooking)
-            .filter(PackageBooking.check_in >= thirty_days_ago)
-            .all()
+        thirty_days_ago = today - timedelta(days=30)
+
+        # Estimate room revenue: sum(room.price * nights) for recent bookings (last 30 days),
+        # with the room prices summed per booking in the database
+        booking_prices = db.execute(
+            select(Booking.check_in, Booking.check_out, func.coalesce(func.sum(Room.price), 0))
+            .join(BookingRoom, BookingRoom.booking_id == Booking.id)
+            .join(Room, Room.id == BookingRoom.room_id)
+            .where(Booking.check_in >= thirty_days_ago)
+            .group_by(Booking.id, Booking.check_in, Booking.check_out)
+        ).all()
+        est_room = sum(
+            float(price_sum) * max(1, (check_out - check_in).days)
+            for check_in, check_out, price_sum in booking_prices
         )
-        est_package = 0.0
-        for pb in recent_pkg_bookings:
-            pkg = db.query(Package).filter(Package.id == pb.package_id).first()
-            if pkg and pkg.price:
-                est_package += float(pkg.price)
+
+        # Estimate package revenue: package price of each recent package booking
+        est_package = db.execute(
+            select(func.coalesce(func.sum(Package.price), 0))
+            .join(PackageBooking, PackageBooking.package_id == Package.id)
+            .where(PackageBooking.check_in >= thirty_days_ago)
+        ).scalar() or 0
 
         # Food revenue estimate: billed + unbilled last 30 days
-        est_food = db.query(func.coalesce(func.sum(FoodOrder.total_amount), 0)).scalar() or 0
+        est_food = db.execute(
+            select(func.coalesce(func.sum(DailyRollup.food_order_amount), 0))
+            .where(DailyRollup.date >= thirty_days_ago)
+        ).scalar() or 0
 
         room_total, package_total, food_total = est_room, est_package, est_food
 
@@ -129,18 +187,38 @@ def get_chart_data(db: Session = Depends(get_db)):
         {"name": 'Food & Beverage', "value": round(float(food_total), 2)},
     ]
 
-    # --- Weekly performance ---
+    # --- Weekly performance: the last 7 rollup rows ---
+    per_day = {
+        _day_key(day): (revenue, count)
+        for day, revenue, count in db.execute(
+            select(DailyRollup.date, DailyRollup.grand_total, DailyRollup.checkouts)
+            .where(DailyRollup.date >= week_start, DailyRollup.date <= today)
+        )
+    }
+
+    # Fallback source for days without billed revenue: bookings starting that day
+    starts_per_day = {}
+    days_without_revenue = [
+        i for i in range(7) if not per_day.get((week_start + timedelta(days=i)).isoformat(), (0, 0))[0]
+    ]
+    if days_without_revenue:
+        starts_per_day = {
+            _day_key(day): count
+            for day, count in db.execute(
+                select(Booking.check_in, func.count(Booking.id))
+                .where(Booking.check_in >= week_start, Booking.check_in <= today)
+                .group_by(Booking.check_in)
+            )
+        }
+
     weekly_performance = []
-    today = date.today()
     for i in range(6, -1, -1):
         day = today - timedelta(days=i)
-        # Billed revenue and checkout count for each day
-        day_revenue = db.query(func.coalesce(func.sum(Checkout.grand_total), 0)).filter(func.cast(Checkout.checkout_date, Date) == day).scalar() or 0
-        day_checkouts = db.query(func.count(Checkout.id)).filter(func.cast(Checkout.checkout_date, Date) == day).scalar() or 0
+        day_revenue, day_checkouts = per_day.get(day.isoformat(), (0, 0))
 
         # Fallback: if still zero, count bookings starting that day
         if not day_revenue:
-            starts = db.query(func.count(Booking.id)).filter(Booking.check_in == day).scalar() or 0
+            starts = starts_per_day.get(day.isoformat(), 0)
             day_revenue = float(starts) * 1000.0  # symbolic baseline so chart shows activity
         weekly_performance.append({
             "day": day.strftime("%a"),
@@ -153,11 +231,21 @@ def get_chart_data(db: Session = Depends(get_db)):
         "weekly_performance": weekly_performance,
     }
 
-@router.get("/reports")
+
+@db_mode_route(router.get("/reports"), use_async=False)
 def get_reports_data(db: Session = Depends(get_db)):
     """
     Provides a consolidated dataset for the main reports/account page.
     """
+    return _cached("dashboard:reports", lambda: _compute_reports_data(db))
+
+
+@db_mode_route(router.get("/reports"), use_async=True)
+async def get_reports_data_async(db: AsyncSession = Depends(get_async_db)):
+    return await _cached_async(db, "dashboard:reports", _compute_reports_data)
+
+
+def _compute_reports_data(db: Session):
     # Fetch recent bookings (regular and package)
     recent_bookings = db.query(Booking).order_by(Booking.id.desc()).limit(5).all()
     recent_package_bookings = db.query(PackageBooking).order_by(PackageBooking.id.desc()).limit(5).all()
@@ -175,13 +263,25 @@ def get_reports_data(db: Session = Depends(get_db)):
     expenses_query_result = db.query(Expense.category, func.sum(Expense.amount).label("total_amount")).group_by(Expense.category).all()
     expenses_by_category = [{"category": category, "amount": total_amount} for category, total_amount in expenses_query_result]
 
+    row = _one_row(
+        db,
+        select(
+            func.sum(DailyRollup.grand_total).label("total_revenue"),
+            func.sum(DailyRollup.expenses).label("total_expenses"),
+        ).subquery(),
+        select(func.count(Booking.id).label("room_bookings")).subquery(),
+        select(func.count(PackageBooking.id).label("package_bookings")).subquery(),
+        select(func.count(Employee.id).label("active_employees")).subquery(),
+        select(func.count(Room.id).label("total_rooms")).subquery(),
+    )
+
     return [{
         "kpis": {
-            "total_revenue": db.query(func.sum(Checkout.grand_total)).scalar() or 0,
-            "total_expenses": db.query(func.sum(Expense.amount)).scalar() or 0,
-            "total_bookings": db.query(Booking).count() + db.query(PackageBooking).count(),
-            "active_employees": db.query(Employee).count(),
-            "total_rooms": db.query(Room).count(),
+            "total_revenue": row.total_revenue or 0,
+            "total_expenses": row.total_expenses or 0,
+            "total_bookings": row.room_bookings + row.package_bookings,
+            "active_employees": row.active_employees,
+            "total_rooms": row.total_rooms,
         },
         "recent_bookings": all_recent,
         "expenses_by_category": expenses_by_category,
@@ -207,60 +307,76 @@ def get_date_range(period: str):
     return start_date, end_date
 
 
-@router.get("/summary")
+@db_mode_route(router.get("/summary"), use_async=False)
 def get_summary(period: str = "all", db: Session = Depends(get_db)):
     """
     Provides a comprehensive summary of KPIs for a given period (day, week, month, all).
     """
+    if period not in ("day", "week", "month"):
+        period = "all"
+    return _cached(f"dashboard:summary:{period}:{date.today()}", lambda: _compute_summary(db, period))
+
+
+@db_mode_route(router.get("/summary"), use_async=True)
+async def get_summary_async(period: str = "all", db: AsyncSession = Depends(get_async_db)):
+    if period not in ("day", "week", "month"):
+        period = "all"
+    return await _cached_async(
+        db, f"dashboard:summary:{period}:{date.today()}", lambda s: _compute_summary(s, period)
+    )
+
+
+def _compute_summary(db: Session, period: str):
     start_date, end_date = get_date_range(period)
 
-    def apply_date_filter(query, date_column):
-        """Applies a date range filter to a SQLAlchemy query if dates are provided."""
+    def in_range(column, as_datetime=False):
+        """Date range condition for a column; DateTime columns are compared against midnight bounds."""
+        conditions = []
         if start_date:
-            query = query.filter(date_column >= start_date)
+            conditions.append(column >= (_day_start(start_date) if as_datetime else start_date))
         if end_date:
             # Use '<' for the end date to correctly handle date ranges
-            query = query.filter(date_column < end_date)
-        return query
-
-    # --- KPI Calculations ---
+            conditions.append(column < (_day_start(end_date) if as_datetime else end_date))
+        return conditions
+
+    # --- KPI Calculations: one aggregate pass per table, one round trip ---
+    row = _one_row(
+        db,
+        select(func.count(Booking.id).label("room_bookings")).where(*in_range(Booking.check_in)).subquery(),
+        select(func.count(PackageBooking.id).label("package_bookings")).where(*in_range(PackageBooking.check_in)).subquery(),
+        select(
+            func.coalesce(func.sum(DailyRollup.expenses), 0).label("total_expenses"),
+            func.coalesce(func.sum(DailyRollup.expense_count), 0).label("expense_count"),
+            func.coalesce(func.sum(DailyRollup.food_orders), 0).label("food_orders"),
+        ).where(*in_range(DailyRollup.date)).subquery(),
+        select(
+            func.count(AssignedService.id).label("assigned_services"),
+            _sum_if(AssignedService.status == "completed").label("completed_services"),
+        ).where(*in_range(AssignedService.assigned_at, as_datetime=True)).subquery(),
+        select(func.count(FoodItem.id).label("food_items_available")).where(FoodItem.available == "True").subquery(),
+        select(
+            func.count(Employee.id).label("active_employees"),
+            # Only filter salary for active employees if there's a date range
+            func.coalesce(func.sum(Employee.salary), 0).label("total_salary"),
+        ).where(*in_range(Employee.join_date)).subquery(),
+    )
 
-    # Bookings
-    room_bookings_query = apply_date_filter(db.query(Booking), Booking.check_in)
-    package_bookings_query = apply_date_filter(db.query(PackageBooking), PackageBooking.check_in)
-
-    # Expenses
-    expenses_query = apply_date_filter(db.query(Expense), Expense.date)
-    total_expenses = expenses_query.with_entities(func.sum(Expense.amount)).scalar() or 0
+    kpis = {
+        "room_bookings": row.room_bookings,
+        "package_bookings": row.package_bookings,
+        "total_bookings": row.room_bookings + row.package_bookings,
 
-    # Food Orders
-    food_orders_query = apply_date_filter(db.query(FoodOrder), FoodOrder.created_at)
+        "assigned_services": row.assigned_services,
+        "completed_services": int(row.completed_services),
 
-    # Services
-    services_query = apply_date_filter(db.query(AssignedService), AssignedService.assigned_at)
+        "food_orders": int(row.food_orders),
+        "food_items_available": row.food_items_available,
 
-    # Employees
-    employees_query = apply_date_filter(db.query(Employee), Employee.join_date)
-    total_salary_query = db.query(func.sum(Employee.salary))
-    if start_date: # Only filter salary for active employees if there's a date range
-        total_salary_query = apply_date_filter(total_salary_query, Employee.join_date)
+        "total_expenses": row.total_expenses,
+        "expense_count": int(row.expense_count),
 
-    kpis = {
-        "room_bookings": room_bookings_query.count(),
-        "package_bookings": package_bookings_query.count(),
-        "total_bookings": room_bookings_query.count() + package_bookings_query.count(),
-        
-        "assigned_services": services_query.count(),
-        "completed_services": services_query.filter(AssignedService.status == 'completed').count(),
-        
-        "food_orders": food_orders_query.count(),
-        "food_items_available": db.query(FoodItem).filter(FoodItem.available == "True").count(),
-        
-        "total_expenses": total_expenses,
-        "expense_count": expenses_query.count(),
-        
-        "active_employees": employees_query.count(),
-        "total_salary": total_salary_query.scalar() or 0,
+        "active_employees": row.active_employees,
+        "total_salary": row.total_salary,
     }
 
-    return kpis
\ No newline at end of file
+    return kpis
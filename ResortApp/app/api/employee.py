@@ -2,7 +2,6 @@
 
 from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from app.database import SessionLocal
 from app.schemas.employee import Employee, LeaveCreate, LeaveOut, EmployeeStatusOverview
 from app.schemas.user import UserCreate
 # ✅ Corrected imports to point to the crud modules
@@ -10,20 +9,13 @@ from app.curd import employee as crud_employee
 from app.curd import user as crud_user
 from app.models.employee import Employee as EmployeeModel, Leave as LeaveModel, WorkingLog as WorkingLogModel
 from app.models.user import User
-from app.utils.auth import get_current_user
+from app.utils.auth import get_db, get_current_user, get_password_hash
 import os
-import shutil
 from datetime import date 
+from app.utils.uploads import save_upload
 
 router = APIRouter(prefix="/employees", tags=["Employees"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Create upload directory if it doesn't exist
 UPLOAD_DIR = "uploads/employees"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -46,8 +38,7 @@ def add_employee(
         upload_folder = "uploads"
         os.makedirs(upload_folder, exist_ok=True)
         file_path = os.path.join(upload_folder, image.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_path)
         image_url = file_path.replace("\\", "/")
 
     if crud_user.get_user_by_email(db, email=email):
@@ -65,7 +56,8 @@ def add_employee(
         role_id=role_obj.id,
     )
     
-    new_user = crud_user.create_user(db=db, user=user_data)
+    hashed_password = get_password_hash(password)
+    new_user = crud_user.create_user(db=db, user=user_data, hashed_password=hashed_password)
 
     try:
         parsed_join_date = date.fromisoformat(join_date)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.curd import expenses as expense_crud
 from app.utils.auth import get_db, get_current_user
@@ -6,9 +7,9 @@ from app.schemas.expenses import ExpenseOut
 from app.models.user import User
 from app.models.employee import Employee
 import os
-import shutil
 from fastapi.responses import FileResponse
 import uuid
+from app.utils.uploads import save_upload
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
@@ -31,8 +32,7 @@ async def create_expense(
         # Safe filename using UUID
         filename = f"{employee_id}_{uuid.uuid4().hex}_{image.filename}"
         file_location = os.path.join(UPLOAD_DIR, filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_location)
         
         # Path to be used by frontend (relative to /uploads/)
         image_path = f"uploads/expenses/{filename}"
@@ -59,11 +59,12 @@ async def create_expense(
     }
 
 @router.get("/", response_model=list[ExpenseOut])
-def get_expenses(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
-    expenses = expense_crud.get_all_expenses(db, skip=skip, limit=limit)
+def get_expenses(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+    expenses = expense_crud.get_all_expenses(db, skip=skip, limit=limit, cursor=cursor, response=response)
     result = []
     for exp in expenses:
-        emp = db.query(Employee).filter(Employee.id == exp.employee_id).first()
+        # employee is joined-loaded by get_all_expenses
+        emp = exp.employee
         result.append({
             **exp.__dict__,
             "employee_name": emp.name if emp else "N/A"
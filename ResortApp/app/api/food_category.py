@@ -5,8 +5,10 @@ from app.curd import food_category as crud
 from app.utils.auth import get_db, get_current_user
 from app.models.food_category import FoodCategory
 from app.models.user import User
-import os, shutil, uuid
-import uuid,os, shutil
+import os, uuid
+import uuid,os
+from app.utils.uploads import save_upload
+from app.utils.response_cache import cached_endpoint, RESPONSE_CACHE_TTL
 UPLOAD_DIR = "static/food_categories"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 router = APIRouter(prefix="/food-categories", tags=["Food Categories"])
@@ -18,8 +20,7 @@ def create_category(name: str = Form(...), image: UploadFile = File(None), db: S
     if image:
         filename = f"category_{uuid.uuid4().hex}_{image.filename}"
         path = os.path.join("static/food_categories", filename)
-        with open(path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, path)
     
     category = FoodCategory(name=name, image=filename)
     db.add(category)
@@ -29,6 +30,7 @@ def create_category(name: str = Form(...), image: UploadFile = File(None), db: S
 
 
 @router.get("/", response_model=list[FoodCategoryOut])
+@cached_endpoint("food_categories", RESPONSE_CACHE_TTL, invalidate_on=("food_categories",))
 def read_all(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_categories(db, skip=skip, limit=limit)
 
@@ -53,8 +55,7 @@ def update(cat_id: int, name: str = Form(...), image: UploadFile = File(None), d
         # Save new image
         filename = f"category_{uuid.uuid4().hex}_{image.filename}"
         path = os.path.join(UPLOAD_DIR, filename)
-        with open(path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, path)
         category.image = filename
     
     db.commit()
@@ -4,8 +4,10 @@ from sqlalchemy.orm import Session
 from app.curd import food_item
 from app.schemas.food_item import FoodItemCreate
 from app.models.user import User
-import os, shutil, uuid
+import os, uuid
 from app.utils.auth import get_db, get_current_user
+from app.utils.uploads import save_upload
+from app.utils.images import make_variants
 
 router = APIRouter(prefix="/food-items", tags=["FoodItem"])
 UPLOAD_DIR = "uploads/food_items"
@@ -25,21 +27,22 @@ async def create_item(
     current_user: User = Depends(get_current_user)
 ):
     image_paths = []
+    image_variants = {}
     for image in images:
         # Generate unique filename
         filename = f"food_{uuid.uuid4().hex}_{image.filename}"
         path = os.path.join(UPLOAD_DIR, filename)
-        with open(path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, path)
         # Store with leading slash for proper URL construction
         web_path = f"/{UPLOAD_DIR}/{filename}".replace("\\", "/")
         image_paths.append(web_path)
+        image_variants[web_path] = await make_variants(path, web_path)
 
     item_data = FoodItemCreate(
         name=name, description=description, price=price,
         available=available, category_id=category_id
     )
-    return food_item.create_food_item(db, item_data, image_paths)
+    return food_item.create_food_item(db, item_data, image_paths, image_variants)
 
 @router.get("/")
 def list_items(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
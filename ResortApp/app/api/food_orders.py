@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.foodorder import FoodOrderCreate, FoodOrderOut, FoodOrderUpdate
 from app.curd import foodorder as crud  # ✅ Correct import
-from app.utils.auth import get_db, get_current_user
+from app.utils.auth import get_db, get_async_db, db_mode_route, get_current_user
 from app.models.user import User
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/food-orders", tags=["Food Orders"])
 
@@ -12,9 +13,17 @@ router = APIRouter(prefix="/food-orders", tags=["Food Orders"])
 def create_order(order: FoodOrderCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     return crud.create_food_order(db, order)
 
-@router.get("/", response_model=List[FoodOrderOut])
-def get_orders(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
-    return crud.get_food_orders(db, skip=skip, limit=limit)
+@db_mode_route(router.get("/", response_model=List[FoodOrderOut]), use_async=False)
+def get_orders(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+    return crud.get_food_orders(db, skip=skip, limit=limit, cursor=cursor, response=response)
+
+@db_mode_route(router.get("/", response_model=List[FoodOrderOut]), use_async=True)
+async def get_orders_async(response: Response, db: AsyncSession = Depends(get_async_db), skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+    # Reuse the sync CRUD code on the async connection; serialise inside run_sync so
+    # no relationship is lazy-loaded after leaving it
+    def load(session):
+        return [FoodOrderOut.model_validate(o) for o in crud.get_food_orders(session, skip=skip, limit=limit, cursor=cursor, response=response)]
+    return await db.run_sync(load)
 
 @router.delete("/{order_id}")
 def delete_order(order_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+import gzip
+import json
 import os
-import shutil
 import uuid
 
 import app.schemas.frontend as schemas
 import app.models.frontend as models
 from app.models.user import User
+from app.models.Package import Package
+from app.models.room import Room
+from app.schemas.packages import PackageOut
 import app.curd.frontend as crud
 from app.utils.auth import get_db, get_current_user
+from app.utils.uploads import save_upload
+from app.utils.images import make_variants
+from app.utils.response_cache import (
+    CACHE_STATUS_HEADER, SURROGATE_KEY_HEADER, RESPONSE_CACHE_TTL, Cache, cached_endpoint, etag_for, etag_matches,
+)
 
 router = APIRouter()
 
@@ -22,8 +33,27 @@ UPLOAD_DIR = os.path.join(BASE_DIR, "static", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 print(f"Upload directory set to: {UPLOAD_DIR}")  # Debug log
 
+# Landing page sections are read on every visitor page view but change a few times a
+# month, so their GET endpoints are served from the response cache with ETags, and
+# browsers and CDNs may keep them PUBLIC_CONTENT_MAX_AGE seconds before revalidating
+# (a matching If-None-Match gets an empty 304). The POST/PUT/DELETE handlers below
+# clear a section through the cache bus flush hook on its model (app/utils/cache_bus.py).
+PUBLIC_CONTENT_MAX_AGE = int(os.getenv("PUBLIC_CONTENT_MAX_AGE", "60"))
+
+
+def public_content(section: str, model):
+    return cached_endpoint(
+        f"frontend_{section}",
+        RESPONSE_CACHE_TTL,
+        invalidate_on=(model.__tablename__,),
+        etag=True,
+        cache_control=f"public, max-age={PUBLIC_CONTENT_MAX_AGE}",
+        surrogate_keys=("frontend", f"frontend-{section.replace('_', '-')}"),
+    )
+
 # ---------- Header & Banner ----------
 @router.get("/header-banner/", response_model=list[schemas.HeaderBanner])
+@public_content("header_banner", models.HeaderBanner)
 def list_header_banner(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.HeaderBanner, skip=skip, limit=limit)
 
@@ -58,8 +88,7 @@ async def create_header_banner(
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
         # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_path)
         
         # Verify file was saved
         if not os.path.exists(file_path):
@@ -78,12 +107,14 @@ async def create_header_banner(
             image_url = f"static/uploads/{unique_filename}"
         
         image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+        image_variants = await make_variants(file_path, image_url)
         
         obj = schemas.HeaderBannerCreate(
             title=title,
             subtitle=subtitle,
             is_active=is_active_bool,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.create(db, models.HeaderBanner, obj)
     except HTTPException:
@@ -111,6 +142,7 @@ async def update_header_banner(
         is_active_bool = is_active.lower() in ("true", "1", "yes", "on")
         
         image_url = None
+        image_variants = None
         if image:
             # Ensure upload directory exists
             os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -127,8 +159,7 @@ async def update_header_banner(
             unique_filename = f"banner_{uuid.uuid4().hex}.{file_ext}"
             file_path = os.path.join(UPLOAD_DIR, unique_filename)
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            save_upload(image, file_path)
             
             # Verify file was saved
             if not os.path.exists(file_path):
@@ -145,12 +176,21 @@ async def update_header_banner(
                 image_url = f"static/uploads/{unique_filename}"
             
             image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+            image_variants = await make_variants(file_path, image_url)
+
+        # If no new image provided, keep existing image_url
+        if image_url is None:
+            existing = crud.get_one(db, models.HeaderBanner, item_id)
+            if existing:
+                image_url = existing.image_url
+                image_variants = existing.image_variants
 
         obj = schemas.HeaderBannerUpdate(
             title=title,
             subtitle=subtitle,
             is_active=is_active_bool,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.update(db, models.HeaderBanner, item_id, obj)
     except Exception as e:
@@ -185,6 +225,7 @@ def delete_check_availability(item_id: int, db: Session = Depends(get_db), curre
 
 # ---------- Gallery ----------
 @router.get("/gallery/", response_model=list[schemas.Gallery])
+@public_content("gallery", models.Gallery)
 def list_gallery(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.Gallery, skip=skip, limit=limit)
 
@@ -209,8 +250,7 @@ async def create_gallery(
         unique_filename = f"gallery_{uuid.uuid4().hex}.{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_path)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -226,11 +266,13 @@ async def create_gallery(
             image_url = f"static/uploads/{unique_filename}"
         
         image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+        image_variants = await make_variants(file_path, image_url)
         
         obj = schemas.GalleryCreate(
             caption=caption,
             is_active=is_active,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.create(db, models.Gallery, obj)
     except HTTPException:
@@ -253,6 +295,7 @@ async def update_gallery(
 ):
     try:
         image_url = None
+        image_variants = None
         if image:
             os.makedirs(UPLOAD_DIR, exist_ok=True)
             if not os.access(UPLOAD_DIR, os.W_OK):
@@ -265,8 +308,7 @@ async def update_gallery(
             unique_filename = f"gallery_{uuid.uuid4().hex}.{file_ext}"
             file_path = os.path.join(UPLOAD_DIR, unique_filename)
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            save_upload(image, file_path)
             
             if not os.path.exists(file_path):
                 raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -282,17 +324,20 @@ async def update_gallery(
                 image_url = f"static/uploads/{unique_filename}"
             
             image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+            image_variants = await make_variants(file_path, image_url)
 
         # If no new image provided, keep existing image_url
         if image_url is None:
-            existing = crud.get_by_id(db, models.Gallery, item_id)
+            existing = crud.get_one(db, models.Gallery, item_id)
             if existing:
                 image_url = existing.image_url
+                image_variants = existing.image_variants
 
         obj = schemas.GalleryCreate(
             caption=caption,
             is_active=is_active,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.update(db, models.Gallery, item_id, obj)
     except HTTPException:
@@ -311,6 +356,7 @@ def delete_gallery(item_id: int, db: Session = Depends(get_db), current_user: Us
 
 # ---------- Reviews ----------
 @router.get("/reviews/", response_model=list[schemas.Review])
+@public_content("reviews", models.Review)
 def list_reviews(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.Review, skip=skip, limit=limit)
 
@@ -344,6 +390,7 @@ def delete_review(item_id: int, db: Session = Depends(get_db), current_user: Use
 
 # ---------- Resort Info ----------
 @router.get("/resort-info/", response_model=list[schemas.ResortInfo])
+@public_content("resort_info", models.ResortInfo)
 def list_resort_info(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.ResortInfo, skip=skip, limit=limit)
 
@@ -374,6 +421,7 @@ def delete_resort_info(item_id: int, db: Session = Depends(get_db), current_user
 
 # ---------- Signature Experiences ----------
 @router.get("/signature-experiences/", response_model=list[schemas.SignatureExperience])
+@public_content("signature_experiences", models.SignatureExperience)
 def list_signature_experiences(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.SignatureExperience, skip=skip, limit=limit)
 
@@ -399,8 +447,7 @@ async def create_signature_experience(
         unique_filename = f"sigexp_{uuid.uuid4().hex}.{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_path)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -416,12 +463,14 @@ async def create_signature_experience(
             image_url = f"static/uploads/{unique_filename}"
         
         image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+        image_variants = await make_variants(file_path, image_url)
         
         obj = schemas.SignatureExperienceCreate(
             title=title,
             description=description,
             is_active=is_active,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.create(db, models.SignatureExperience, obj)
     except HTTPException:
@@ -462,8 +511,7 @@ async def update_signature_experience(
             unique_filename = f"sigexp_{uuid.uuid4().hex}.{file_ext}"
             file_path = os.path.join(UPLOAD_DIR, unique_filename)
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            save_upload(image, file_path)
             
             if not os.path.exists(file_path):
                 raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -480,9 +528,10 @@ async def update_signature_experience(
             
             image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
             update_data["image_url"] = image_url
+            update_data["image_variants"] = await make_variants(file_path, image_url)
         else:
             # If no new image provided, keep existing image_url
-            existing = crud.get_by_id(db, models.SignatureExperience, item_id)
+            existing = crud.get_one(db, models.SignatureExperience, item_id)
             if existing:
                 update_data["image_url"] = existing.image_url
 
@@ -504,6 +553,7 @@ def delete_signature_experience(item_id: int, db: Session = Depends(get_db), cur
 
 # ---------- Plan Your Wedding ----------
 @router.get("/plan-weddings/", response_model=list[schemas.PlanWedding])
+@public_content("plan_weddings", models.PlanWedding)
 def list_plan_weddings(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.PlanWedding, skip=skip, limit=limit)
 
@@ -529,8 +579,7 @@ async def create_plan_wedding(
         unique_filename = f"wedding_{uuid.uuid4().hex}.{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_path)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -546,12 +595,14 @@ async def create_plan_wedding(
             image_url = f"static/uploads/{unique_filename}"
         
         image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+        image_variants = await make_variants(file_path, image_url)
         
         obj = schemas.PlanWeddingCreate(
             title=title,
             description=description,
             is_active=is_active,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.create(db, models.PlanWedding, obj)
     except HTTPException:
@@ -592,8 +643,7 @@ async def update_plan_wedding(
             unique_filename = f"wedding_{uuid.uuid4().hex}.{file_ext}"
             file_path = os.path.join(UPLOAD_DIR, unique_filename)
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            save_upload(image, file_path)
             
             if not os.path.exists(file_path):
                 raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -610,9 +660,10 @@ async def update_plan_wedding(
             
             image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
             update_data["image_url"] = image_url
+            update_data["image_variants"] = await make_variants(file_path, image_url)
         else:
             # If no new image provided, keep existing image_url
-            existing = crud.get_by_id(db, models.PlanWedding, item_id)
+            existing = crud.get_one(db, models.PlanWedding, item_id)
             if existing:
                 update_data["image_url"] = existing.image_url
 
@@ -634,6 +685,7 @@ def delete_plan_wedding(item_id: int, db: Session = Depends(get_db), current_use
 
 # ---------- Nearby Attractions ----------
 @router.get("/nearby-attractions/", response_model=list[schemas.NearbyAttraction])
+@public_content("nearby_attractions", models.NearbyAttraction)
 def list_nearby_attractions(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return crud.get_all(db, models.NearbyAttraction, skip=skip, limit=limit)
 
@@ -659,8 +711,7 @@ async def create_nearby_attraction(
         unique_filename = f"attraction_{uuid.uuid4().hex}.{file_ext}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, file_path)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -676,12 +727,14 @@ async def create_nearby_attraction(
             image_url = f"static/uploads/{unique_filename}"
         
         image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
+        image_variants = await make_variants(file_path, image_url)
         
         obj = schemas.NearbyAttractionCreate(
             title=title,
             description=description,
             is_active=is_active,
-            image_url=image_url
+            image_url=image_url,
+            image_variants=image_variants
         )
         return crud.create(db, models.NearbyAttraction, obj)
     except HTTPException:
@@ -722,8 +775,7 @@ async def update_nearby_attraction(
             unique_filename = f"attraction_{uuid.uuid4().hex}.{file_ext}"
             file_path = os.path.join(UPLOAD_DIR, unique_filename)
             
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(image.file, buffer)
+            save_upload(image, file_path)
             
             if not os.path.exists(file_path):
                 raise HTTPException(status_code=500, detail="File was not saved successfully")
@@ -740,9 +792,10 @@ async def update_nearby_attraction(
             
             image_url = f"/{image_url}" if not image_url.startswith('/') else image_url
             update_data["image_url"] = image_url
+            update_data["image_variants"] = await make_variants(file_path, image_url)
         else:
             # If no new image provided, keep existing image_url
-            existing = crud.get_by_id(db, models.NearbyAttraction, item_id)
+            existing = crud.get_one(db, models.NearbyAttraction, item_id)
             if existing:
                 update_data["image_url"] = existing.image_url
 
@@ -759,4 +812,92 @@ async def update_nearby_attraction(
 
 @router.delete("/nearby-attractions/{item_id}")
 def delete_nearby_attraction(item_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return crud.delete(db, models.NearbyAttraction, item_id)
\ No newline at end of file
+    return crud.delete(db, models.NearbyAttraction, item_id)
+
+
+# ---------- Bootstrap ----------
+# Everything the user end needs before first paint in one request: the public sections
+# above, the package catalog and the room types. The payload is built once, gzipped and
+# kept in the response cache until a frontend or Package row, or a room's type, price,
+# occupancy or picture changes (room_catalog); status changes from bookings do not count.
+BOOTSTRAP_SECTIONS = {
+    "header_banner": (models.HeaderBanner, schemas.HeaderBanner),
+    "gallery": (models.Gallery, schemas.Gallery),
+    "reviews": (models.Review, schemas.Review),
+    "resort_info": (models.ResortInfo, schemas.ResortInfo),
+    "signature_experiences": (models.SignatureExperience, schemas.SignatureExperience),
+    "plan_weddings": (models.PlanWedding, schemas.PlanWedding),
+    "nearby_attractions": (models.NearbyAttraction, schemas.NearbyAttraction),
+}
+# Rows per section and packages in the payload
+BOOTSTRAP_LIMIT = 100
+
+_bootstrap_cache = Cache(
+    "frontend_bootstrap",
+    RESPONSE_CACHE_TTL,
+    maxsize=4,
+    invalidate_on=[model.__tablename__ for model, _ in BOOTSTRAP_SECTIONS.values()] + ["packages", "room_catalog"],
+)
+
+
+def _room_types(db: Session) -> list:
+    rows = db.execute(
+        select(
+            Room.type,
+            func.count(Room.id),
+            func.min(Room.price),
+            func.max(Room.price),
+            func.max(Room.adults),
+            func.max(Room.children),
+            func.min(Room.image_url),
+        )
+        .group_by(Room.type)
+        .order_by(func.min(Room.price))
+    ).all()
+    return [
+        {"type": t, "rooms": count, "min_price": low, "max_price": high, "adults": adults, "children": children,
+         "image_url": image_url}
+        for t, count, low, high, adults, children, image_url in rows
+    ]
+
+
+def _dump(schema, rows) -> list:
+    adapter = TypeAdapter(list[schema])
+    return adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+
+
+def _build_bootstrap(db: Session) -> bytes:
+    payload = {}
+    for name, (model, schema) in BOOTSTRAP_SECTIONS.items():
+        payload[name] = _dump(schema, crud.get_all(db, model, limit=BOOTSTRAP_LIMIT))
+    packages = db.query(Package).order_by(Package.id).limit(BOOTSTRAP_LIMIT).all()
+    payload["packages"] = _dump(PackageOut, packages)
+    payload["room_types"] = _room_types(db)
+    # mtime=0 so every worker produces identical bytes, and so identical ETags
+    return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), compresslevel=9, mtime=0)
+
+
+@router.get("/frontend/bootstrap")
+def frontend_bootstrap(request: Request, db: Session = Depends(get_db)):
+    """
+    Public sections, packages and room types in one gzipped, cacheable payload:
+    {"header_banner": [...], ..., "packages": [...], "room_types": [...]}
+    """
+    body, result = _bootstrap_cache.get_or_compute("payload", lambda: _build_bootstrap(db))
+    gzipped = "gzip" in request.headers.get("accept-encoding", "").lower()
+    etag = etag_for(body)
+    if not gzipped:
+        # Each encoding is a different representation, so it needs its own strong ETag
+        etag = etag[:-1] + '-identity"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={PUBLIC_CONTENT_MAX_AGE}",
+        SURROGATE_KEY_HEADER: "frontend frontend-bootstrap",
+        "Vary": "Accept-Encoding",
+        CACHE_STATUS_HEADER: "MISS" if result == "miss" else "HIT",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        return Response(content=body, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(content=gzip.decompress(body), media_type="application/json", headers=headers)
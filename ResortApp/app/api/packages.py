@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Union
+from typing import List, Optional, Union
 import os
 from app.models.user import User
 from app.models.room import Room
 from app.models.Package import Package, PackageBooking, PackageBookingRoom
 from app.utils.auth import get_db, get_current_user
 from app.utils.booking_id import parse_display_id
+from app.utils.pagination import paginate
+from app.utils.availability import find_conflicting_night
+from app.utils.room_nights import reserve_nights, release_nights
+from app.utils.room_status import recompute_room_statuses
 from app.schemas.packages import PackageBookingCreate, PackageOut, PackageBookingOut
 from fastapi.responses import FileResponse
 from app.curd import packages as crud_package
-import shutil
 import uuid
+from app.utils.uploads import save_upload
+from app.utils.images import make_variants
+from app.utils.response_cache import cached_endpoint, RESPONSE_CACHE_TTL
 
 router = APIRouter(prefix="/packages", tags=["Packages"])
 
@@ -33,17 +39,18 @@ async def create_package_api(
     current_user: User = Depends(get_current_user)
 ):
     image_urls = []
+    image_variants = {}
     for img in images:
         # Generate unique filename
         filename = f"pkg_{uuid.uuid4().hex}_{img.filename}"
         file_path = os.path.join(UPLOAD_DIR, filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(img.file, buffer)
+        save_upload(img, file_path)
         # Store with leading slash for proper URL construction
         normalized_path = file_path.replace('\\', '/')
         image_urls.append(f"/{normalized_path}")
+        image_variants[image_urls[-1]] = await make_variants(file_path, image_urls[-1])
 
-    return crud_package.create_package(db, title, description, price, image_urls)
+    return crud_package.create_package(db, title, description, price, image_urls, image_variants)
 
 
 
@@ -65,10 +72,10 @@ def book_package_api(
 ):
     result = crud_package.book_package(db, booking)
     
-    # Calculate booking charges and send confirmation email if email address is provided
+    # Calculate booking charges and queue a confirmation email if email address is provided
     if booking.guest_email and result:
         try:
-            from app.utils.email import send_email, create_booking_confirmation_email
+            from app.utils.email import queue_email, create_booking_confirmation_email
             from datetime import datetime, date
             
             # Get package details
@@ -111,7 +118,8 @@ def book_package_api(
                 stay_nights=stay_nights
             )
             
-            send_email(
+            queue_email(
+                db,
                 to_email=booking.guest_email,
                 subject=f"Package Booking Confirmation {formatted_booking_id} - Elysian Retreat",
                 html_content=email_html,
@@ -119,8 +127,11 @@ def book_package_api(
             )
         except Exception as e:
             # Log error but don't fail the booking
-            print(f"Failed to send confirmation email: {str(e)}")
-    
+            print(f"Failed to queue confirmation email: {str(e)}")
+
+    # Serialise before the commit expires the loaded rooms; booking and email commit together
+    result = PackageBookingOut.model_validate(result)
+    db.commit()
     return result
 
 @router.post("/book/guest", response_model=PackageBookingOut, summary="Book a package as a guest")
@@ -134,7 +145,7 @@ def book_package_guest_api(
     try:
         result = crud_package.book_package(db, booking)
         
-        # Calculate booking charges and send confirmation email if email address is provided
+        # Calculate booking charges and queue a confirmation email if email address is provided
         if result:
             # Normalize email for sending
             guest_email = None
@@ -146,7 +157,7 @@ def book_package_guest_api(
             
             if guest_email:
                 try:
-                    from app.utils.email import send_email, create_booking_confirmation_email
+                    from app.utils.email import queue_email, create_booking_confirmation_email
                     from datetime import datetime, date
                     
                     # Get package details
@@ -189,7 +200,8 @@ def book_package_guest_api(
                         stay_nights=stay_nights
                     )
                     
-                    send_email(
+                    queue_email(
+                        db,
                         to_email=guest_email,
                         subject=f"Package Booking Confirmation {formatted_booking_id} - Elysian Retreat",
                         html_content=email_html,
@@ -197,8 +209,11 @@ def book_package_guest_api(
                     )
                 except Exception as e:
                     # Log error but don't fail the booking
-                    print(f"Failed to send confirmation email: {str(e)}")
-        
+                    print(f"Failed to queue confirmation email: {str(e)}")
+
+        # Serialise before the commit expires the loaded rooms; booking and email commit together
+        result = PackageBookingOut.model_validate(result)
+        db.commit()
         return result
         
     except HTTPException:
@@ -218,23 +233,27 @@ def book_package_guest_api(
         )
 
 @router.get("/bookingsall", response_model=List[PackageBookingOut])
-def get_bookings(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
+def get_bookings(response: Response, db: Session = Depends(get_db), skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     # It's possible for a package to be deleted, leaving an orphaned booking.
     # We must filter to only include bookings that still have a valid package_id.
     # We also need to eagerly load the related package and room data for the frontend.
-    return db.query(PackageBooking).options(
+    query = db.query(PackageBooking).options(
         joinedload(PackageBooking.package),
         joinedload(PackageBooking.rooms).joinedload(PackageBookingRoom.room)
-    ).filter(PackageBooking.package_id.is_not(None)).offset(skip).limit(limit).all()
+    ).filter(PackageBooking.package_id.is_not(None))
+    return paginate(query, PackageBooking.id, PackageBooking.id, limit, cursor=cursor, skip=skip,
+                    descending=False, response=response)
 
 
 @router.get("/", response_model=List[PackageOut])
+@cached_endpoint("packages", RESPONSE_CACHE_TTL, invalidate_on=("packages",))
 def list_packages(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     # Query directly in the endpoint to apply pagination
     return db.query(Package).offset(skip).limit(limit).all()
 
 
 @router.get("/{package_id}", response_model=PackageOut)
+@cached_endpoint("package", RESPONSE_CACHE_TTL, invalidate_on=("packages",))
 def get_package_api(package_id: int, db: Session = Depends(get_db)):
     return crud_package.get_package(db, package_id)
 
@@ -270,11 +289,9 @@ def cancel_package_booking(booking_id: Union[str, int], db: Session = Depends(ge
         raise HTTPException(status_code=404, detail="Package booking not found")
 
     # Free rooms back to Available
-    if booking.rooms:
-        room_ids = [br.room_id for br in booking.rooms]
-        db.query(Room).filter(Room.id.in_(room_ids)).update({"status": "Available"}, synchronize_session=False)
-
     booking.status = "cancelled"
+    release_nights(db, package_booking_id=booking.id)
+    recompute_room_statuses(db, [br.room_id for br in booking.rooms])
     db.commit()
     db.refresh(booking)
     return booking
@@ -288,7 +305,6 @@ def extend_package_booking_checkout(booking_id: Union[str, int], new_checkout: s
     Accepts both display ID (PK-000001) and numeric ID.
     """
     from datetime import datetime
-    from sqlalchemy import and_, or_
     
     # Parse display ID (PK-000001) or accept numeric ID
     numeric_id, booking_type = parse_display_id(str(booking_id))
@@ -329,43 +345,19 @@ def extend_package_booking_checkout(booking_id: Union[str, int], new_checkout: s
     # Check for conflicts with other bookings on the same rooms
     room_ids = [br.room_id for br in booking.rooms if br.room_id]
     
-    if room_ids:
-        # Check for conflicts with regular bookings
-        from app.models.booking import Booking, BookingRoom
-        conflicting_bookings = db.query(Booking).join(BookingRoom).filter(
-            BookingRoom.room_id.in_(room_ids),
-            Booking.status.in_(['booked', 'checked-in', 'checked_in']),
-            and_(
-                Booking.check_in < new_checkout_date,
-                Booking.check_out > booking.check_out
-            )
-        ).first()
-        
-        if conflicting_bookings:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Cannot extend checkout date. Room(s) are already booked by another booking (ID: {conflicting_bookings.id}) during the extended period."
-            )
-        
-        # Check for conflicts with other package bookings
-        conflicting_package_bookings = db.query(PackageBooking).join(PackageBookingRoom).filter(
-            PackageBooking.id != booking_id,
-            PackageBookingRoom.room_id.in_(room_ids),
-            PackageBooking.status.in_(['booked', 'checked-in', 'checked_in']),
-            and_(
-                PackageBooking.check_in < new_checkout_date,
-                PackageBooking.check_out > booking.check_out
-            )
-        ).first()
-        
-        if conflicting_package_bookings:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Cannot extend checkout date. Room(s) are already booked by another package booking (ID: {conflicting_package_bookings.id}) during the extended period."
-            )
-    
-    # Update the checkout date
+    # A conflict exists if any other booking holds one of these rooms on a night of the extended period
+    conflict = find_conflicting_night(db, room_ids, booking.check_out, new_checkout_date)
+    if conflict is not None:
+        if conflict.booking_id is not None:
+            detail = f"Cannot extend checkout date. Room(s) are already booked by another booking (ID: {conflict.booking_id}) during the extended period."
+        else:
+            detail = f"Cannot extend checkout date. Room(s) are already booked by another package booking (ID: {conflict.package_booking_id}) during the extended period."
+        raise HTTPException(status_code=400, detail=detail)
+
+    # Hold the extra nights and update the checkout date
+    reserve_nights(db, room_ids, booking.check_out, new_checkout_date, package_booking_id=booking.id)
     booking.check_out = new_checkout_date
+    recompute_room_statuses(db, room_ids)
     db.commit()
     db.refresh(booking)
     
@@ -419,23 +411,20 @@ def check_in_package_booking(
     # Save ID card image
     id_card_filename = f"id_pkg_{booking_id}_{uuid.uuid4().hex}.jpg"
     id_card_path = os.path.join(CHECKIN_UPLOAD_DIR, id_card_filename)
-    with open(id_card_path, "wb") as buffer:
-        shutil.copyfileobj(id_card_image.file, buffer)
+    save_upload(id_card_image, id_card_path)
     booking.id_card_image_url = id_card_filename
 
     # Save guest photo
     guest_photo_filename = f"guest_pkg_{booking_id}_{uuid.uuid4().hex}.jpg"
     guest_photo_path = os.path.join(CHECKIN_UPLOAD_DIR, guest_photo_filename)
-    with open(guest_photo_path, "wb") as buffer:
-        shutil.copyfileobj(guest_photo.file, buffer)
+    save_upload(guest_photo, guest_photo_path)
     booking.guest_photo_url = guest_photo_filename
 
     booking.status = "checked-in"
     booking.user_id = current_user.id
 
-    if booking.rooms:
-        room_ids = [br.room_id for br in booking.rooms]
-        db.query(Room).filter(Room.id.in_(room_ids)).update({"status": "Checked-in"}, synchronize_session=False)
+    # Rooms held tonight by the booking show as occupied
+    recompute_room_statuses(db, [br.room_id for br in booking.rooms])
 
     db.commit()
     db.refresh(booking)
@@ -1,10 +1,12 @@
 # app/routers/reports.py
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, String
 from typing import List, Optional, Dict, Any
 from datetime import date, timedelta, datetime
 from app.utils.auth import get_db
+from app.utils.pagination import paginate
+from app.curd.foodorder import get_guests_for_rooms
 from app import models as models
 from app.schemas import booking as booking_schema, packages as package_schema, suggestion as suggestion_schema
 from app.schemas.foodorder import FoodOrderItemOut
@@ -79,18 +81,21 @@ def get_guest_profile(
 
 @router.get("/food-orders")
 def get_food_orders(
+    response: Response,
     from_date: Optional[date] = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
     to_date: Optional[date] = Query(None, description="End date for filtering (YYYY-MM-DD)"),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     query = (
         db.query(models.FoodOrder)
         .options(
             joinedload(models.FoodOrder.employee),
-            # Eagerly load booking through room to get guest name
-            joinedload(models.FoodOrder.room)
+            # Room for its number; items for the count
+            joinedload(models.FoodOrder.room),
+            selectinload(models.FoodOrder.items),
         )
     )
 
@@ -99,49 +104,17 @@ def get_food_orders(
     if to_date:
         query = query.filter(models.foodorder.FoodOrder.created_at <= to_date)
 
-    orders = query.order_by(models.FoodOrder.created_at.desc()).offset(skip).limit(limit).all()
-    # Fetch all rooms in one go
-    room_map = {r.id: r for r in db.query(models.Room).all()}
-
-    def get_guest_for_room(room_id, db_session):
-        if not room_id:
-            return None
-        # Find the most recent active booking associated with this room (check both regular and package bookings)
-        # Check regular bookings first
-        active_booking = (
-            db_session.query(models.Booking)
-            .join(models.booking.BookingRoom)
-            .filter(models.booking.BookingRoom.room_id == room_id)
-            .filter(models.Booking.status.in_(["checked-in", "booked"]))
-            .order_by(models.Booking.id.desc())
-            .first()
-        )
-        
-        if active_booking:
-            return active_booking.guest_name
-        
-        # Check package bookings if no regular booking found
-        active_package_booking = (
-            db_session.query(models.PackageBooking)
-            .join(models.PackageBookingRoom)
-            .filter(models.PackageBookingRoom.room_id == room_id)
-            .filter(models.PackageBooking.status.in_(["checked-in", "booked"]))
-            .order_by(models.PackageBooking.id.desc())
-            .first()
-        )
-        
-        if active_package_booking:
-            return active_package_booking.guest_name
-        
-        return None
+    orders = paginate(query, models.FoodOrder.created_at, models.FoodOrder.id, limit, cursor=cursor, skip=skip, response=response)
+    # Guest names for the whole page in at most two queries
+    guests = get_guests_for_rooms([o.room_id for o in orders], db)
 
     return [
         {
             "id": o.id,
-            "room_number": room_map.get(o.room_id).number if room_map.get(o.room_id) else None,
+            "room_number": o.room.number if o.room else None,
             "employee_name": o.employee.name if o.employee else None,
             # Add guest name to the response
-            "guest_name": get_guest_for_room(o.room_id, db),
+            "guest_name": guests.get(o.room_id),
             "amount": o.amount,
             "status": o.status,
             "item_count": len(o.items),
@@ -192,7 +165,9 @@ def get_user_history(
 
     # 2. Package Bookings created by user
     package_bookings_query = db.query(models.PackageBooking).filter(models.PackageBooking.user_id == user_id) 
-    package_bookings = apply_date_filter(package_bookings_query, models.PackageBooking.check_in).all()
+    package_bookings = apply_date_filter(package_bookings_query, models.PackageBooking.check_in).options(
+        joinedload(models.PackageBooking.package)
+    ).all()
     for pb in package_bookings:
         activities.append(UserActivityItem(
             type="Package Booking", activity_date=datetime.combine(pb.check_in, datetime.min.time()),
@@ -202,8 +177,9 @@ def get_user_history(
 
     # 3. Food Orders assigned to user
     food_orders_query = db.query(models.FoodOrder).filter(models.FoodOrder.assigned_employee_id == user_id)
-    food_orders = apply_date_filter(food_orders_query, models.FoodOrder.created_at).all()
-    food_orders_query = food_orders_query.options(joinedload(models.FoodOrder.room))
+    food_orders = apply_date_filter(food_orders_query, models.FoodOrder.created_at).options(
+        joinedload(models.FoodOrder.room), selectinload(models.FoodOrder.items)
+    ).all()
     for fo in food_orders:
         activities.append(UserActivityItem(
             type="Food Order", activity_date=fo.created_at,
@@ -213,7 +189,9 @@ def get_user_history(
 
     # 4. Services assigned to user
     services_query = db.query(models.AssignedService).filter(models.AssignedService.employee_id == user_id)
-    assigned_services = apply_date_filter(services_query, models.AssignedService.assigned_at).all()
+    assigned_services = apply_date_filter(services_query, models.AssignedService.assigned_at).options(
+        joinedload(models.AssignedService.service), joinedload(models.AssignedService.room)
+    ).all()
     for s in assigned_services:
         activities.append(UserActivityItem(
             type="Service", activity_date=s.assigned_at,
@@ -238,11 +216,13 @@ def get_user_history(
 
 @router.get("/service-charges")
 def get_service_charges(
+    response: Response,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     query = (
         db.query(models.AssignedService)
@@ -258,7 +238,7 @@ def get_service_charges(
     if to_date:
         query = query.filter(models.AssignedService.assigned_at <= to_date)
 
-    assigned_services = query.order_by(models.AssignedService.assigned_at.desc()).offset(skip).limit(limit).all()
+    assigned_services = paginate(query, models.AssignedService.assigned_at, models.AssignedService.id, limit, cursor=cursor, skip=skip, response=response)
     return [
         {
             "id": s.id,
@@ -275,11 +255,13 @@ def get_service_charges(
 
 @router.get("/room-charges")
 def get_room_charges(
+    response: Response,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     query = (
         db.query(models.Checkout)
@@ -292,7 +274,7 @@ def get_room_charges(
         # Add one day to to_date to include all records on that day
         query = query.filter(models.Checkout.checkout_date < to_date + timedelta(days=1))
 
-    checkouts = query.order_by(models.Checkout.checkout_date.desc()).offset(skip).limit(limit).all()
+    checkouts = paginate(query, models.Checkout.checkout_date, models.Checkout.id, limit, cursor=cursor, skip=skip, response=response)
     return [
         {
             "id": c.id,
@@ -340,11 +322,13 @@ def get_rent_records(
 
 @router.get("/expenses")
 def get_all_expenses(
+    response: Response,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     """Retrieves a list of all expenses."""
     query = db.query(models.Expense)
@@ -354,7 +338,7 @@ def get_all_expenses(
     if to_date:
         query = query.filter(models.Expense.date <= to_date)
         
-    expenses = query.order_by(models.Expense.date.desc()).offset(skip).limit(limit).all()
+    expenses = paginate(query, models.Expense.date, models.Expense.id, limit, cursor=cursor, skip=skip, response=response)
     return [
         {
             "id": e.id,
@@ -366,23 +350,69 @@ def get_all_expenses(
         for e in expenses
     ]
 
+@router.get("/daily-revenue")
+def get_daily_revenue(
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    group_by: str = Query("day", pattern="^(day|month)$"),
+    db: Session = Depends(get_db),
+):
+    """Revenue, expenses and occupancy per day or month, read from the daily rollups."""
+    rollup = models.DailyRollup
+    period = rollup.date if group_by == "day" else func.substr(func.cast(rollup.date, String), 1, 7)
+    query = db.query(
+        period.label("period"),
+        func.sum(rollup.room_revenue), func.sum(rollup.package_revenue), func.sum(rollup.food_revenue),
+        func.sum(rollup.service_revenue), func.sum(rollup.tax), func.sum(rollup.discount),
+        func.sum(rollup.grand_total), func.sum(rollup.checkouts), func.sum(rollup.food_order_amount),
+        func.sum(rollup.expenses), func.sum(rollup.occupied_rooms),
+    )
+    if from_date:
+        query = query.filter(rollup.date >= from_date)
+    if to_date:
+        query = query.filter(rollup.date <= to_date)
+
+    rows = query.group_by(period).order_by(period).all()
+    return [
+        {
+            "period": str(p),
+            "room_revenue": room or 0,
+            "package_revenue": package or 0,
+            "food_revenue": food or 0,
+            "service_revenue": service or 0,
+            "tax": tax or 0,
+            "discount": discount or 0,
+            "grand_total": total or 0,
+            "checkouts": checkouts or 0,
+            "food_order_amount": food_orders or 0,
+            "expenses": expenses or 0,
+            "occupied_room_nights": nights or 0,
+        }
+        for p, room, package, food, service, tax, discount, total, checkouts, food_orders, expenses, nights in rows
+    ]
+
 @router.get("/room-bookings", response_model=List[booking_schema.BookingOut])
 def get_all_room_bookings(
+    response: Response,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     """Retrieves a list of all standard room bookings."""
-    query = db.query(models.Booking)
+    query = db.query(models.Booking).options(
+        selectinload(models.Booking.booking_rooms).joinedload(models.booking.BookingRoom.room),
+        joinedload(models.Booking.user).joinedload(models.User.role),
+    )
     if from_date:
         query = query.filter(models.Booking.check_in >= from_date)
     if to_date:
         # Filter bookings that start before or on the to_date
         query = query.filter(models.Booking.check_in <= to_date)
     
-    bookings = query.order_by(models.Booking.id.desc()).offset(skip).limit(limit).all()
+    bookings = paginate(query, models.Booking.id, models.Booking.id, limit, cursor=cursor, skip=skip, response=response)
     
     # Manually construct the response to include calculated total_amount
     response = []
@@ -400,30 +430,37 @@ def get_all_room_bookings(
 
 @router.get("/package-bookings", response_model=List[package_schema.PackageBookingOut])
 def get_all_package_bookings(
+    response: Response,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     """Retrieves a list of all package bookings."""
     # Use an inner join to filter out orphaned bookings where the package has been deleted.
     # This prevents validation errors when the response model expects a valid package_id.
-    query = db.query(models.PackageBooking).join(models.PackageBooking.package)
+    query = db.query(models.PackageBooking).join(models.PackageBooking.package).options(
+        selectinload(models.PackageBooking.rooms).joinedload(models.PackageBookingRoom.room),
+        selectinload(models.PackageBooking.package).selectinload(models.Package.images),
+    )
 
     if from_date:
         query = query.filter(models.PackageBooking.check_in >= from_date)
     if to_date:
         query = query.filter(models.PackageBooking.check_in <= to_date)
-    return query.order_by(models.PackageBooking.id.desc()).offset(skip).limit(limit).all()
+    return paginate(query, models.PackageBooking.id, models.PackageBooking.id, limit, cursor=cursor, skip=skip, response=response)
 
 @router.get("/employees")
 def get_all_employees(
+    response: Response,
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
     db: Session = Depends(get_db),
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
     """Retrieves a list of all active employees and their salaries."""
     # The Employee model itself doesn't have an 'is_active' flag. We assume all listed employees are active.
@@ -432,7 +469,8 @@ def get_all_employees(
         query = query.filter(models.Employee.join_date >= from_date)
     if to_date:
         query = query.filter(models.Employee.join_date <= to_date)
-    employees = query.order_by(models.Employee.name).offset(skip).limit(limit).all()
+    employees = paginate(query, models.Employee.name, models.Employee.id, limit, cursor=cursor, skip=skip,
+                         descending=False, response=response)
     return [
         {
             "id": emp.id,
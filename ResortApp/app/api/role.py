@@ -1,20 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
 from app.schemas.user import RoleCreate, RoleOut
 from app.curd import role as crud_role
 from app.models.user import User
-from app.utils.auth import get_current_user
+from app.utils.auth import get_db, get_current_user
 
 router = APIRouter(prefix="/roles", tags=["Roles"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=RoleOut)
 def create_new_role(role: RoleCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     if user.role.name != "admin":
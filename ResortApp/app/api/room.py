@@ -1,25 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, select
+from app.utils.auth import get_db, get_async_db, db_mode_route
 from app.schemas.room import RoomCreate, RoomOut
 from app.curd import room as crud_room
 from app.models.room import Room
 from app.models.booking import Booking, BookingRoom
-import shutil
+from app.utils.availability import get_availability_grid
 import os
 from uuid import uuid4
 from datetime import date
+from app.utils.uploads import save_upload
 
 router = APIRouter(prefix="/rooms", tags=["Rooms"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 UPLOAD_DIR = os.path.join("static", "rooms")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -43,8 +39,7 @@ def create_room_test(
                 ext = image.filename.split('.')[-1]
                 filename = f"room_{uuid4().hex}.{ext}"
                 image_path = os.path.join(UPLOAD_DIR, filename)
-                with open(image_path, "wb") as buffer:
-                    shutil.copyfileobj(image.file, buffer)
+                save_upload(image, image_path)
             except Exception as e:
                 print(f"Error saving image: {e}")
                 raise HTTPException(status_code=500, detail=f"Error saving image: {str(e)}")
@@ -99,14 +94,7 @@ def delete_room_test(room_id: int, db: Session = Depends(get_db)):
 @router.get("/test", response_model=list[RoomOut])
 def get_rooms_test(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
     try:
-        # Update room statuses before fetching (non-blocking - continues even if update fails)
-        try:
-            from app.utils.room_status import update_room_statuses
-            update_room_statuses(db)
-        except Exception as status_error:
-            print(f"Room status update failed (continuing): {status_error}")
-            # Continue fetching rooms even if status update fails
-        
+        # Room status is maintained by booking events and the day-rollover job (app/utils/room_status.py)
         rooms = db.query(Room).offset(skip).limit(limit).all()
         return rooms
         
@@ -141,8 +129,7 @@ def create_room(
                 ext = image.filename.split('.')[-1]
                 filename = f"room_{uuid4().hex}.{ext}"
                 image_path = os.path.join(UPLOAD_DIR, filename)
-                with open(image_path, "wb") as buffer:
-                    shutil.copyfileobj(image.file, buffer)
+                save_upload(image, image_path)
             except Exception as e:
                 print(f"Error saving image: {e}")
                 raise HTTPException(status_code=500, detail=f"Error saving image: {str(e)}")
@@ -170,8 +157,8 @@ def create_room(
 @router.post("/update-statuses")
 def update_room_statuses_endpoint(db: Session = Depends(get_db)):
     """
-    Manually trigger room status update based on current bookings.
-    This endpoint can be called to refresh room statuses.
+    Manually trigger a full room status recompute based on current bookings.
+    Statuses are normally kept current by booking events and the day-rollover job.
     """
     try:
         from app.utils.room_status import update_room_statuses
@@ -180,7 +167,7 @@ def update_room_statuses_endpoint(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating room statuses: {str(e)}")
 
-@router.get("/", response_model=list[RoomOut])
+@db_mode_route(router.get("/", response_model=list[RoomOut]), use_async=False)
 def get_rooms(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     try:
         # Test database connection first
@@ -190,13 +177,8 @@ def get_rooms(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
             print(f"Database connection test failed: {conn_error}")
             raise HTTPException(status_code=503, detail="Database connection unavailable. Please try again.")
         
-        # Update room statuses before fetching (non-blocking - continues even if update fails)
-        try:
-            from app.utils.room_status import update_room_statuses
-            update_room_statuses(db)
-        except Exception as status_error:
-            print(f"Room status update failed (continuing): {status_error}")
-            # Continue fetching rooms even if status update fails
+        # Room status is maintained by booking events and the day-rollover job
+        # (app/utils/room_status.py), so this is a plain read with no row locks
         
         # Query rooms with proper error handling
         try:
@@ -225,6 +207,31 @@ def get_rooms(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
         raise HTTPException(status_code=500, detail=f"Error fetching rooms: {str(e)}")
 
 
+@db_mode_route(router.get("/", response_model=list[RoomOut]), use_async=True)
+async def get_rooms_async(db: AsyncSession = Depends(get_async_db), skip: int = 0, limit: int = 20):
+    try:
+        result = await db.execute(select(Room).offset(skip).limit(limit))
+        return result.scalars().all()
+    except Exception as e:
+        print(f"Error fetching rooms: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching rooms: {str(e)}")
+
+
+@router.get("/availability")
+def get_room_availability(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    db: Session = Depends(get_db),
+):
+    """
+    Room x date occupancy grid for the nights from..to (inclusive), streamed as columnar JSON.
+    Each cell is F (free), B (booked), P (package) or M (maintenance), with the booking
+    display ID (BK-/PK-) alongside. Cached per window until the next booking or room change.
+    """
+    chunks = get_availability_grid(db, from_date, to_date)
+    return StreamingResponse(iter(chunks), media_type="application/json")
+
+
 # ---------------- DELETE ----------------
 @router.delete("/{room_id}")
 def delete_room(room_id: int, db: Session = Depends(get_db)):
@@ -285,8 +292,7 @@ def update_room(
         ext = image.filename.split(".")[-1]
         filename = f"room_{uuid4().hex}.{ext}"
         image_path = os.path.join(UPLOAD_DIR, filename)
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        save_upload(image, image_path)
         db_room.image_url = f"/static/rooms/{filename}"
 
     db.commit()
@@ -2,12 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 import os
-import shutil
 import uuid
 from app.schemas import service as service_schema
 from app.models.user import User
 from app.curd import service as service_crud
 from app.utils.auth import get_db, get_current_user
+from app.utils.uploads import save_upload
+from app.utils.images import make_variants
+from app.utils.response_cache import cached_endpoint, RESPONSE_CACHE_TTL
 
 router = APIRouter(prefix="/services", tags=["Services"])
 
@@ -25,19 +27,21 @@ async def create_service(
     current_user: User = Depends(get_current_user)
 ):
     image_urls = []
+    image_variants = {}
     for img in images:
         # Generate unique filename
         filename = f"svc_{uuid.uuid4().hex}_{img.filename}"
         file_path = os.path.join(UPLOAD_DIR, filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(img.file, buffer)
+        save_upload(img, file_path)
         # Store with leading slash for proper URL construction
         normalized_path = file_path.replace('\\', '/')
         image_urls.append(f"/{normalized_path}")
+        image_variants[image_urls[-1]] = await make_variants(file_path, image_urls[-1])
     
-    return service_crud.create_service(db, name, description, charges, image_urls)
+    return service_crud.create_service(db, name, description, charges, image_urls, image_variants)
 
 @router.get("/", response_model=List[service_schema.ServiceOut])
+@cached_endpoint("services", RESPONSE_CACHE_TTL, invalidate_on=("services",))
 def list_services(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
     return service_crud.get_services(db, skip=skip, limit=limit)
 
@@ -1,23 +1,16 @@
 from ast import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
 from app.schemas.user import UserCreate, UserOut, AdminSetupRequest, RoleCreate
 from app.curd import user as crud_user
 from app.curd import role as crud_role
-from app.utils.auth import get_current_user
+from app.utils.auth import get_db, get_current_user, get_password_hash
 from app.models.user import User, Role
 from sqlalchemy.orm import joinedload
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 @router.get("/me", response_model=UserOut)
 def read_current_user(current_user = Depends(get_current_user)):
     return current_user
@@ -26,7 +19,8 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     db_user = crud_user.get_user_by_email(db, email=user.email,)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud_user.create_user(db=db, user=user)
+    hashed_password = get_password_hash(user.password)
+    return crud_user.create_user(db=db, user=user, hashed_password=hashed_password)
 
 @router.post("/setup-admin", response_model=UserOut, summary="One-time Admin User Setup")
 def setup_initial_admin(setup_data: AdminSetupRequest, db: Session = Depends(get_db)):
@@ -53,7 +47,8 @@ def setup_initial_admin(setup_data: AdminSetupRequest, db: Session = Depends(get
         role_id=admin_role.id,
     )
     
-    new_admin_user = crud_user.create_user(db=db, user=user_data)
+    hashed_password = get_password_hash(user_data.password)
+    new_admin_user = crud_user.create_user(db=db, user=user_data, hashed_password=hashed_password)
     return new_admin_user
 
 @router.get("/")
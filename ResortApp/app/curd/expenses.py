@@ -1,6 +1,7 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.models.expense import Expense
 from app.schemas.expenses import ExpenseCreate, ExpenseUpdate
+from app.utils.pagination import paginate
 
 def create_expense(db: Session, data, image_path: str = None):
     # Handle both dict and Pydantic model
@@ -23,8 +24,9 @@ def create_expense(db: Session, data, image_path: str = None):
     db.refresh(new_expense)
     return new_expense
 
-def get_all_expenses(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Expense).offset(skip).limit(limit).all()
+def get_all_expenses(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, response=None):
+    return paginate(db.query(Expense).options(joinedload(Expense.employee)), Expense.id, Expense.id, limit, cursor=cursor, skip=skip,
+                    descending=False, response=response)
 
 def get_expense_by_id(db: Session, expense_id: int):
     return db.query(Expense).filter(Expense.id == expense_id).first()
@@ -3,14 +3,14 @@ from app.schemas.food_item import FoodItemCreate
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import joinedload
 
-def create_food_item(db: Session, item: FoodItemCreate, image_paths: list[str]):
+def create_food_item(db: Session, item: FoodItemCreate, image_paths: list[str], image_variants: dict = None):
     db_item = FoodItem(**item.dict())
     db.add(db_item)
     db.commit()
     db.refresh(db_item)
 
     for path in image_paths:
-        image = FoodItemImage(image_url=path, item_id=db_item.id)
+        image = FoodItemImage(image_url=path, item_id=db_item.id, image_variants=(image_variants or {}).get(path))
         db.add(image)
 
     db.commit()
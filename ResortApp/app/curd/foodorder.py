@@ -1,41 +1,44 @@
-from sqlalchemy.orm import Session
+from typing import Dict
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 from app.models.foodorder import FoodOrder, FoodOrderItem
 from app.models.booking import Booking, BookingRoom
 from app.models.Package import PackageBooking, PackageBookingRoom
 from app.schemas.foodorder import FoodOrderCreate, FoodOrderUpdate
+from app.utils.pagination import paginate
+
+ACTIVE_GUEST_STATUSES = ["checked-in", "booked"]
+
+def get_guests_for_rooms(room_ids, db: Session) -> Dict[int, str]:
+    """
+    Guest name of the latest active booking (regular first, then package) of every
+    room in room_ids, in at most two queries. Rooms without one are left out.
+    """
+    remaining = {room_id for room_id in room_ids if room_id}
+    guests = {}
+    for booking_model, link_model, link_fk in (
+        (Booking, BookingRoom, BookingRoom.booking_id),
+        (PackageBooking, PackageBookingRoom, PackageBookingRoom.package_booking_id),
+    ):
+        if not remaining:
+            break
+        rows = db.execute(
+            select(link_model.room_id, booking_model.guest_name)
+            .join(booking_model, booking_model.id == link_fk)
+            .where(link_model.room_id.in_(remaining), booking_model.status.in_(ACTIVE_GUEST_STATUSES))
+            .order_by(booking_model.id.desc())
+        )
+        for room_id, guest_name in rows:
+            if room_id in remaining:
+                guests[room_id] = guest_name
+                remaining.discard(room_id)
+    return guests
 
 def get_guest_for_room(room_id, db: Session):
     """Get guest name for a room from either regular or package bookings"""
     if not room_id:
         return None
-    
-    # Check regular bookings first
-    active_booking = (
-        db.query(Booking)
-        .join(BookingRoom)
-        .filter(BookingRoom.room_id == room_id)
-        .filter(Booking.status.in_(["checked-in", "booked"]))
-        .order_by(Booking.id.desc())
-        .first()
-    )
-    
-    if active_booking:
-        return active_booking.guest_name
-    
-    # Check package bookings
-    active_package_booking = (
-        db.query(PackageBooking)
-        .join(PackageBookingRoom)
-        .filter(PackageBookingRoom.room_id == room_id)
-        .filter(PackageBooking.status.in_(["checked-in", "booked"]))
-        .order_by(PackageBooking.id.desc())
-        .first()
-    )
-    
-    if active_package_booking:
-        return active_package_booking.guest_name
-    
-    return None
+    return get_guests_for_rooms([room_id], db).get(room_id)
 
 def create_food_order(db: Session, order_data: FoodOrderCreate):
     order = FoodOrder(
@@ -45,31 +48,28 @@ def create_food_order(db: Session, order_data: FoodOrderCreate):
         status="active",
         billing_status="unbilled"
     )
+    # Items go in through the relationship, so the order and its items are written in one commit
+    order.items = [
+        FoodOrderItem(food_item_id=item_data.food_item_id, quantity=item_data.quantity)
+        for item_data in order_data.items
+    ]
     db.add(order)
     db.commit()
     db.refresh(order)
-
-    for item_data in order_data.items:
-        item = FoodOrderItem(
-            order_id=order.id,
-            food_item_id=item_data.food_item_id,
-            quantity=item_data.quantity,
-        )
-        db.add(item)
-    db.commit()
-    db.refresh(order)
     return order
 
-def get_food_orders(db: Session, skip: int = 0, limit: int = 100):
-    orders = db.query(FoodOrder).offset(skip).limit(limit).all()
+def get_food_orders(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, response=None):
+    query = db.query(FoodOrder).options(selectinload(FoodOrder.items).joinedload(FoodOrderItem.food_item))
+    orders = paginate(query, FoodOrder.id, FoodOrder.id, limit, cursor=cursor, skip=skip,
+                      descending=False, response=response)
+    # Guest names for the whole page at once, from the active bookings of its rooms
+    guests = get_guests_for_rooms([order.room_id for order in orders], db)
     for order in orders:
         for item in order.items:
             item.food_item_name = item.food_item.name if item.food_item else "Unknown"
-        # Add guest_name by looking up active bookings for the room
-        if hasattr(order, 'room_id') and order.room_id:
-            guest_name = get_guest_for_room(order.room_id, db)
-            if guest_name:
-                order.guest_name = guest_name
+        guest_name = guests.get(order.room_id)
+        if guest_name:
+            order.guest_name = guest_name
     return orders
 
 def delete_food_order(db: Session, order_id: int):
@@ -1,23 +1,27 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
 from fastapi import HTTPException
 from typing import List
 
 from app.models.Package import Package, PackageImage, PackageBooking, PackageBookingRoom
 from app.models.room import Room
 from app.schemas.packages import PackageBookingCreate
+from app.utils.availability import ensure_rooms_available
+from app.utils.room_nights import reserve_nights, release_nights
+from app.utils.room_status import recompute_room_statuses
+from app.curd.user import get_or_create_guest_user
 
 
 # ------------------- Packages -------------------
 
-def create_package(db: Session, title: str, description: str, price: float, image_urls: List[str]):
+def create_package(db: Session, title: str, description: str, price: float, image_urls: List[str],
+                   image_variants: dict = None):
     pkg = Package(title=title, description=description, price=price)
     db.add(pkg)
     db.commit()
     db.refresh(pkg)
 
     for url in image_urls:
-        img = PackageImage(package_id=pkg.id, image_url=url)
+        img = PackageImage(package_id=pkg.id, image_url=url, image_variants=(image_variants or {}).get(url))
         db.add(img)
     db.commit()
     db.refresh(pkg)
@@ -44,100 +48,6 @@ def get_package_bookings(db: Session):
         .options(joinedload(PackageBooking.rooms).joinedload(PackageBookingRoom.room))
     ).all()
 
-def get_or_create_guest_user(db: Session, email: str, mobile: str, name: str):
-    """
-    Find or create a guest user based on email and mobile number.
-    Returns the user_id to link bookings to the same user.
-    """
-    from app.models.user import User, Role
-    import bcrypt
-    
-    # Normalize empty strings to None for easier handling
-    email = email.strip() if email and isinstance(email, str) else None
-    mobile = mobile.strip() if mobile and isinstance(mobile, str) else None
-    name = name.strip() if name and isinstance(name, str) else "Guest User"
-    
-    # Need at least one identifier (email or mobile)
-    if not email and not mobile:
-        raise ValueError("Either email or mobile number must be provided")
-    
-    # First, try to find user by email (most reliable identifier)
-    user = None
-    if email:
-        user = db.query(User).filter(User.email == email).first()
-    
-    # If not found by email, try by mobile/phone
-    if not user and mobile:
-        user = db.query(User).filter(User.phone == mobile).first()
-    
-    # If user exists, return the user_id
-    if user:
-        # Update name if provided and different
-        if name and user.name != name:
-            user.name = name
-            db.commit()
-        return user.id
-    
-    # If user doesn't exist, create a new guest user
-    try:
-        # First, ensure 'guest' role exists
-        guest_role = db.query(Role).filter(Role.name == "guest").first()
-        if not guest_role:
-            # Create guest role if it doesn't exist
-            guest_role = Role(name="guest", permissions="[]")
-            db.add(guest_role)
-            db.commit()
-            db.refresh(guest_role)
-        
-        # Generate a placeholder password for guest users (they won't log in)
-        password_bytes = "guest_user_no_password".encode("utf-8")
-        salt = bcrypt.gensalt()
-        hashed_password = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
-        
-        # Create email if not provided (use mobile-based email or generate unique one)
-        if not email:
-            if mobile:
-                user_email = f"guest_{mobile}@temp.com"
-            else:
-                # Generate a unique email based on timestamp
-                import time
-                user_email = f"guest_{int(time.time())}@temp.com"
-        else:
-            user_email = email
-        
-        # Check if email already exists (race condition check)
-        existing_user = db.query(User).filter(User.email == user_email).first()
-        if existing_user:
-            # User was created between our check and creation attempt
-            return existing_user.id
-        
-        # Create new guest user
-        new_user = User(
-            name=name,
-            email=user_email,
-            phone=mobile if mobile else None,
-            hashed_password=hashed_password,
-            role_id=guest_role.id,
-            is_active=True
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return new_user.id
-    except Exception as e:
-        # If user creation fails due to unique constraint or other DB error, try to find existing user
-        db.rollback()  # Rollback the failed transaction
-        if email:
-            existing_user = db.query(User).filter(User.email == email).first()
-            if existing_user:
-                return existing_user.id
-        if mobile:
-            existing_user = db.query(User).filter(User.phone == mobile).first()
-            if existing_user:
-                return existing_user.id
-        # Re-raise if we can't find existing user
-        raise ValueError(f"Failed to create or find guest user: {str(e)}")
-
 def book_package(db: Session, booking: PackageBookingCreate):
     # Find or create guest user based on email and mobile
     guest_user_id = None
@@ -185,63 +95,9 @@ def book_package(db: Session, booking: PackageBookingCreate):
         # If a guest with the same email and mobile exists, use their established name
         guest_name_to_use = existing_booking.guest_name
 
-    # CRITICAL FIX: Check for conflicts BEFORE creating the booking
-    # This prevents invalid bookings from being created in the database
-    for room_id in booking.room_ids:
-        # Check for conflicts with package bookings
-        package_conflict = (
-            db.query(PackageBookingRoom)
-            .join(PackageBooking)
-            .filter(
-                PackageBookingRoom.room_id == room_id,
-                PackageBooking.status.in_(["booked", "checked-in", "checked_in"]),  # Only check for active bookings
-                or_(
-                    and_(
-                        PackageBooking.check_in <= booking.check_in,
-                        PackageBooking.check_out > booking.check_in
-                    ),
-                    and_(
-                        PackageBooking.check_in < booking.check_out,
-                        PackageBooking.check_out >= booking.check_out
-                    ),
-                    and_(
-                        PackageBooking.check_in >= booking.check_in,
-                        PackageBooking.check_out <= booking.check_out
-                    ),
-                )
-            )
-            .first()
-        )
-
-        # Check for conflicts with regular bookings (THIS WAS MISSING!)
-        from app.models.booking import Booking, BookingRoom
-        regular_conflict = (
-            db.query(BookingRoom)
-            .join(Booking)
-            .filter(
-                BookingRoom.room_id == room_id,
-                Booking.status.in_(["booked", "checked-in", "checked_in"]),  # Only check for active bookings
-                or_(
-                    and_(
-                        Booking.check_in <= booking.check_in,
-                        Booking.check_out > booking.check_in
-                    ),
-                    and_(
-                        Booking.check_in < booking.check_out,
-                        Booking.check_out >= booking.check_out
-                    ),
-                    and_(
-                        Booking.check_in >= booking.check_in,
-                        Booking.check_out <= booking.check_out
-                    ),
-                )
-            )
-            .first()
-        )
-
-        if package_conflict or regular_conflict:
-            room = db.query(Room).filter(Room.id == room_id).first()
-            raise HTTPException(status_code=400, detail=f"Room {room.number if room else room_id} is not available for the selected dates.")
+    # Check for conflicts BEFORE creating the booking, across regular and package
+    # bookings for all requested rooms in a single query
+    ensure_rooms_available(db, booking.room_ids, booking.check_in, booking.check_out)
 
     # All conflict checks passed - now create the booking
     db_booking = PackageBooking(
@@ -257,22 +113,18 @@ def book_package(db: Session, booking: PackageBookingCreate):
         user_id=guest_user_id,  # Link booking to guest user
     )
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-
-    # Assign multiple rooms (conflicts already checked, safe to proceed)
-    for room_id in booking.room_ids:
-        # Update the room's status to 'Booked'
-        room_to_update = db.query(Room).filter(Room.id == room_id).first()
-        if room_to_update:
-            room_to_update.status = "Booked"
-
-        db_room_link = PackageBookingRoom(package_booking_id=db_booking.id, room_id=room_id)
-        db.add(db_room_link)
-
-    db.commit()
-
-    # Reload with rooms + room details
+    db.flush()
+
+    # Assign multiple rooms and hold their nights (conflicts already checked, safe to proceed)
+    db.add_all([
+        PackageBookingRoom(package_booking_id=db_booking.id, room_id=room_id)
+        for room_id in booking.room_ids
+    ])
+    reserve_nights(db, booking.room_ids, booking.check_in, booking.check_out, package_booking_id=db_booking.id)
+    recompute_room_statuses(db, booking.room_ids)
+    db.flush()
+
+    # Reload with rooms + room details (the caller commits)
     booking_with_rooms = (
         db.query(PackageBooking)
         .options(joinedload(PackageBooking.rooms).joinedload(PackageBookingRoom.room))
@@ -291,11 +143,8 @@ def delete_package_booking(db: Session, booking_id: int):
         return False
 
     booking.status = "cancelled"
-
-    for link in booking.rooms:
-        room_to_update = db.query(Room).filter(Room.id == link.room_id).first()
-        if room_to_update:
-            room_to_update.status = "Available"
+    release_nights(db, package_booking_id=booking.id)
+    recompute_room_statuses(db, [link.room_id for link in booking.rooms])
 
     db.commit()
     db.refresh(booking)
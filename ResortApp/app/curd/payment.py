@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.models.payment import Payment, Voucher
 from app.schemas.payment import PaymentCreate, VoucherCreate
 from datetime import datetime
+from app.utils.pagination import paginate
 
 def create_payment(db: Session, payment: PaymentCreate):
     new_payment = Payment(**payment.dict())
@@ -10,8 +11,9 @@ def create_payment(db: Session, payment: PaymentCreate):
     db.refresh(new_payment)
     return new_payment
 
-def get_all_payments(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Payment).offset(skip).limit(limit).all()
+def get_all_payments(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, response=None):
+    return paginate(db.query(Payment), Payment.id, Payment.id, limit, cursor=cursor, skip=skip,
+                    descending=False, response=response)
 
 def create_voucher(db: Session, voucher: VoucherCreate):
     new_voucher = Voucher(**voucher.dict())
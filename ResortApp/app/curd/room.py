@@ -10,6 +10,7 @@ from app.models.foodorder import FoodOrder
 from app.models.service import AssignedService, Service
 from app.models.Package import PackageBooking, Package, PackageBookingRoom
 from app.models.checkout import Checkout
+from app.utils.room_nights import occupied_room_ids
 from app.schemas.checkout import BillSummary, BillBreakdown, CheckoutSuccess, CheckoutRequest
 router = APIRouter(prefix="/bill", tags=["checkout"])
 
@@ -18,41 +19,17 @@ def get_all_rooms(db: Session, skip: int = 0, limit: int = 100):
     today = date.today()
     results = []
 
+    # Rooms held by an active booking or package booking tonight, from the room_nights ledger
+    occupied_ids = occupied_room_ids(db, today)
+
     for room in rooms:
         # If room is under maintenance, always show "Maintenance"
         if room.status.lower() == "maintenance":
             status = "Maintenance"
+        elif room.id in occupied_ids:
+            status = "Occupied"
         else:
-            # Check active booking via association table
-            active_booking = (
-                db.query(Booking)
-                .join(BookingRoom, BookingRoom.booking_id == Booking.id)
-                .filter(
-                    BookingRoom.room_id == room.id,
-                    Booking.status.in_(["booked", "checked-in"]),
-                    Booking.check_in <= today,
-                    Booking.check_out > today,
-                )
-                .first()
-            )
-
-            # Check active package booking by joining PackageBookingRoom
-            active_package = (
-                db.query(PackageBooking)
-                .join(PackageBookingRoom, PackageBookingRoom.package_booking_id == PackageBooking.id)
-                .filter(
-                    PackageBookingRoom.room_id == room.id,
-                    PackageBooking.status.in_(["booked", "checked-in"]),
-                    PackageBooking.check_in <= today,
-                    PackageBooking.check_out > today,
-                )
-                .first()
-            )
-
-            if active_booking or active_package:
-                status = "Booked"
-            else:
-                status = "Available"
+            status = "Available"
 
         results.append(
             {
@@ -2,11 +2,13 @@ from sqlalchemy.orm import Session, joinedload
 from typing import List
 from datetime import date
 from app.models.service import Service, AssignedService, ServiceImage
-from app.models.booking import Booking, BookingRoom
-from app.models.Package import PackageBooking, PackageBookingRoom
+from app.models.booking import Booking
+from app.models.Package import PackageBooking
 from app.schemas.service import ServiceCreate, AssignedServiceCreate, AssignedServiceUpdate
+from app.models.room_night import RoomNight
 
-def create_service(db: Session, name: str, description: str, charges: float, image_urls: List[str] = None):
+def create_service(db: Session, name: str, description: str, charges: float, image_urls: List[str] = None,
+                   image_variants: dict = None):
     db_service = Service(name=name, description=description, charges=charges)
     db.add(db_service)
     db.commit()
@@ -14,7 +16,7 @@ def create_service(db: Session, name: str, description: str, charges: float, ima
     
     if image_urls:
         for url in image_urls:
-            img = ServiceImage(service_id=db_service.id, image_url=url)
+            img = ServiceImage(service_id=db_service.id, image_url=url, image_variants=(image_variants or {}).get(url))
             db.add(img)
         db.commit()
         db.refresh(db_service)
@@ -50,19 +52,17 @@ def get_assigned_services(db: Session, skip: int = 0, limit: int = 100):
     # Find all room IDs that have checked-in bookings (regular or package)
     checked_in_room_ids = set()
     
-    # Get rooms with checked-in regular bookings
-    regular_checked_in = db.query(BookingRoom.room_id).join(Booking).filter(
-        Booking.status.in_(['checked-in', 'checked_in']),
-        Booking.check_in <= today,
-        Booking.check_out > today
+    # Get rooms held tonight by checked-in regular bookings (room_nights ledger)
+    regular_checked_in = db.query(RoomNight.room_id).join(Booking, Booking.id == RoomNight.booking_id).filter(
+        RoomNight.night == today,
+        Booking.status.in_(['checked-in', 'checked_in'])
     ).all()
     checked_in_room_ids.update([r.room_id for r in regular_checked_in if r.room_id])
     
-    # Get rooms with checked-in package bookings
-    package_checked_in = db.query(PackageBookingRoom.room_id).join(PackageBooking).filter(
-        PackageBooking.status.in_(['checked-in', 'checked_in']),
-        PackageBooking.check_in <= today,
-        PackageBooking.check_out > today
+    # Get rooms held tonight by checked-in package bookings
+    package_checked_in = db.query(RoomNight.room_id).join(PackageBooking, PackageBooking.id == RoomNight.package_booking_id).filter(
+        RoomNight.night == today,
+        PackageBooking.status.in_(['checked-in', 'checked_in'])
     ).all()
     checked_in_room_ids.update([r.room_id for r in package_checked_in if r.room_id])
     
@@ -1,24 +1,15 @@
 from sqlalchemy.orm import Session
 from app.models.user import User, Role
 from app.schemas.user import UserCreate
-import bcrypt
-from app.utils import auth
+from app.utils import auth, hashing
 
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 
-def create_user(db: Session, user: UserCreate):
-    # Use bcrypt directly to avoid compatibility issues
-    password_bytes = user.password.encode("utf-8")
-    # bcrypt handles truncation automatically, but we'll limit to 72 bytes to be safe
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-
-    # Generate salt and hash password using bcrypt directly
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+def create_user(db: Session, user: UserCreate, hashed_password: str):
+    """hashed_password: auth.get_password_hash(user.password) from the calling route."""
     db_user = User(
         name=user.name,
         email=user.email,
@@ -47,3 +38,87 @@ def authenticate_user(db: Session, email: str, password: str):
         print(f"Password verification error for {email}: {str(e)}")
         return None
     return user
+
+
+def get_or_create_guest_user(db: Session, email: str, mobile: str, name: str):
+    """
+    Find or create a guest user based on email and mobile number.
+    Returns the user_id to link bookings to the same user.
+
+    Only flushes; the booking endpoint commits the user together with the booking.
+    The insert runs in a savepoint, so a duplicate created concurrently rolls back
+    just this step and the existing user is returned instead.
+    """
+    # Normalize empty strings to None for easier handling
+    email = email.strip() if email and isinstance(email, str) else None
+    mobile = mobile.strip() if mobile and isinstance(mobile, str) else None
+    name = name.strip() if name and isinstance(name, str) else "Guest User"
+
+    # Need at least one identifier (email or mobile)
+    if not email and not mobile:
+        raise ValueError("Either email or mobile number must be provided")
+
+    # First, try to find user by email (most reliable identifier)
+    user = None
+    if email:
+        user = db.query(User).filter(User.email == email).first()
+
+    # If not found by email, try by mobile/phone
+    if not user and mobile:
+        user = db.query(User).filter(User.phone == mobile).first()
+
+    # If user exists, return the user_id
+    if user:
+        # Update name if provided and different
+        if name and user.name != name:
+            user.name = name
+        return user.id
+
+    # Create email if not provided (use mobile-based email or generate unique one)
+    if not email:
+        if mobile:
+            user_email = f"guest_{mobile}@temp.com"
+        else:
+            # Generate a unique email based on timestamp
+            import time
+            user_email = f"guest_{int(time.time())}@temp.com"
+    else:
+        user_email = email
+
+    # Check if email already exists (race condition check)
+    existing_user = db.query(User).filter(User.email == user_email).first()
+    if existing_user:
+        return existing_user.id
+
+    try:
+        with db.begin_nested():
+            # Ensure the 'guest' role exists
+            guest_role = db.query(Role).filter(Role.name == "guest").first()
+            if not guest_role:
+                guest_role = Role(name="guest", permissions="[]")
+                db.add(guest_role)
+                db.flush()
+
+            new_user = User(
+                name=name,
+                email=user_email,
+                phone=mobile if mobile else None,
+                # Guest users never log in, so no bcrypt round is spent on a placeholder password
+                hashed_password=hashing.make_unusable_password("guest"),
+                role_id=guest_role.id,
+                is_active=True
+            )
+            db.add(new_user)
+        return new_user.id
+    except Exception as e:
+        # Unique constraint or other DB error: the savepoint is rolled back, look for the existing user
+        if email:
+            existing_user = db.query(User).filter(User.email == email).first()
+            if existing_user:
+                return existing_user.id
+        if mobile:
+            existing_user = db.query(User).filter(User.phone == mobile).first()
+            if existing_user:
+                return existing_user.id
+        # Re-raise if we can't find existing user
+        raise ValueError(f"Failed to create or find guest user: {str(e)}")
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
@@ -33,5 +33,68 @@ engine = create_engine(
         "isolation_level": "READ COMMITTED"  # Better concurrency with read committed
     } if not SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 )
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "savepoint")
+    def _sqlite_begin_before_savepoint(conn, name):
+        # pysqlite only opens a transaction before INSERT/UPDATE/DELETE. A SAVEPOINT
+        # issued first (db.begin_nested()) would start one of its own that its
+        # RELEASE commits, whatever the outer transaction does afterwards.
+        dbapi_connection = conn.connection.dbapi_connection
+        if not dbapi_connection.in_transaction:
+            dbapi_connection.execute("BEGIN")
+
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
+
+# Optional asyncio engine for the hot read endpoints (rooms, bookings, dashboard, food orders).
+# With USE_ASYNC_DB=true those endpoints run on the event loop and only hold a pooled
+# connection while a query is actually running, instead of one threadpool thread plus one
+# connection per request. Requires asyncpg for PostgreSQL (aiosqlite for local SQLite), both pinned
+# in the requirements files.
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+
+def _async_database_url(url: str) -> str:
+    """Map the sync DATABASE_URL onto the matching asyncio driver."""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+if USE_ASYNC_DB:
+    import importlib.util
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_driver = "aiosqlite" if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else "asyncpg"
+    if importlib.util.find_spec(_async_driver) is None:
+        raise RuntimeError(
+            f"USE_ASYNC_DB=true needs the {_async_driver} package for this DATABASE_URL "
+            f"(pinned in requirements.txt and requirements_production.txt); install it or set USE_ASYNC_DB=false"
+        )
+
+    if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(_async_database_url(SQLALCHEMY_DATABASE_URL), echo=False)
+    else:
+        async_engine = create_async_engine(
+            _async_database_url(SQLALCHEMY_DATABASE_URL),
+            connect_args={
+                "ssl": False,  # Same as sslmode=disable above
+                "timeout": 10,
+                "server_settings": {"statement_timeout": "30000"},
+            },
+            # Connections are only held while a query runs, so a much smaller pool per worker is enough
+            pool_size=int(os.getenv("ASYNC_DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10")),
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            pool_timeout=30,
+            echo=False,
+            isolation_level="READ COMMITTED",
+        )
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
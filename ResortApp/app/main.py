@@ -1,6 +1,10 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from app.database import Base, engine
 from fastapi.middleware.cors import CORSMiddleware
+from app.utils.pagination import PAGINATION_HEADERS
+from app.utils.request_stats import RequestStatsMiddleware
+from app.utils.metrics import MetricsMiddleware, metrics_response, require_metrics_access
+from app.utils.cache_bus import start_listener as start_cache_bus_listener
 from fastapi.staticfiles import StaticFiles
 import os
 
@@ -30,6 +34,32 @@ from app.api import (
 # Create DB tables
 Base.metadata.create_all(bind=engine)
 
+# Populate the room_nights occupancy ledger for databases created before it existed
+try:
+    from app.database import SessionLocal
+    from app.utils.room_nights import ensure_room_nights_backfilled
+
+    _ledger_db = SessionLocal()
+    try:
+        ensure_room_nights_backfilled(_ledger_db)
+    finally:
+        _ledger_db.close()
+except Exception as e:
+    print(f"Room night ledger backfill skipped: {e}")
+
+# Populate the daily_rollups table for databases created before it existed
+try:
+    from app.database import SessionLocal
+    from app.utils.rollups import ensure_daily_rollups_backfilled
+
+    _rollup_db = SessionLocal()
+    try:
+        ensure_daily_rollups_backfilled(_rollup_db)
+    finally:
+        _rollup_db.close()
+except Exception as e:
+    print(f"Daily rollup backfill skipped: {e}")
+
 app = FastAPI()
 
 # CORS
@@ -39,8 +69,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGINATION_HEADERS,  # X-Next-Cursor / X-Total-Count for cursor pagination
 )
 
+# Prometheus latency/pool/statement metrics, served at /metrics (see app/utils/metrics.py).
+# Added before RequestStatsMiddleware so it runs inside it and can read the statement count.
+app.add_middleware(MetricsMiddleware)
+
+# Per-request database connection accounting (see app/utils/request_stats.py)
+app.add_middleware(RequestStatsMiddleware)
+
+
+@app.on_event("startup")
+def start_cache_bus():
+    # Runs in every worker after gunicorn forks the preloaded app (see app/utils/cache_bus.py)
+    start_cache_bus_listener()
+
 # Static file dirs
 UPLOAD_DIR = "uploads/expenses"
 os.makedirs("static/rooms", exist_ok=True)
@@ -68,4 +112,9 @@ app.include_router(frontend.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 app.include_router(report.router, prefix="/api")
 # app.include_router(guest_api.guest_router) # <--- And add this line
-# app.include_router(billing_api.router) # <-- Now billing is active
\ No newline at end of file
+# app.include_router(billing_api.router) # <-- Now billing is active
+
+# Prometheus scrape endpoint (aggregated over all gunicorn workers), loopback or METRICS_TOKEN only
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+def metrics():
+    return metrics_response()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -20,6 +20,7 @@ class PackageImage(Base):
     id = Column(Integer, primary_key=True, index=True)
     package_id = Column(Integer, ForeignKey("packages.id"))
     image_url = Column(String, nullable=False)
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
 
     # Relationships
     package = relationship("Package", back_populates="images")
@@ -27,6 +28,10 @@ class PackageImage(Base):
 
 class PackageBooking(Base):
     __tablename__ = "package_bookings"
+    __table_args__ = (
+        Index("ix_package_bookings_status_dates", "status", "check_in", "check_out"),
+        Index("ix_package_bookings_guest_contact", "guest_email", "guest_mobile"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     package_id = Column(Integer, ForeignKey("packages.id"))
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -54,13 +59,18 @@ class PackageBooking(Base):
         back_populates="package_booking",
         cascade="all, delete-orphan"
     )
+    room_nights = relationship(
+        "RoomNight",
+        back_populates="package_booking",
+        cascade="all, delete-orphan"
+    )
 
 
 class PackageBookingRoom(Base):
     __tablename__ = "package_booking_rooms"
     id = Column(Integer, primary_key=True, index=True)
-    package_booking_id = Column(Integer, ForeignKey("package_bookings.id", ondelete="CASCADE"))
-    room_id = Column(Integer, ForeignKey("rooms.id"))
+    package_booking_id = Column(Integer, ForeignKey("package_bookings.id", ondelete="CASCADE"), index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), index=True)
 
     # Relationships
     package_booking = relationship("PackageBooking", back_populates="rooms")
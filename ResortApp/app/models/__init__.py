@@ -6,6 +6,10 @@ from .foodorder import FoodOrder, FoodOrderItem
 from .service import Service, AssignedService, ServiceImage
 from .expense import Expense
 from .checkout import Checkout
+from .room_night import RoomNight
+from .daily_rollup import DailyRollup
+from .email_outbox import EmailOutbox
+from .cache_event import CacheEvent
 from .employee import Employee, Attendance
 from .food_category import FoodCategory
 from .food_item import FoodItem
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Float, Integer, String, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from .room import Room
@@ -6,6 +6,10 @@ from .user import User
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_status_dates", "status", "check_in", "check_out"),
+        Index("ix_bookings_guest_contact", "guest_email", "guest_mobile"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     status = Column(String, default="booked")
@@ -28,13 +32,18 @@ class Booking(Base):
         back_populates="booking",
         cascade="all, delete-orphan"
     )
+    room_nights = relationship(
+        "RoomNight",
+        back_populates="booking",
+        cascade="all, delete-orphan"
+    )
 
 class BookingRoom(Base):
     __tablename__ = "booking_rooms"
 
     id = Column(Integer, primary_key=True, index=True)
-    booking_id = Column(Integer, ForeignKey("bookings.id"))
-    room_id = Column(Integer, ForeignKey("rooms.id"))
+    booking_id = Column(Integer, ForeignKey("bookings.id"), index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), index=True)
 
     booking = relationship("Booking", back_populates="booking_rooms")
     room = relationship("Room", back_populates="booking_rooms")
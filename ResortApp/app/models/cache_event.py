@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.database import Base
+
+
+class CacheEvent(Base):
+    """
+    Cache invalidation events for the polling transport of the cache bus
+    (app/utils/cache_bus.py), used where PostgreSQL LISTEN/NOTIFY is not available.
+
+    Rows are inserted in the transaction that made the change, read by every worker
+    and deleted after CACHE_EVENT_RETENTION seconds.
+    """
+    __tablename__ = "cache_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=True)  # None: the whole entity changed
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CacheEvent(id={self.id}, entity='{self.entity}', entity_id={self.entity_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Date, Enum, func
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Date, Enum, Index, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -19,7 +19,7 @@ class Checkout(Base):
     guest_name = Column(String, default="")
     room_number = Column(String, default="")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    checkout_date = Column(DateTime, default=datetime.utcnow)
+    checkout_date = Column(DateTime, default=datetime.utcnow, index=True)
     payment_method = Column(String, default="")
     
     booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=True, unique=True)
@@ -27,4 +27,7 @@ class Checkout(Base):
     payment_status = Column(String) 
 
     booking = relationship("Booking", back_populates="checkout", uselist=False)
-    package_booking = relationship("PackageBooking", back_populates="checkout", uselist=False)
\ No newline at end of file
+    package_booking = relationship("PackageBooking", back_populates="checkout", uselist=False)
+
+    # "Already checked out today?" filters on func.date(Checkout.checkout_date)
+    __table_args__ = (Index("ix_checkouts_checkout_day", func.date(checkout_date)),)
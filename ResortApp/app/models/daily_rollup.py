@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, Date
+from app.database import Base
+
+
+class DailyRollup(Base):
+    """
+    Pre-aggregated revenue and occupancy per calendar day.
+
+    Maintained incrementally by app/utils/rollups.py whenever checkouts, food orders,
+    expenses or room nights are written, so dashboards and reports read a handful of
+    rows instead of scanning the raw tables.
+    """
+    __tablename__ = "daily_rollups"
+
+    date = Column(Date, primary_key=True)
+
+    # Billed at checkout (from checkouts, by checkout date)
+    room_revenue = Column(Float, nullable=False, default=0.0)
+    package_revenue = Column(Float, nullable=False, default=0.0)
+    food_revenue = Column(Float, nullable=False, default=0.0)
+    service_revenue = Column(Float, nullable=False, default=0.0)
+    tax = Column(Float, nullable=False, default=0.0)
+    discount = Column(Float, nullable=False, default=0.0)
+    grand_total = Column(Float, nullable=False, default=0.0)
+    checkouts = Column(Integer, nullable=False, default=0)
+
+    # Food orders placed that day (billed or not)
+    food_orders = Column(Integer, nullable=False, default=0)
+    food_order_amount = Column(Float, nullable=False, default=0.0)
+
+    # Expenses dated that day
+    expenses = Column(Float, nullable=False, default=0.0)
+    expense_count = Column(Integer, nullable=False, default=0)
+
+    # Rooms held by an active booking that night (from room_nights)
+    occupied_rooms = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DailyRollup date={self.date} grand_total={self.grand_total}>"
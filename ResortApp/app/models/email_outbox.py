@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.database import Base
+
+
+class EmailOutbox(Base):
+    """
+    Outgoing emails waiting for the background sender (app/utils/email_outbox.py).
+
+    Request handlers only insert rows here; the sender claims due rows, delivers them
+    over one SMTP session per batch and reschedules failures with backoff.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    to_name = Column(String, nullable=True)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, sent, failed, skipped (SMTP not configured)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, to_email='{self.to_email}', status='{self.status}')>"
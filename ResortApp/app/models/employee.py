@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Time
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DateTime, Time, Index
 from sqlalchemy.orm import relationship, declarative_base
 from app.database import Base # Assuming you have a Base instance
 
@@ -25,6 +25,7 @@ class Employee(Base):
 
 class Leave(Base):
     __tablename__ = "leaves"
+    __table_args__ = (Index("ix_leaves_employee_status", "employee_id", "status"),)
 
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"))
@@ -38,6 +39,7 @@ class Leave(Base):
 
 class Attendance(Base):
     __tablename__ = "attendances"
+    __table_args__ = (Index("ix_attendances_employee_date", "employee_id", "date"),)
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
     date = Column(Date, nullable=False)
@@ -47,6 +49,7 @@ class Attendance(Base):
 
 class WorkingLog(Base):
     __tablename__ = "working_logs"
+    __table_args__ = (Index("ix_working_logs_employee_date", "employee_id", "date"),)
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False)
     date = Column(Date, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -21,6 +21,7 @@ class FoodItemImage(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     image_url = Column(String)
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     item_id = Column(Integer, ForeignKey("food_items.id"))
 
     food_item = relationship("FoodItem", back_populates="images")
\ No newline at end of file
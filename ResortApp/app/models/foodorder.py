@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class FoodOrder(Base):
     __tablename__ = "food_orders"
+    __table_args__ = (Index("ix_food_orders_room_billing", "room_id", "billing_status"),)
 
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"))
@@ -22,7 +23,7 @@ class FoodOrderItem(Base):
     __tablename__ = "food_order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("food_orders.id"))
+    order_id = Column(Integer, ForeignKey("food_orders.id"), index=True)
     food_item_id = Column(Integer, ForeignKey("food_items.id"))
     quantity = Column(Integer)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Text, Date, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -9,6 +9,7 @@ class HeaderBanner(Base):
     title = Column(String(255))
     subtitle = Column(Text)  # Changed from String(255) to Text to allow longer descriptions
     image_url = Column(String(255))
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     is_active = Column(Boolean, default=True)
 
 
@@ -30,6 +31,7 @@ class Gallery(Base):
     __tablename__ = "gallery"
     id = Column(Integer, primary_key=True, index=True)
     image_url = Column(String(255))
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     caption = Column(String(255))
     is_active = Column(Boolean, default=True)
 
@@ -64,6 +66,7 @@ class SignatureExperience(Base):
     title = Column(String(255))
     description = Column(Text)
     image_url = Column(String(255))
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     is_active = Column(Boolean, default=True)
 
 
@@ -74,6 +77,7 @@ class PlanWedding(Base):
     title = Column(String(255))
     description = Column(Text)
     image_url = Column(String(255))
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     is_active = Column(Boolean, default=True)
 
 
@@ -84,4 +88,5 @@ class NearbyAttraction(Base):
     title = Column(String(255))
     description = Column(Text)
     image_url = Column(String(255))
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     is_active = Column(Boolean, default=True)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Index, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -14,6 +14,9 @@ class Room(Base):
     adults = Column(Integer, default=2)      # max adults allowed
     children = Column(Integer, default=0)    # max children allowed
 
+    # Status filters compare case-insensitively (func.lower(Room.status) == "maintenance")
+    __table_args__ = (Index("ix_rooms_status_lower", func.lower(status)),)
+
     # Association (one-to-many with BookingRoom)
     booking_rooms = relationship(
         "BookingRoom",
@@ -27,6 +30,12 @@ class Room(Base):
         cascade="all, delete-orphan"
     )
 
+    room_nights = relationship(
+        "RoomNight",
+        back_populates="room",
+        cascade="all, delete-orphan"
+    )
+
     food_orders = relationship(
         "FoodOrder",
         back_populates="room"
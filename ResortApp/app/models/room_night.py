@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class RoomNight(Base):
+    """
+    Occupancy ledger: one row per room per occupied night.
+
+    A stay from check_in to check_out holds the nights check_in .. check_out - 1.
+    The unique (room_id, night) constraint means two active bookings can never
+    hold the same room on the same night, whichever code path creates them.
+    """
+    __tablename__ = "room_nights"
+    __table_args__ = (
+        UniqueConstraint("room_id", "night", name="uq_room_nights_room_night"),
+        CheckConstraint(
+            "(booking_id IS NULL) <> (package_booking_id IS NULL)",
+            name="ck_room_nights_single_owner",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False)
+    night = Column(Date, nullable=False, index=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=True, index=True)
+    package_booking_id = Column(Integer, ForeignKey("package_bookings.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    room = relationship("Room", back_populates="room_nights")
+    booking = relationship("Booking", back_populates="room_nights")
+    package_booking = relationship("PackageBooking", back_populates="room_nights")
+
+    def __repr__(self):
+        return f"<RoomNight room_id={self.room_id} night={self.night}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -23,6 +23,7 @@ class Service(Base):
 
 class AssignedService(Base):
     __tablename__ = "assigned_services"
+    __table_args__ = (Index("ix_assigned_services_room_billing", "room_id", "billing_status"),)
     id = Column(Integer, primary_key=True, index=True)
     service_id = Column(Integer, ForeignKey("services.id"))
     employee_id = Column(Integer, ForeignKey("employees.id"))
@@ -41,6 +42,7 @@ class ServiceImage(Base):
     id = Column(Integer, primary_key=True, index=True)
     service_id = Column(Integer, ForeignKey("services.id"))
     image_url = Column(String, nullable=False)
+    image_variants = Column(JSON(none_as_null=True), nullable=True)
     
     # Relationships
     service = relationship("Service", back_populates="images")
@@ -44,6 +44,13 @@ class BillSummary(BaseModel):
     check_out: date
     charges: BillBreakdown
 
+class BatchBillSummary(BillSummary):
+    """One entry of GET /bill/batch: a room (checkout_mode 'single') or a whole booking ('multiple')."""
+    room_number: str  # Room to pass to /bill/checkout/{room_number}
+    booking_id: int
+    booking_type: str  # 'regular' or 'package'
+    checkout_mode: str
+
 class CheckoutFull(BaseModel):
     id: int
     booking_id: Optional[int]
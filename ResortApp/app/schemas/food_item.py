@@ -1,7 +1,9 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
-class FoodItemImageOut(BaseModel):
+from app.schemas.images import ImageVariantsOut
+
+class FoodItemImageOut(ImageVariantsOut):
     id: int
     image_url: str
 
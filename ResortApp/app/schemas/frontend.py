@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from datetime import date
 
+from app.schemas.images import ImageVariant, ImageVariantsOut
+
 # Base schema with is_active
 class BaseSchema(BaseModel):
     is_active: bool = True
@@ -14,11 +16,18 @@ class HeaderBannerBase(BaseSchema):
     title: str
     subtitle: str
     image_url: str
+    image_variants: dict[str, ImageVariant] | None = None
 
 class HeaderBannerCreate(HeaderBannerBase):
     pass
 
-class HeaderBanner(HeaderBannerBase):
+class HeaderBannerUpdate(BaseSchema):
+    title: str | None = None
+    subtitle: str | None = None
+    image_url: str | None = None
+    image_variants: dict[str, ImageVariant] | None = None
+
+class HeaderBanner(HeaderBannerBase, ImageVariantsOut):
     id: int
 
 
@@ -41,12 +50,13 @@ class CheckAvailability(CheckAvailabilityBase):
 # Gallery
 class GalleryBase(BaseSchema):
     image_url: str
+    image_variants: dict[str, ImageVariant] | None = None
     caption: str
 
 class GalleryCreate(GalleryBase):
     pass
 
-class Gallery(GalleryBase):
+class Gallery(GalleryBase, ImageVariantsOut):
     id: int
 
 
@@ -84,6 +94,7 @@ class SignatureExperienceBase(BaseSchema):
     title: str
     description: str
     image_url: str
+    image_variants: dict[str, ImageVariant] | None = None
 
 class SignatureExperienceCreate(SignatureExperienceBase):
     pass
@@ -92,8 +103,9 @@ class SignatureExperienceUpdate(BaseSchema):
     title: str | None = None
     description: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, ImageVariant] | None = None
 
-class SignatureExperience(SignatureExperienceBase):
+class SignatureExperience(SignatureExperienceBase, ImageVariantsOut):
     id: int
 
 
@@ -102,6 +114,7 @@ class PlanWeddingBase(BaseSchema):
     title: str
     description: str
     image_url: str
+    image_variants: dict[str, ImageVariant] | None = None
 
 class PlanWeddingCreate(PlanWeddingBase):
     pass
@@ -110,8 +123,9 @@ class PlanWeddingUpdate(BaseSchema):
     title: str | None = None
     description: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, ImageVariant] | None = None
 
-class PlanWedding(PlanWeddingBase):
+class PlanWedding(PlanWeddingBase, ImageVariantsOut):
     id: int
 
 
@@ -120,6 +134,7 @@ class NearbyAttractionBase(BaseSchema):
     title: str
     description: str
     image_url: str
+    image_variants: dict[str, ImageVariant] | None = None
 
 class NearbyAttractionCreate(NearbyAttractionBase):
     pass
@@ -128,6 +143,7 @@ class NearbyAttractionUpdate(BaseSchema):
     title: str | None = None
     description: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, ImageVariant] | None = None
 
-class NearbyAttraction(NearbyAttractionBase):
+class NearbyAttraction(NearbyAttractionBase, ImageVariantsOut):
     id: int
\ No newline at end of file
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, computed_field
+from typing import Dict, Optional
+
+from app.utils.images import srcset
+
+
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+
+
+# Output schemas of rows with an image_variants column (see app/utils/images.py)
+class ImageVariantsOut(BaseModel):
+    image_variants: Optional[Dict[str, ImageVariant]] = None
+
+    @computed_field
+    @property
+    def srcset(self) -> Optional[str]:
+        if not self.image_variants:
+            return None
+        return srcset({name: variant.model_dump() for name, variant in self.image_variants.items()})
@@ -2,8 +2,10 @@ from pydantic import BaseModel, Field, model_validator
 from datetime import date
 from typing import List, Optional
 
+from app.schemas.images import ImageVariantsOut
 
-class PackageImageOut(BaseModel):
+
+class PackageImageOut(ImageVariantsOut):
     id: int
     image_url: str
 
@@ -3,6 +3,8 @@ from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from app.schemas.images import ImageVariantsOut
+
 class ServiceBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -12,7 +14,7 @@ class ServiceCreate(ServiceBase):
     pass
 
 
-class ServiceImageOut(BaseModel):
+class ServiceImageOut(ImageVariantsOut):
     id: int
     image_url: str
 
@@ -1,10 +1,16 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import List, Optional
 from jose import JWTError, jwt
-import bcrypt
-from app.models.user import User
-from sqlalchemy.orm import Session
+import time
+from app.models.user import User, Role
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
 from fastapi import Depends, HTTPException, status
-from app.database import SessionLocal
+from app.database import SessionLocal, AsyncSessionLocal, USE_ASYNC_DB
+from app.utils.cache import LRUCache, get_version, mark_changed
+from app.utils.cache_bus import register_cache
+from app.utils import hashing
 from fastapi.security import OAuth2PasswordBearer
 import os
 
@@ -18,26 +24,13 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
 def get_password_hash(password):
-    # Use bcrypt directly to avoid compatibility issues
-    password_bytes = password.encode("utf-8")
-    # bcrypt handles truncation automatically, but we'll limit to 72 bytes to be safe
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-
-    # Generate salt and hash password using bcrypt directly
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+    # bcrypt runs on the bounded hashing executor (app/utils/hashing.py)
+    return hashing.hash_password(password)
 
 
 def verify_password(plain, hashed):
-    # Use bcrypt directly to avoid compatibility issues
-    password_bytes = plain.encode("utf-8")
-    # bcrypt handles truncation automatically, but we'll limit to 72 bytes to be safe
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-
-    # Verify password using bcrypt directly
-    return bcrypt.checkpw(password_bytes, hashed.encode("utf-8"))
+    # False for unusable placeholders (guest accounts) instead of a bcrypt error
+    return hashing.check_password(plain, hashed)
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -52,6 +45,11 @@ def decode_token(token: str):
 
 
 def get_db():
+    """
+    The one Session of a request. Every router and get_current_user depend on this
+    same function, so FastAPI resolves it once per request and they share a session.
+    The session only checks a connection out of the pool on its first query.
+    """
     db = SessionLocal()
     try:
         yield db
@@ -59,9 +57,96 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """AsyncSession dependency for endpoints registered with db_mode_route(..., use_async=True)."""
+    if AsyncSessionLocal is None:
+        raise HTTPException(status_code=500, detail="Async database access is disabled (set USE_ASYNC_DB=true)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def db_mode_route(route_decorator, use_async: bool):
+    """
+    Register an endpoint only in the matching USE_ASYNC_DB mode, so a sync endpoint and
+    its async twin can share a path:
+
+        @db_mode_route(router.get("/"), use_async=False)
+        def get_things(db: Session = Depends(get_db)): ...
+
+        @db_mode_route(router.get("/"), use_async=True)
+        async def get_things_async(db: AsyncSession = Depends(get_async_db)): ...
+    """
+    def register(endpoint):
+        if use_async == USE_ASYNC_DB:
+            return route_decorator(endpoint)
+        return endpoint
+    return register
+
+
+# Principal cache: the fields of the authenticated user that endpoints read, per user id,
+# so most authenticated requests skip the users/roles query. Entries expire after
+# PRINCIPAL_CACHE_TTL seconds and are dropped in every worker on this host when a user or
+# role is written (namespace version, see app/utils/cache.py); the cache bus also evicts
+# the written user, or everything on a role change, in workers on other hosts.
+PRINCIPAL_CACHE_NAMESPACE = "principals"
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+_principal_cache = register_cache(
+    "principals",
+    LRUCache(maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))),
+    by_id=("users",),
+    clear_on=("roles",),
+)
+
+
+@dataclass(frozen=True)
+class CachedRole:
+    id: int
+    name: str
+    permissions: List[str]
+
+    @property
+    def permissions_list(self):
+        return self.permissions
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached, read-only view of the authenticated User (what get_current_user returns)."""
+    id: int
+    name: Optional[str]
+    email: Optional[str]
+    phone: Optional[str]
+    is_active: bool
+    role_id: Optional[int]
+    role: Optional[CachedRole]
+
+
+def _principal_from_user(user: User) -> Principal:
+    role = None
+    if user.role is not None:
+        role = CachedRole(id=user.role.id, name=user.role.name, permissions=user.role.permissions_list)
+    return Principal(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        phone=user.phone,
+        is_active=bool(user.is_active),
+        role_id=user.role_id,
+        role=role,
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _invalidate_principals_on_write(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (User, Role)):
+            mark_changed(session, PRINCIPAL_CACHE_NAMESPACE)
+            return
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -73,7 +158,15 @@ def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.id == user_id).first()
+
+    version = get_version(PRINCIPAL_CACHE_NAMESPACE)
+    cached = _principal_cache.get(user_id)
+    if cached is not None and cached[0] == version and cached[1] > time.monotonic():
+        return cached[2]
+
+    user = db.query(User).options(joinedload(User.role)).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = _principal_from_user(user)
+    _principal_cache.set(user_id, (version, time.monotonic() + PRINCIPAL_CACHE_TTL, principal))
+    return principal
@@ -0,0 +1,189 @@
+"""
+Room availability engine.
+
+Resolves date conflicts for a whole set of rooms in a single indexed lookup against
+the room_nights ledger (see app/utils/room_nights.py), which holds one row per room
+per night for every active booking and package booking, and builds the room x date
+availability grid served by GET /api/rooms/availability.
+"""
+import json
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.models.room_night import RoomNight
+from app.utils.booking_id import format_display_id
+from app.utils.cache import LRUCache, get_version, mark_changed
+from app.utils.cache_bus import register_cache
+from app.utils.room_nights import ACTIVE_BOOKING_STATUSES, AVAILABILITY_CACHE_NAMESPACE  # noqa: F401  (re-exported)
+
+# Longest window the grid endpoint accepts, in days
+MAX_GRID_DAYS = 366
+
+# Cell codes used in the grid
+GRID_LEGEND = {"F": "free", "B": "booked", "P": "package", "M": "maintenance"}
+
+_grid_cache = register_cache("availability_grid", LRUCache(maxsize=64), clear_on=("rooms", "room_nights"))
+
+
+def find_conflicting_rooms(
+    db: Session,
+    room_ids: Iterable[int],
+    check_in: date,
+    check_out: date,
+    exclude_booking_id: Optional[int] = None,
+    exclude_package_booking_id: Optional[int] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Return (room_id, room_number) for every requested room that already has a ledger
+    night in [check_in, check_out). Executes one query regardless of how many rooms
+    are requested.
+    """
+    room_ids = sorted({int(r) for r in room_ids})
+    if not room_ids:
+        return []
+
+    taken = select(RoomNight.room_id).where(
+        RoomNight.room_id.in_(room_ids),
+        RoomNight.night >= check_in,
+        RoomNight.night < check_out,
+    )
+    if exclude_booking_id is not None:
+        taken = taken.where((RoomNight.booking_id.is_(None)) | (RoomNight.booking_id != exclude_booking_id))
+    if exclude_package_booking_id is not None:
+        taken = taken.where(
+            (RoomNight.package_booking_id.is_(None)) | (RoomNight.package_booking_id != exclude_package_booking_id)
+        )
+
+    rows = db.execute(
+        select(Room.id, Room.number).where(Room.id.in_(taken)).order_by(Room.number)
+    ).all()
+    return [(row.id, row.number) for row in rows]
+
+
+def find_conflicting_night(
+    db: Session,
+    room_ids: Iterable[int],
+    check_in: date,
+    check_out: date,
+) -> Optional[RoomNight]:
+    """Return the earliest ledger night held on any of the rooms in [check_in, check_out), or None."""
+    room_ids = sorted({int(r) for r in room_ids})
+    if not room_ids:
+        return None
+    return db.execute(
+        select(RoomNight)
+        .where(RoomNight.room_id.in_(room_ids), RoomNight.night >= check_in, RoomNight.night < check_out)
+        .order_by(RoomNight.night)
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def ensure_rooms_available(
+    db: Session,
+    room_ids: Iterable[int],
+    check_in: date,
+    check_out: date,
+    exclude_booking_id: Optional[int] = None,
+    exclude_package_booking_id: Optional[int] = None,
+) -> None:
+    """
+    Raise a 400 naming the first unavailable room if any requested room conflicts
+    with an existing active booking for the selected dates.
+    """
+    conflicts = find_conflicting_rooms(
+        db, room_ids, check_in, check_out, exclude_booking_id, exclude_package_booking_id
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Room {conflicts[0][1]} is not available for the selected dates."
+        )
+
+
+def build_availability_grid(db: Session, start: date, end: date) -> List[bytes]:
+    """
+    Build the room x date grid for the nights start..end (inclusive) as a list of JSON
+    byte chunks, so the response can be streamed room by room. Columnar layout:
+
+        {"from": .., "to": .., "dates": [..], "legend": {..},
+         "rooms": {"id": [..], "number": [..], "type": [..]},
+         "states": ["FFBB..", ..],            one string per room, one code per date
+         "bookings": [[null, "BK-000012", ..], ..]}   display ID per room per date
+
+    Always two queries (rooms, ledger nights in the window) whatever the window length.
+    """
+    days = (end - start).days + 1
+    dates = [start + timedelta(days=i) for i in range(days)]
+
+    rooms = db.execute(select(Room.id, Room.number, Room.type, Room.status).order_by(Room.number)).all()
+    nights = db.execute(
+        select(RoomNight.room_id, RoomNight.night, RoomNight.booking_id, RoomNight.package_booking_id)
+        .where(RoomNight.night >= start, RoomNight.night <= end)
+    ).all()
+
+    held = {}
+    for room_id, night, booking_id, package_booking_id in nights:
+        if booking_id is not None:
+            held[(room_id, night)] = ("B", format_display_id(booking_id))
+        else:
+            held[(room_id, night)] = ("P", format_display_id(package_booking_id, is_package=True))
+
+    header = {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "dates": [d.isoformat() for d in dates],
+        "legend": GRID_LEGEND,
+        "rooms": {
+            "id": [r.id for r in rooms],
+            "number": [r.number for r in rooms],
+            "type": [r.type for r in rooms],
+        },
+    }
+    chunks = [json.dumps(header, separators=(",", ":"))[:-1].encode() + b',"states":[']
+
+    bookings = []
+    for index, room in enumerate(rooms):
+        free_code = "M" if (room.status or "").lower() == "maintenance" else "F"
+        codes = []
+        ids = []
+        for d in dates:
+            code, display_id = held.get((room.id, d), (free_code, None))
+            codes.append(code)
+            ids.append(display_id)
+        bookings.append(ids)
+        chunks.append((b"," if index else b"") + json.dumps("".join(codes)).encode())
+
+    chunks.append(b'],"bookings":[')
+    for index, ids in enumerate(bookings):
+        chunks.append((b"," if index else b"") + json.dumps(ids, separators=(",", ":")).encode())
+    chunks.append(b"]}")
+    return chunks
+
+
+def get_availability_grid(db: Session, start: date, end: date) -> List[bytes]:
+    """Cached build_availability_grid; entries are dropped when the ledger or any room changes."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must be on or after 'from'")
+    if (end - start).days + 1 > MAX_GRID_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date window cannot exceed {MAX_GRID_DAYS} days")
+
+    key = (start, end, get_version(AVAILABILITY_CACHE_NAMESPACE))
+    chunks = _grid_cache.get(key)
+    if chunks is None:
+        chunks = build_availability_grid(db, start, end)
+        _grid_cache.set(key, chunks)
+    return chunks
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_room_changes(session, flush_context):
+    """Room create/update/delete (number, type, maintenance status) also changes the grid."""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Room):
+            mark_changed(session, AVAILABILITY_CACHE_NAMESPACE)
+            return
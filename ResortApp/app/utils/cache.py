@@ -0,0 +1,143 @@
+"""
+Small caching helpers shared by the API routers.
+
+- LRUCache: a thread-safe in-process LRU used for per-worker caches. Register it
+  with the cache bus (app/utils/cache_bus.py) to have writes in any worker, on any
+  host, evict its entries.
+- Namespace versions: a counter per cache namespace kept in a file under
+  CACHE_DIR (default /dev/shm/resort-cache, the same tmpfs gunicorn uses for
+  worker heartbeats), so a write in one gunicorn worker invalidates cached
+  entries in every worker on the host. Callers put the version in their cache key.
+- mark_changed(db, namespace): flag a namespace on a session; the version is
+  bumped only once that session commits, and the flag is dropped on rollback.
+
+Response-sized values shared by all workers live in app/utils/response_cache.py.
+
+Which invalidation a new cache should use:
+- An endpoint response: @cached_endpoint(..., invalidate_on=entities) from
+  response_cache.py. Writes to those cache bus entities clear the namespace in every
+  worker on every host (and bump Cache's generation, so an in-flight recompute
+  does not store a stale value).
+- Objects kept per worker: an LRUCache passed to cache_bus.register_cache() with
+  by_id= / clear_on=. Tracked models publish on flush; bulk writes call publish().
+- Namespace versions (mark_changed / get_version) only reach workers on the same
+  host, since the version file is in CACHE_DIR. The principal and availability
+  grid caches check one on top of their bus registration, which makes a change
+  visible on this host without waiting for the bus. Do not rely on them alone.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+def _default_cache_dir() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, "resort-cache")
+
+
+CACHE_DIR = os.getenv("CACHE_DIR") or _default_cache_dir()
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with a fixed number of entries."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _version_path(namespace: str) -> str:
+    return os.path.join(CACHE_DIR, f"{namespace}.version")
+
+
+def get_version(namespace: str) -> int:
+    """Current version of a cache namespace (0 if it was never bumped)."""
+    try:
+        with open(_version_path(namespace), "r") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+_bump_lock = threading.Lock()
+
+
+def bump_version(namespace: str) -> int:
+    """Invalidate every cached entry of a namespace, in all workers on this host."""
+    with _bump_lock:
+        try:
+            version = get_version(namespace) + 1
+            # Write-then-rename so readers never see a half-written file
+            _write_atomic(_version_path(namespace), str(version), f".{namespace}.")
+            return version
+        except OSError as e:
+            print(f"Cache version bump failed for {namespace}: {e}")
+            return 0
+
+
+def _write_atomic(path: str, data: str, prefix: str) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=prefix)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def mark_changed(db: Session, namespace: str) -> None:
+    """Bump the namespace version when this session's transaction commits."""
+    db.info.setdefault("changed_cache_namespaces", set()).add(namespace)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_namespaces(session):
+    # after_commit also fires when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    namespaces = session.info.pop("changed_cache_namespaces", None)
+    for namespace in namespaces or ():
+        bump_version(namespace)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_changed_namespaces(session, previous_transaction):
+    # Only a rollback of the whole transaction drops them. A savepoint rolling back
+    # leaves the outer writes to commit; bumping for its undone writes as well is harmless.
+    if previous_transaction.parent is None:
+        session.info.pop("changed_cache_namespaces", None)
@@ -0,0 +1,252 @@
+"""
+Storage backends for app/utils/response_cache.py.
+
+A backend stores byte strings for one cache namespace with a time to live, and
+holds short-lived locks used for single-flight recomputes across processes:
+
+- MemoryBackend: an LRUCache in this worker. Fastest, but every worker keeps (and
+  computes) its own copy.
+- SharedMemoryBackend: one file per entry under CACHE_DIR (/dev/shm by default, the
+  tmpfs gunicorn uses as worker_tmp_dir), shared by all workers on the host.
+- RedisBackend: any server speaking the Redis protocol, shared by all hosts. Needs
+  the redis package (pinned in requirements_production.txt). Size is bounded by the
+  server's maxmemory with an allkeys-lru policy rather than by maxsize.
+
+CACHE_BACKEND picks the default (memory, shm or redis; shm when unset) and
+CACHE_REDIS_URL the Redis server (redis://localhost:6379/0).
+"""
+import hashlib
+import os
+from abc import ABC, abstractmethod
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+from app.utils.cache import CACHE_DIR, LRUCache
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "shm").lower()
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+_EXPIRY = struct.Struct("!d")
+
+
+def _digest(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Interface: bytes values with a TTL in seconds, for a single namespace."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def acquire(self, key: str, ttl: float) -> bool:
+        """Take the recompute lock for key; False while another process holds it."""
+        return True
+
+    def release(self, key: str) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, namespace: str, maxsize: int = 256):
+        self._entries = LRUCache(maxsize=maxsize)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.time():
+            self._entries.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl):
+        self._entries.set(key, (time.time() + ttl, value))
+
+    def delete(self, key):
+        self._entries.delete(key)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    Entries are files holding an 8-byte expiry time followed by the value. A hit
+    touches its file, so the file times give the least recently used entries, which
+    go first when the namespace is over maxsize. The size bound is checked every
+    PRUNE_EVERY sets, so a namespace can briefly hold up to maxsize + PRUNE_EVERY
+    entries.
+    """
+
+    # Sets between scans of the directory for the size bound
+    PRUNE_EVERY = 16
+
+    def __init__(self, namespace: str, maxsize: int = 256, directory: Optional[str] = None):
+        self.maxsize = maxsize
+        self.directory = os.path.join(directory or CACHE_DIR, f"ns-{namespace}")
+        self._sets = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, _digest(key) + ".entry")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < _EXPIRY.size or _EXPIRY.unpack_from(data)[0] < time.time():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Replaced or pruned meanwhile
+            pass
+        return data[_EXPIRY.size:]
+
+    def set(self, key, value, ttl):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_EXPIRY.pack(time.time() + ttl))
+                f.write(value)
+            # Write-then-rename so readers never see a half-written entry
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._sets += 1
+            prune = self._sets % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the least recently used entries beyond maxsize."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith(".entry")]
+        except OSError:
+            return
+        if len(entries) <= self.maxsize:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.maxsize]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        # Rename first so no reader or writer sees a half-deleted directory
+        trash = f"{self.directory}.{uuid.uuid4().hex}.trash"
+        try:
+            os.rename(self.directory, trash)
+        except OSError:
+            return
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def acquire(self, key, ttl):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, _digest(key) + ".lock")
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    # Left behind by a worker that died while computing
+                    if os.stat(path).st_mtime < time.time() - ttl:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                return False
+            except OSError:
+                return True
+        return False
+
+    def release(self, key):
+        try:
+            os.remove(os.path.join(self.directory, _digest(key) + ".lock"))
+        except OSError:
+            pass
+
+
+class RedisBackend(CacheBackend):
+    def __init__(self, namespace: str, maxsize: int = 256, url: Optional[str] = None, client=None):
+        if client is None:
+            import redis  # Optional dependency, only needed with CACHE_BACKEND=redis
+
+            client = redis.Redis.from_url(url or CACHE_REDIS_URL, socket_timeout=1, socket_connect_timeout=1)
+        self.client = client
+        self.prefix = f"resort:cache:{namespace}:"
+
+    def _key(self, key: str) -> str:
+        return self.prefix + _digest(key)
+
+    def get(self, key):
+        return self.client.get(self._key(key))
+
+    def set(self, key, value, ttl):
+        self.client.set(self._key(key), value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def clear(self):
+        batch = []
+        for name in self.client.scan_iter(match=self.prefix + "*", count=500):
+            batch.append(name)
+            if len(batch) >= 500:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+    def acquire(self, key, ttl):
+        return bool(self.client.set(self._key(key) + ":lock", b"1", nx=True, px=max(int(ttl * 1000), 1)))
+
+    def release(self, key):
+        self.client.delete(self._key(key) + ":lock")
+
+
+BACKENDS = {"memory": MemoryBackend, "shm": SharedMemoryBackend, "redis": RedisBackend}
+
+
+def make_backend(namespace: str, kind: Optional[str] = None, maxsize: int = 256) -> CacheBackend:
+    kind = (kind or CACHE_BACKEND).lower()
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown cache backend {kind!r}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[kind](namespace, maxsize=maxsize)
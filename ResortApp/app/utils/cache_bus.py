@@ -0,0 +1,301 @@
+"""
+Cross-worker cache invalidation bus.
+
+Every gunicorn worker has its own in-process caches, so a write handled by one worker
+leaves stale entries in the others, and on other hosts. The bus carries (entity, id)
+events from the transaction that made a change to every worker:
+
+- register_cache(name, cache, by_id=..., clear_on=...) adds an LRUCache (or anything
+  with delete() and clear()) to the registry. An event for an entity in by_id evicts
+  the key equal to the event's id; one for an entity in clear_on, or without an id,
+  clears the cache.
+- Writes to the models in TRACKED_MODELS are published when the session flushes, so
+  the routers under app/api/ need no extra code. A model can be tracked under more
+  than one entity; one tracked with columns= publishes updates only when one of
+  those columns changed (room_catalog: type and price, not status). Bulk query.update() / delete() skip
+  the ORM and call publish(db, entity, id) themselves.
+- Events are sent inside the writing transaction and only take effect if it commits:
+    CACHE_BUS=notify (default on PostgreSQL): pg_notify on the resort_cache channel;
+      each worker runs a thread LISTENing on a connection of its own.
+    CACHE_BUS=poll (default otherwise, e.g. SQLite in development): a row in
+      cache_events; each worker reads new rows every CACHE_BUS_POLL_INTERVAL seconds.
+      This relies on ids becoming visible in order, which holds on SQLite (one writer
+      at a time) but not for concurrent PostgreSQL transactions, so use notify there.
+    CACHE_BUS=off: only the writing worker evicts.
+  The writing worker also evicts as soon as it commits, so it never serves its own
+  stale entries while the event is on its way.
+- start_listener() is called by each worker at startup, after gunicorn forks. A
+  listener that lost its connection clears every registered cache once it is back,
+  since it may have missed events.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import chain
+from select import select as wait_readable
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.database import engine, connect_args
+from app.models.cache_event import CacheEvent
+from app.models.frontend import (
+    HeaderBanner, CheckAvailability, Gallery, Review, ResortInfo, SignatureExperience, PlanWedding, NearbyAttraction,
+)
+from app.models.food_category import FoodCategory
+from app.models.food_item import FoodItem, FoodItemImage
+from app.models.Package import Package, PackageImage
+from app.models.room import Room
+from app.models.service import Service, ServiceImage
+from app.models.user import User, Role
+
+Event = Tuple[str, Optional[int]]
+
+
+def _default_transport() -> str:
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2":
+        return "notify"
+    return "poll"
+
+
+CACHE_BUS = os.getenv("CACHE_BUS", "").lower() or _default_transport()
+CHANNEL = "resort_cache"
+POLL_INTERVAL = float(os.getenv("CACHE_BUS_POLL_INTERVAL", "1"))
+CACHE_EVENT_RETENTION = float(os.getenv("CACHE_EVENT_RETENTION", "600"))
+# Events per pg_notify call; payloads are limited to 8000 bytes
+NOTIFY_BATCH = 150
+# Seconds between keep-alive queries on an idle LISTEN connection
+LISTEN_KEEPALIVE = 30
+
+
+class _Registration:
+    __slots__ = ("cache", "by_id", "clear_on")
+
+    def __init__(self, cache, by_id: Iterable[str], clear_on: Iterable[str]):
+        self.cache = cache
+        self.by_id = frozenset(by_id)
+        self.clear_on = frozenset(clear_on)
+
+
+_registry: Dict[str, _Registration] = {}
+
+# Model class -> [(entity, attribute holding the id the event carries, columns or None)]
+TRACKED_MODELS: Dict[type, List[Tuple[str, str, Optional[FrozenSet[str]]]]] = {}
+
+
+def register_cache(name: str, cache, by_id: Iterable[str] = (), clear_on: Iterable[str] = ()):
+    """Add cache to the registry under name and return it."""
+    _registry[name] = _Registration(cache, by_id, clear_on)
+    return cache
+
+
+def track_model(model: type, entity: str, id_attr: str = "id", columns: Iterable[str] = None) -> None:
+    """
+    Publish (entity, row.<id_attr>) whenever a row of model is inserted, updated or
+    deleted; with columns, updates only count when one of those columns changed.
+    """
+    TRACKED_MODELS.setdefault(model, []).append((entity, id_attr, frozenset(columns) if columns else None))
+
+
+def dispatch(events: Iterable[Event]) -> None:
+    """Apply events to the registered caches of this process."""
+    events = list(events)
+    for registration in list(_registry.values()):
+        for entity, entity_id in events:
+            if entity in registration.clear_on or (entity in registration.by_id and entity_id is None):
+                registration.cache.clear()
+                break
+            if entity in registration.by_id:
+                registration.cache.delete(entity_id)
+
+
+def clear_all() -> None:
+    for registration in list(_registry.values()):
+        registration.cache.clear()
+
+
+def publish(db: Session, entity: str, entity_id: Optional[int] = None) -> None:
+    """Evict (entity, entity_id) in every worker once db's transaction commits; no id means every row."""
+    db.info.setdefault("cache_bus_pending", set()).add((entity, entity_id))
+
+
+def _send_pending(session: Session) -> None:
+    pending = session.info.pop("cache_bus_pending", None)
+    if not pending:
+        return
+    session.info.setdefault("cache_bus_sent", set()).update(pending)
+    if CACHE_BUS == "off":
+        return
+    events = sorted(pending, key=lambda e: (e[0], e[1] is not None, e[1] or 0))
+    conn = session.connection()
+    if CACHE_BUS == "notify":
+        for start in range(0, len(events), NOTIFY_BATCH):
+            payload = json.dumps(events[start:start + NOTIFY_BATCH], separators=(",", ":"))
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+    else:
+        conn.execute(insert(CacheEvent.__table__), [{"entity": e, "entity_id": i} for e, i in events])
+
+
+@event.listens_for(Session, "after_flush")
+def _publish_tracked_writes(session, flush_context):
+    dirty = session.dirty
+    for obj in chain(session.new, dirty, session.deleted):
+        state = inspect(obj)
+        for entity, id_attr, columns in TRACKED_MODELS.get(type(obj), ()):
+            # History is still there in after_flush; it is reset once the flush completes
+            if columns and obj in dirty and not any(state.attrs[c].history.has_changes() for c in columns):
+                continue
+            # Loaded state only: deleted rows cannot be refreshed
+            publish(session, entity, state.dict.get(id_attr))
+    _send_pending(session)
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_before_commit(session):
+    # publish() calls made after the last flush
+    _send_pending(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session):
+    # after_commit also fires when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    session.info.pop("cache_bus_savepoints", None)
+    sent = session.info.pop("cache_bus_sent", None)
+    if sent:
+        dispatch(sent)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _remember_sent(session, transaction):
+    if transaction.nested:
+        session.info.setdefault("cache_bus_savepoints", {})[transaction] = set(session.info.get("cache_bus_sent", ()))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_uncommitted(session, previous_transaction):
+    if previous_transaction.nested:
+        # Whatever was sent inside the savepoint was rolled back with it, including
+        # events of the outer transaction flushed there; send those again
+        sent_before = session.info.get("cache_bus_savepoints", {}).pop(previous_transaction, set())
+        undone = session.info.get("cache_bus_sent", set()) - sent_before
+        if undone:
+            session.info["cache_bus_sent"] = sent_before
+            session.info.setdefault("cache_bus_pending", set()).update(undone)
+    elif previous_transaction.parent is None:
+        session.info.pop("cache_bus_pending", None)
+        session.info.pop("cache_bus_sent", None)
+        session.info.pop("cache_bus_savepoints", None)
+
+
+def _listen_notify(resync) -> None:
+    # Straight from the driver rather than the pool: the connection is held for as
+    # long as the thread runs and must not count against the request pool
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    conn = engine.dialect.connect(*cargs, **{**cparams, **connect_args})
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        resync()
+        while True:
+            if wait_readable([conn], [], [], LISTEN_KEEPALIVE)[0]:
+                conn.poll()
+                while conn.notifies:
+                    dispatch(tuple(e) for e in json.loads(conn.notifies.pop(0).payload))
+            else:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+    finally:
+        conn.close()
+
+
+def _poll_events(resync) -> None:
+    with engine.connect() as conn:
+        last_id = conn.execute(select(func.max(CacheEvent.id))).scalar() or 0
+    resync()
+    last_prune = time.monotonic()
+    while True:
+        time.sleep(POLL_INTERVAL)
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(CacheEvent.id, CacheEvent.entity, CacheEvent.entity_id)
+                .where(CacheEvent.id > last_id)
+                .order_by(CacheEvent.id)
+            ).all()
+        if rows:
+            last_id = rows[-1].id
+            dispatch((row.entity, row.entity_id) for row in rows)
+        if time.monotonic() - last_prune > 60:
+            last_prune = time.monotonic()
+            _prune_events()
+
+
+def _prune_events() -> None:
+    cutoff = datetime.utcnow() - timedelta(seconds=CACHE_EVENT_RETENTION)
+    try:
+        with engine.begin() as conn:
+            conn.execute(delete(CacheEvent).where(CacheEvent.created_at < cutoff))
+    except Exception as e:
+        # Another worker is pruning or writing; the next round will catch up
+        print(f"Cache bus: pruning cache_events failed: {e}")
+
+
+def _run(loop) -> None:
+    state = {"connected": False}
+
+    def resync():
+        if state["connected"]:
+            print("Cache bus: listener reconnected, clearing registered caches")
+            clear_all()
+        state["connected"] = True
+
+    delay = 1.0
+    while True:
+        started = time.monotonic()
+        try:
+            loop(resync)
+        except Exception as e:
+            print(f"Cache bus ({CACHE_BUS}) listener failed: {e}")
+        if time.monotonic() - started > 60:
+            delay = 1.0
+        time.sleep(delay)
+        delay = min(delay * 2, 30.0)
+
+
+_started_in_pid: Optional[int] = None
+_start_lock = threading.Lock()
+
+
+def start_listener() -> None:
+    """Start this process's listener thread, once per process (threads do not survive a fork)."""
+    global _started_in_pid
+    if CACHE_BUS not in ("notify", "poll"):
+        return
+    with _start_lock:
+        if _started_in_pid == os.getpid():
+            return
+        _started_in_pid = os.getpid()
+    loop = _listen_notify if CACHE_BUS == "notify" else _poll_events
+    threading.Thread(target=_run, args=(loop,), name="cache-bus", daemon=True).start()
+
+
+track_model(User, "users")
+track_model(Role, "roles")
+track_model(Room, "rooms")
+# What the public pages show about rooms (the bootstrap room types), not their status
+track_model(Room, "room_catalog", columns=("type", "price", "adults", "children", "image_url"))
+track_model(Package, "packages")
+track_model(PackageImage, "packages", "package_id")
+track_model(FoodCategory, "food_categories")
+track_model(FoodItem, "food_items")
+track_model(FoodItemImage, "food_items", "item_id")
+track_model(Service, "services")
+track_model(ServiceImage, "services", "service_id")
+for _model in (HeaderBanner, CheckAvailability, Gallery, Review, ResortInfo, SignatureExperience, PlanWedding,
+               NearbyAttraction):
+    track_model(_model, _model.__tablename__)
@@ -4,6 +4,9 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional, List, Dict
 from datetime import datetime
+import time
+
+from app.utils.metrics import observe_smtp_send
 
 
 def get_smtp_config():
@@ -15,10 +18,47 @@ def get_smtp_config():
         'password': os.getenv('SMTP_PASSWORD', ''),
         'from_email': os.getenv('SMTP_FROM_EMAIL', os.getenv('SMTP_USER', 'noreply@elysianretreat.com')),
         'from_name': os.getenv('SMTP_FROM_NAME', 'Elysian Retreat'),
-        'use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+        'use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
+        # A relay that accepts mail without login (local MTA, test stub)
+        'no_auth': os.getenv('SMTP_NO_AUTH', 'false').lower() == 'true'
     }
 
 
+def smtp_configured(config: Dict) -> bool:
+    """
+    SMTP counts as configured when credentials are set, or when SMTP_NO_AUTH=true and
+    SMTP_HOST is set explicitly (a relay that does not require login). A host on its
+    own is not enough: an unauthenticated send to a real provider only fails later.
+    """
+    if config['username'] and config['password']:
+        return True
+    return config['no_auth'] and bool(os.getenv('SMTP_HOST'))
+
+
+def build_message(config: Dict, to_email: str, subject: str, html_content: str) -> MIMEMultipart:
+    """Build the MIME message for one HTML email."""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = f"{config['from_name']} <{config['from_email']}>"
+    msg['To'] = to_email
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg
+
+
+def open_smtp_connection(config: Dict) -> smtplib.SMTP:
+    """Connect, STARTTLS and log in once; the caller can send any number of messages on it."""
+    server = smtplib.SMTP(config['host'], config['port'], timeout=int(os.getenv('SMTP_TIMEOUT', '30')))
+    try:
+        if config['use_tls']:
+            server.starttls()
+        if config['username'] and config['password']:
+            server.login(config['username'], config['password'])
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
 def send_email(
     to_email: str,
     subject: str,
@@ -26,7 +66,10 @@ def send_email(
     to_name: Optional[str] = None
 ) -> bool:
     """
-    Send an email using SMTP.
+    Send an email using SMTP, right away on its own connection.
+
+    Request handlers should use queue_email() instead, so the response does not
+    wait on the SMTP server; this is kept for scripts and one-off sends.
     
     Args:
         to_email: Recipient email address
@@ -41,26 +84,21 @@ def send_email(
         config = get_smtp_config()
         
         # Skip sending if SMTP not configured
-        if not config['username'] or not config['password']:
+        if not smtp_configured(config):
             print(f"[Email] SMTP not configured. Would send email to {to_email}: {subject}")
             return False
         
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{config['from_name']} <{config['from_email']}>"
-        msg['To'] = to_email
-        
-        # Add HTML content
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
-        
-        # Connect to SMTP server and send
-        with smtplib.SMTP(config['host'], config['port']) as server:
-            if config['use_tls']:
-                server.starttls()
-            server.login(config['username'], config['password'])
+        msg = build_message(config, to_email, subject, html_content)
+        started = time.perf_counter()
+        server = open_smtp_connection(config)
+        try:
             server.send_message(msg)
+        except Exception:
+            observe_smtp_send(time.perf_counter() - started, ok=False)
+            raise
+        finally:
+            server.quit()
+        observe_smtp_send(time.perf_counter() - started, ok=True)
         
         print(f"[Email] Successfully sent email to {to_email}: {subject}")
         return True
@@ -70,6 +108,29 @@ def send_email(
         return False
 
 
+def queue_email(
+    db,
+    to_email: str,
+    subject: str,
+    html_content: str,
+    to_name: Optional[str] = None
+):
+    """
+    Add an email to the outbox in the caller's transaction; it is only sent once the
+    caller commits, so a booking that fails never emails the guest. The background
+    sender (python -m app.utils.email_outbox) delivers it, with retries.
+
+    The insert runs in a savepoint: if it fails, only the email is rolled back.
+    """
+    from app.models.email_outbox import EmailOutbox
+
+    entry = EmailOutbox(to_email=to_email, to_name=to_name, subject=subject, html_content=html_content)
+    with db.begin_nested():
+        db.add(entry)
+    print(f"[Email] Queued email to {to_email}: {subject}")
+    return entry
+
+
 def create_booking_confirmation_email(
     guest_name: str,
     booking_id: int,
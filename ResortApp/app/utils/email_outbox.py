@@ -0,0 +1,188 @@
+"""
+Background sender for the email outbox (app/models/email_outbox.py).
+
+Booking endpoints call app.utils.email.queue_email() and return straight away; this
+worker claims due rows in batches, sends each batch over one authenticated SMTP
+session and reschedules failures with exponential backoff.
+
+Rows are claimed with SELECT .. FOR UPDATE SKIP LOCKED and leased by pushing
+next_attempt_at forward, so several senders can run side by side and a sender that
+dies mid-batch only delays its rows by CLAIM_LEASE_SECONDS.
+
+    python -m app.utils.email_outbox          # run forever (resort-email-worker.service)
+    python -m app.utils.email_outbox --once   # send what is due now and exit
+
+For local testing point SMTP_HOST/SMTP_PORT at a stub server, e.g.
+`python -m aiosmtpd -n -l localhost:1025` with SMTP_HOST=localhost SMTP_PORT=1025 SMTP_USE_TLS=false.
+"""
+import os
+import smtplib
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.email_outbox import EmailOutbox
+from app.utils.email import get_smtp_config, smtp_configured, build_message, open_smtp_connection
+from app.utils.metrics import observe_smtp_send
+
+BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "5"))
+MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+CLAIM_LEASE_SECONDS = 300
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt: 30s, 1m, 2m, 4m ... capped at one hour."""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS))
+
+
+def claim_batch(db: Session, limit: int = BATCH_SIZE, now: Optional[datetime] = None) -> List[Dict]:
+    """Claim up to `limit` due emails and commit the claim. Returns plain dicts, not ORM rows."""
+    now = now or datetime.utcnow()
+    rows = db.execute(
+        select(EmailOutbox)
+        .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    claimed = []
+    for row in rows:
+        row.attempts += 1
+        row.next_attempt_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        claimed.append({
+            "id": row.id,
+            "to_email": row.to_email,
+            "subject": row.subject,
+            "html_content": row.html_content,
+            "attempts": row.attempts,
+        })
+    db.commit()
+    return claimed
+
+
+def deliver_batch(config: Dict, messages: List[Dict]) -> Dict[int, Optional[str]]:
+    """Send messages over a single SMTP session. Returns {id: None on success, else the error}."""
+    results = {}
+    try:
+        server = open_smtp_connection(config)
+    except Exception as e:
+        return {m["id"]: f"SMTP connection failed: {e}" for m in messages}
+
+    try:
+        for i, m in enumerate(messages):
+            started = time.perf_counter()
+            try:
+                server.send_message(build_message(config, m["to_email"], m["subject"], m["html_content"]))
+                results[m["id"]] = None
+                observe_smtp_send(time.perf_counter() - started, ok=True)
+            except smtplib.SMTPServerDisconnected as e:
+                observe_smtp_send(time.perf_counter() - started, ok=False)
+                # The session is gone; the rest of the batch is retried later
+                for rest in messages[i:]:
+                    results[rest["id"]] = f"SMTP server disconnected: {e}"
+                break
+            except Exception as e:
+                observe_smtp_send(time.perf_counter() - started, ok=False)
+                results[m["id"]] = str(e)
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return results
+
+
+def record_results(db: Session, messages: List[Dict], results: Dict[int, Optional[str]], now: Optional[datetime] = None) -> None:
+    """Mark sent emails in one UPDATE and reschedule (or give up on) the failed ones. Commits."""
+    now = now or datetime.utcnow()
+    sent_ids = [m["id"] for m in messages if results.get(m["id"], "not attempted") is None]
+    if sent_ids:
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(sent_ids))
+            .values(status="sent", sent_at=now, last_error=None)
+        )
+    for m in messages:
+        error = results.get(m["id"], "not attempted")
+        if error is None:
+            continue
+        values = {"last_error": error[:2000]}
+        if m["attempts"] >= MAX_ATTEMPTS:
+            values["status"] = "failed"
+            print(f"[Email] Giving up on email {m['id']} to {m['to_email']} after {m['attempts']} attempts: {error}")
+        else:
+            values["next_attempt_at"] = now + retry_delay(m["attempts"])
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == m["id"]).values(**values))
+    db.commit()
+
+
+def process_due(db: Session, limit: int = BATCH_SIZE) -> Dict[str, int]:
+    """Claim, send and record one batch. Returns counts of sent and failed emails."""
+    messages = claim_batch(db, limit)
+    if not messages:
+        return {"sent": 0, "failed": 0}
+
+    config = get_smtp_config()
+    if not smtp_configured(config):
+        for m in messages:
+            print(f"[Email] SMTP not configured. Would send email to {m['to_email']}: {m['subject']}")
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_([m["id"] for m in messages]))
+            .values(status="skipped", last_error="SMTP not configured")
+        )
+        db.commit()
+        return {"sent": 0, "failed": 0}
+
+    results = deliver_batch(config, messages)
+    record_results(db, messages, results)
+    sent = sum(1 for error in results.values() if error is None)
+    print(f"[Email] Sent {sent}/{len(messages)} queued emails")
+    return {"sent": sent, "failed": len(messages) - sent}
+
+
+def run_forever(poll_interval: float = POLL_INTERVAL) -> None:
+    from app.database import SessionLocal
+
+    print(f"[Email] Outbox sender started (batch {BATCH_SIZE}, poll every {poll_interval}s)")
+    while True:
+        db = SessionLocal()
+        try:
+            counts = process_due(db)
+        except Exception as e:
+            db.rollback()
+            print(f"[Email] Outbox sender error: {e}")
+            counts = {"sent": 0, "failed": 0}
+        finally:
+            db.close()
+        # A full batch means more may be waiting; otherwise sleep until the next poll
+        if counts["sent"] + counts["failed"] < BATCH_SIZE:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--once" in sys.argv:
+        from app.database import SessionLocal
+
+        session = SessionLocal()
+        try:
+            total = {"sent": 0, "failed": 0}
+            while True:
+                counts = process_due(session)
+                total = {k: total[k] + counts[k] for k in total}
+                if counts["sent"] + counts["failed"] < BATCH_SIZE:
+                    break
+            print(f"[Email] Outbox drained: {total['sent']} sent, {total['failed']} failed")
+        finally:
+            session.close()
+    else:
+        run_forever()
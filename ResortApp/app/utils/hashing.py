@@ -0,0 +1,126 @@
+"""
+Password hashing off the request threads.
+
+bcrypt is deliberately slow (~0.25s per hash at cost 12). Every hash and check runs
+on a small dedicated executor so a burst of logins at shift change cannot take
+over all the CPU a worker has; requests beyond the cap wait in its queue. The
+queue and timing counters are available through hashing_stats() and as the
+password_hash_* metrics on /metrics.
+
+Login, registration and employee creation are plain def handlers: FastAPI runs
+them (and their database work) in its threadpool, and hash_password() /
+check_password() block that thread, not the event loop, until the executor has
+done the bcrypt work.
+
+bcrypt releases the GIL while it works, so a thread pool gives real parallelism
+without the cost of pickling to worker processes, and is safe with gunicorn's
+preload_app.
+
+BCRYPT_ROUNDS sets the cost of new hashes. Hashes made with a different cost are
+upgraded the next time their user logs in (see needs_rehash). Run
+`python benchmarks/bcrypt_cost.py` on the production host to pick the cost.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from app.utils.metrics import observe_hash, observe_hash_queue
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+
+# Prefix of password hashes that can never match, e.g. guest accounts created
+# by bookings; they are stored without spending a bcrypt round.
+UNUSABLE_PASSWORD_PREFIX = "!"
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "queued": 0,
+    "running": 0,
+    "completed": 0,
+    "wait_seconds_total": 0.0,
+    "hash_seconds_total": 0.0,
+}
+
+
+def hashing_stats() -> dict:
+    """Snapshot of the executor counters (current queue depth, totals since start)."""
+    with _stats_lock:
+        return dict(_stats, workers=HASH_WORKERS, rounds=BCRYPT_ROUNDS)
+
+
+def _task(fn, *args):
+    """Wrap fn(*args) for the executor, keeping the queue counters and metrics up to date."""
+    submitted = time.perf_counter()
+    with _stats_lock:
+        _stats["queued"] += 1
+        observe_hash_queue(_stats["queued"], _stats["running"])
+
+    def task():
+        started = time.perf_counter()
+        with _stats_lock:
+            _stats["queued"] -= 1
+            _stats["running"] += 1
+            _stats["wait_seconds_total"] += started - submitted
+            observe_hash_queue(_stats["queued"], _stats["running"])
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with _stats_lock:
+                _stats["running"] -= 1
+                _stats["completed"] += 1
+                _stats["hash_seconds_total"] += elapsed
+                observe_hash_queue(_stats["queued"], _stats["running"])
+            observe_hash(started - submitted, elapsed)
+
+    return task
+
+
+def _run(fn, *args):
+    """Run fn on the hashing executor and block until its result."""
+    return _executor.submit(_task(fn, *args)).result()
+
+
+def _password_bytes(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes
+    return password.encode("utf-8")[:72]
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    return _run(bcrypt.hashpw, _password_bytes(password), salt).decode("utf-8")
+
+
+def check_password(password: str, hashed: str) -> bool:
+    if not hashed or is_unusable(hashed):
+        return False
+    return _run(bcrypt.checkpw, _password_bytes(password), hashed.encode("utf-8"))
+
+
+def make_unusable_password(reason: str = "no-login") -> str:
+    """A stored password value no password can match (no bcrypt round needed)."""
+    return f"{UNUSABLE_PASSWORD_PREFIX}{reason}"
+
+
+def is_unusable(hashed: str) -> bool:
+    return hashed.startswith(UNUSABLE_PASSWORD_PREFIX)
+
+
+def hash_cost(hashed: str):
+    """Cost factor of a bcrypt hash ("$2b$12$..." -> 12), or None if it is not one."""
+    parts = (hashed or "").split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True for usable hashes made with a cost other than BCRYPT_ROUNDS."""
+    cost = hash_cost(hashed)
+    return cost is not None and cost != BCRYPT_ROUNDS
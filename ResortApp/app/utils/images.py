@@ -0,0 +1,167 @@
+"""
+Resized WebP variants of uploaded images.
+
+Banners, gallery pictures, packages, services and food items are uploaded straight
+from phone cameras (4000px wide, several MB, with EXIF including GPS position) and
+the pages used to download them at that size even for a 320px card. After an
+upload is saved, make_variants() writes WebP copies next to the original, one per
+entry of VARIANT_WIDTHS that is narrower than the original:
+
+    static/uploads/gallery_ab12.jpg
+    static/uploads/gallery_ab12.thumb.webp     320px wide
+    static/uploads/gallery_ab12.medium.webp    800px wide
+    static/uploads/gallery_ab12.large.webp    1600px wide
+
+The original is served as well, so before that it is rewritten without its EXIF
+and XMP metadata (camera, GPS position, timestamps) by strip_metadata(), with the
+EXIF orientation applied to the pixels; JPEGs keep their quantisation tables when
+no rotation is needed. The variants are made from the stripped file. The returned
+dict is stored in the row's image_variants column, and the output schemas
+(app/schemas/images.py) turn it into a srcset string for <img srcset>.
+
+Decoding and encoding are CPU bound and hold the GIL for long stretches, so they run
+on a pool of IMAGE_WORKERS processes per gunicorn worker, started on first use (a
+pool made before gunicorn forks would not work in the workers). Pillow is pinned in
+requirements_production.txt. Without it, or for files it cannot read (PDFs, HEIC),
+make_variants() returns None and pages fall back to image_url; such files keep
+whatever metadata they were uploaded with.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+# Variant name -> maximum width in pixels, smallest first
+VARIANT_WIDTHS = {"thumb": 320, "medium": 800, "large": 1600}
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+# Keys of Image.info holding metadata besides EXIF
+_METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+# Formats strip_metadata rewrites; MPO (multi-picture JPEG from phones) is saved as its first frame
+_STRIP_FORMATS = {"JPEG": "JPEG", "MPO": "JPEG", "PNG": "PNG", "WEBP": "WEBP", "TIFF": "TIFF"}
+
+
+def strip_metadata(path: str) -> bool:
+    """Rewrite the image at path without EXIF/XMP metadata; returns whether the file was rewritten."""
+    from PIL import Image, ImageOps  # Optional dependency, imported in the pool process
+
+    with Image.open(path) as original:
+        save_format = _STRIP_FORMATS.get(original.format)
+        exif = original.getexif()
+        if save_format is None or not (len(exif) or any(key in original.info for key in _METADATA_KEYS)):
+            return False
+        options = {}
+        if original.info.get("icc_profile"):
+            options["icc_profile"] = original.info["icc_profile"]
+        rotated = exif.get(0x0112, 1) != 1
+        image = ImageOps.exif_transpose(original) if rotated else original
+        if original.format == "JPEG" and not rotated:
+            # Same quantisation tables and subsampling: no further loss
+            options["quality"] = "keep"
+        elif save_format == "JPEG":
+            options["quality"] = 95
+        tmp_path = f"{path}.strip"
+        try:
+            image.save(tmp_path, save_format, **options)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return True
+
+
+def prepare_upload(path: str, widths: Dict[str, int], quality: int) -> Dict[str, dict]:
+    """Pool task: strip the original's metadata, then render its variants."""
+    strip_metadata(path)
+    return render_variants(path, widths, quality)
+
+
+def render_variants(path: str, widths: Dict[str, int], quality: int) -> Dict[str, dict]:
+    """Write the WebP variants of the image at path; returns name -> {file, width, height}."""
+    from PIL import Image, ImageOps  # Optional dependency, imported in the pool process
+
+    stem = os.path.splitext(path)[0]
+    variants = {}
+    with Image.open(path) as original:
+        # JPEG can decode straight to a fraction of its size, far cheaper than a full decode
+        original.draft("RGB", (max(widths.values()), max(widths.values())))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        # Largest first, each one resized from the previous
+        for name, width in sorted(widths.items(), key=lambda item: -item[1]):
+            if width < image.width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            elif variants:
+                # No smaller than the next larger variant: not worth a file of its own
+                continue
+            filename = f"{stem}.{name}.webp"
+            image.save(filename, "WEBP", quality=quality, method=4)
+            variants[name] = {"file": os.path.basename(filename), "width": image.width, "height": image.height}
+    return variants
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: forking a worker that already runs threads (cache bus, executors) is unsafe
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_executor() -> None:
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+async def make_variants(path: str, url: str) -> Optional[Dict[str, dict]]:
+    """
+    Strip the metadata of the uploaded image saved at path and served at url, and
+    write its variants.
+
+    Returns {"thumb": {"url", "width", "height"}, ...} for the image_variants column,
+    or None when no variants could be made; the upload itself is never failed here.
+    """
+    # Imported here so the pool processes, which import this module, do not set up the database
+    from app.utils.request_stats import add_timing
+
+    started = time.perf_counter()
+    try:
+        future = _executor().submit(prepare_upload, path, VARIANT_WIDTHS, WEBP_QUALITY)
+        rendered = await asyncio.wrap_future(future)
+    except BrokenProcessPool as e:
+        # A pool process died (e.g. out of memory on a huge image); start a new pool next time
+        _reset_executor()
+        print(f"Image variants for {path} failed: {e}")
+        return None
+    except Exception as e:
+        print(f"Image variants for {path} skipped: {e}")
+        return None
+    finally:
+        add_timing("images", time.perf_counter() - started)
+    base_url = url.rsplit("/", 1)[0]
+    return {
+        name: {"url": f"{base_url}/{variant['file']}", "width": variant["width"], "height": variant["height"]}
+        for name, variant in rendered.items()
+    }
+
+
+def srcset(variants: Optional[dict]) -> Optional[str]:
+    """'url 320w, url 800w, ...' for an image_variants value."""
+    if not variants:
+        return None
+    ordered = sorted(variants.values(), key=lambda variant: variant["width"])
+    return ", ".join(f"{variant['url']} {variant['width']}w" for variant in ordered)
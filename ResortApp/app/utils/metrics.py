@@ -0,0 +1,267 @@
+"""
+Prometheus metrics, served in the text exposition format at /metrics.
+
+    http_request_duration_seconds{method,route,status}  latency per route template
+    http_requests_in_progress{method}                   requests being handled
+    db_pool_checked_out / db_pool_overflow              connections of the sync engine pool
+    db_pool_checkout_wait_seconds                       time spent waiting for a pooled connection
+    db_statements_per_request{route}                    SQL statements run per request
+    smtp_send_seconds{outcome}                          time to hand one email to the SMTP server
+    cache_requests_total{namespace,result}              response cache lookups: hit, miss, coalesced, error
+    password_hash_queued / password_hash_running        bcrypt calls waiting for / on the hashing executor
+    password_hash_wait_seconds / password_hash_seconds  queue wait and bcrypt time per call
+
+Routes are labelled with their template ("/bookings/{booking_id}"), never the raw
+path, so the number of series stays bounded.
+
+gunicorn runs several worker processes, each with its own counters. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py sets it) every process writes its
+samples to files in that directory and /metrics adds up all of them, so whichever
+worker answers the scrape reports the whole server. The email outbox worker
+writes to the same directory when it is started with the same variable.
+
+/metrics is only served to clients in METRICS_ALLOWED_IPS (comma-separated
+addresses or networks, loopback by default) or sending
+"Authorization: Bearer <METRICS_TOKEN>" when METRICS_TOKEN is set; anyone else
+gets a 403. The gunicorn workers take the client address from X-Forwarded-For only
+when the request comes from nginx on the same host.
+"""
+import ipaddress
+import os
+import secrets
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from starlette.responses import Response
+
+from app.database import SessionLocal, engine
+from app.utils.request_stats import add_timing, current_request_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the database pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (max_overflow is the limit)",
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time from a session needing a connection to the pool handing one out",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_STATEMENTS = Histogram(
+    "db_statements_per_request",
+    "SQL statements run while handling one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+SMTP_SEND = Histogram(
+    "smtp_send_seconds",
+    "Time to send one email over SMTP",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Response cache lookups by namespace and result",
+    ["namespace", "result"],
+)
+
+HASH_QUEUED = Gauge(
+    "password_hash_queued",
+    "bcrypt calls waiting for a hashing executor thread",
+    multiprocess_mode="livesum",
+)
+HASH_RUNNING = Gauge(
+    "password_hash_running",
+    "bcrypt calls running on the hashing executor",
+    multiprocess_mode="livesum",
+)
+HASH_WAIT = Histogram(
+    "password_hash_wait_seconds",
+    "Time a bcrypt call waited in the hashing executor queue",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Time spent in one bcrypt hash or check",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_ALLOWED_IPS = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if network.strip()
+]
+
+
+def observe_smtp_send(seconds: float, ok: bool) -> None:
+    SMTP_SEND.labels(outcome="sent" if ok else "failed").observe(seconds)
+    # Also the request's smtp Server-Timing entry when sent from a request
+    add_timing("smtp", seconds)
+
+
+def observe_cache(namespace: str, result: str) -> None:
+    CACHE_REQUESTS.labels(namespace=namespace, result=result).inc()
+
+
+def observe_hash_queue(queued: int, running: int) -> None:
+    HASH_QUEUED.set(queued)
+    HASH_RUNNING.set(running)
+
+
+def observe_hash(wait_seconds: float, hash_seconds: float) -> None:
+    HASH_WAIT.observe(wait_seconds)
+    HASH_SECONDS.observe(hash_seconds)
+
+
+def _update_pool_gauges(*args):
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        # overflow() starts at -pool_size and only turns positive past pool_size
+        DB_POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+
+event.listen(engine, "checkout", _update_pool_gauges)
+event.listen(engine, "checkin", _update_pool_gauges)
+
+# The pool has no event for a checkout starting to wait, so sessions note when they
+# are about to need a connection and the checkout event measures from there. A
+# statement that runs on a connection the session already holds clears the mark.
+_checkout_requested = threading.local()
+
+
+def _mark_checkout_requested(*args):
+    _checkout_requested.started = time.perf_counter()
+
+
+def _clear_checkout_requested(*args):
+    _checkout_requested.started = None
+
+
+def _observe_checkout_wait(dbapi_connection, connection_record, connection_proxy):
+    started = getattr(_checkout_requested, "started", None)
+    if started is not None:
+        _checkout_requested.started = None
+        DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+event.listen(SessionLocal, "do_orm_execute", _mark_checkout_requested)
+event.listen(SessionLocal, "before_flush", _mark_checkout_requested)
+event.listen(engine, "checkout", _observe_checkout_wait)
+event.listen(engine, "before_cursor_execute", _clear_checkout_requested)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return template
+    # Some FastAPI versions keep the router-relative template on the route;
+    # put back the include_router prefix ("/api") the request path started with
+    for i, char in enumerate(path):
+        if char == "/" and i and regex.match(path[i:]):
+            return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and statements per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            # The router stores the matched route in the scope while handling the request
+            route = _route_label(scope)
+            REQUEST_LATENCY.labels(method=method, route=route, status=str(status["code"])).observe(elapsed)
+            stats = current_request_stats()
+            if stats is not None:
+                DB_STATEMENTS.labels(route=route).observe(stats.statements)
+
+
+def _client_allowed(host) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        return False
+    return any(address in network for network in METRICS_ALLOWED_IPS)
+
+
+def require_metrics_access(request: Request) -> None:
+    """Dependency of /metrics: allowlisted client address or the METRICS_TOKEN bearer token."""
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and secrets.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return
+    if _client_allowed(request.client.host if request.client else None):
+        return
+    raise HTTPException(status_code=403, detail="Not allowed to read metrics")
+
+
+def metrics_response() -> Response:
+    """Current metrics in the Prometheus text format (all workers in multiprocess mode)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
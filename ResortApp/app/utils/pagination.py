@@ -0,0 +1,185 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+A cursor is an opaque, URL-safe token holding the (order column value, id) of the
+last row of a page. The next page is fetched with
+
+    WHERE (order_col, id) < (:value, :id) ORDER BY order_col DESC, id DESC LIMIT n
+
+so every page costs the same index range scan, however deep the client pages,
+unlike OFFSET which reads and discards every earlier row.
+
+List endpoints accept `cursor` (and keep `skip` for old clients) and return the
+cursor for the next page in the X-Next-Cursor header (absent on the last page).
+Totals are opt-in via `total`: "none", "estimate" (planner row estimate on
+PostgreSQL) or "exact" (COUNT).
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, text
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_MODES = ("none", "estimate", "exact")
+
+# Must be listed in CORS expose_headers so the browser frontend can read them
+PAGINATION_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER]
+
+
+def _encode_value(value: Any) -> list:
+    if value is None:
+        return ["n", None]
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["dec", str(value)]
+    if isinstance(value, (int, float)):
+        return ["num", value]
+    return ["s", str(value)]
+
+
+def _decode_value(tag: str, raw: Any) -> Any:
+    if tag == "n":
+        return None
+    if tag == "dt":
+        return datetime.fromisoformat(raw)
+    if tag == "d":
+        return date.fromisoformat(raw)
+    if tag == "dec":
+        return Decimal(raw)
+    if tag in ("num", "s"):
+        return raw
+    raise ValueError(f"unknown cursor value type {tag!r}")
+
+
+def encode_cursor(value: Any, row_id: int) -> str:
+    """Opaque cursor for the row (value of the order column, id)."""
+    payload = json.dumps(_encode_value(value) + [row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Inverse of encode_cursor. Raises a 400 for tokens that were not produced by it."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        tag, raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return _decode_value(tag, raw), int(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _nullable(column) -> bool:
+    columns = getattr(getattr(column, "property", None), "columns", None) or [column]
+    return bool(getattr(columns[0], "nullable", True)) and not getattr(columns[0], "primary_key", False)
+
+
+def keyset_order(order_column, id_column, descending: bool = True) -> list:
+    """ORDER BY clauses matching keyset_filter (NULL order values sort last)."""
+    if order_column is id_column:
+        return [id_column.desc() if descending else id_column.asc()]
+    ordered = order_column.desc() if descending else order_column.asc()
+    if _nullable(order_column):
+        ordered = ordered.nulls_last()
+    return [ordered, id_column.desc() if descending else id_column.asc()]
+
+
+def keyset_filter(order_column, id_column, cursor: str, descending: bool = True):
+    """WHERE clause selecting the rows after the cursor, in keyset_order order."""
+    value, row_id = decode_cursor(cursor)
+    after_id = id_column < row_id if descending else id_column > row_id
+    if order_column is id_column:
+        return after_id
+
+    nullable = _nullable(order_column)
+    if value is None:
+        # Already in the trailing block of NULL order values
+        return and_(order_column.is_(None), after_id)
+    after_value = order_column < value if descending else order_column > value
+    clause = or_(after_value, and_(order_column == value, after_id))
+    if nullable:
+        clause = or_(clause, order_column.is_(None))
+    return clause
+
+
+def count_total(query, mode: str) -> Optional[int]:
+    """
+    Total rows of an (unpaginated) ORM query:
+      "none"     -> None
+      "estimate" -> planner estimate on PostgreSQL (no table scan), exact COUNT elsewhere
+      "exact"    -> COUNT(*)
+    """
+    if mode not in TOTAL_MODES:
+        raise HTTPException(status_code=400, detail=f"total must be one of {', '.join(TOTAL_MODES)}")
+    if mode == "none":
+        return None
+    query = query.order_by(None)
+    if mode == "estimate":
+        session = query.session
+        bind = session.get_bind()
+        if bind.dialect.name == "postgresql":
+            try:
+                statement = query.statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True})
+                plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"])
+            except Exception as e:
+                print(f"Row estimate failed, falling back to COUNT: {e}")
+    return query.count()
+
+
+def paginate(
+    query,
+    order_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = True,
+    response: Optional[Response] = None,
+    total: str = "none",
+) -> List[Any]:
+    """
+    Fetch one page of an ORM query ordered by (order_column, id_column).
+
+    With a cursor the page starts right after it; without one, `skip` is honoured
+    for backward compatibility. One extra row is read to know whether a next page
+    exists; its cursor goes into the X-Next-Cursor header of `response`, along with
+    X-Total-Count when `total` asks for it.
+    """
+    limit = max(0, int(limit))
+    total_count = count_total(query, total) if response is not None else None
+
+    query = query.order_by(None).order_by(*keyset_order(order_column, id_column, descending))
+    if cursor:
+        query = query.filter(keyset_filter(order_column, id_column, cursor, descending))
+    elif skip:
+        query = query.offset(skip)
+
+    rows, next_cursor = split_page(query.limit(limit + 1).all(), limit, order_column, id_column)
+    if response is not None:
+        set_pagination_headers(response, next_cursor, total_count)
+    return rows
+
+
+def split_page(rows: List[Any], limit: int, order_column, id_column) -> Tuple[List[Any], Optional[str]]:
+    """Trim a page fetched with LIMIT limit + 1 and return (rows, cursor of the next page or None)."""
+    if len(rows) <= limit or not limit:
+        return rows[:limit], None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, order_column.key), getattr(last, id_column.key))
+
+
+def set_pagination_headers(response: Response, next_cursor: Optional[str], total_count: Optional[int] = None) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total_count is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total_count)
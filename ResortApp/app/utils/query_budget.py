@@ -0,0 +1,111 @@
+"""
+Statement fingerprints and query budgets, for catching N+1 queries early.
+
+A fingerprint is a statement with its literals and bound values taken out, so the
+same query run for every row of a page ("SELECT .. FROM bookings WHERE id = ?"
+once per order) shows up as one fingerprint with a high count.
+
+RequestStatsMiddleware (app/utils/request_stats.py) counts fingerprints per request
+when N_PLUS_ONE_THRESHOLD is set and logs any that repeat that often. Checks and
+benchmarks can pin the number of statements an endpoint may run:
+
+    with query_budget(6, max_repeats=2):
+        client.get("/api/food-orders/?limit=20", headers=auth)
+
+which raises QueryBudgetExceeded listing the most repeated statements when the
+block runs more. `python benchmarks/query_budgets.py` checks the hot endpoints.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.database import engine
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+|\?|%s")
+# "IN (?, ?, ?)" and multi-row VALUES lists differ only in length
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalised form of a SQL statement: literals and parameters become ?, whitespace collapsed."""
+    text = _STRING.sub("?", statement)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PARAM_LIST.sub("(?...)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+class QueryLog:
+    """Statements seen while capturing: total count, time spent and count per fingerprint."""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.statements += 1
+        self.db_time += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Fingerprints run at least `threshold` times, most repeated first."""
+        return [(fp, count) for fp, count in self.fingerprints.most_common() if count >= threshold]
+
+    def report(self, limit: int = 5) -> str:
+        lines = [f"{self.statements} statements, {self.db_time * 1000:.1f} ms in the database"]
+        for fp, count in self.fingerprints.most_common(limit):
+            lines.append(f"  {count:>4} x {fp[:200]}")
+        return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def capture_queries(bind=None):
+    """Record every statement run on the engine (all threads) while the block runs."""
+    bind = bind or engine
+    log = QueryLog()
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_budget_started"] = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        log.record(statement, time.perf_counter() - conn.info.pop("query_budget_started", time.perf_counter()))
+
+    event.listen(bind, "before_cursor_execute", before)
+    event.listen(bind, "after_cursor_execute", after)
+    try:
+        yield log
+    finally:
+        event.remove(bind, "before_cursor_execute", before)
+        event.remove(bind, "after_cursor_execute", after)
+
+
+@contextmanager
+def query_budget(max_statements: int, max_repeats: Optional[int] = None, bind=None):
+    """
+    Fail with QueryBudgetExceeded if the block runs more than max_statements
+    statements, or (with max_repeats) any one fingerprint more than max_repeats times.
+    """
+    with capture_queries(bind) as log:
+        yield log
+    problems = []
+    if log.statements > max_statements:
+        problems.append(f"ran {log.statements} statements, budget is {max_statements}")
+    if max_repeats is not None:
+        for fp, count in log.repeated(max_repeats + 1):
+            problems.append(f"ran {count} times (limit {max_repeats}): {fp[:200]}")
+    if problems:
+        raise QueryBudgetExceeded("\n".join(problems) + "\n" + log.report())
@@ -0,0 +1,274 @@
+"""
+Per-request database accounting.
+
+RequestStatsMiddleware gives every HTTP request its own RequestStats, and engine
+events on the sync (and, when enabled, async) engine record every connection the
+request checks out and every SQL statement it runs, with the time spent in the
+database. All endpoints share the single get_db session, so a request should never
+hold more than one pooled connection at a time; a request that does is logged.
+
+Set REQUEST_STATS_HEADERS=true to return the counters as X-DB-Checkouts,
+X-DB-Peak-Connections, X-DB-Statements and X-DB-Time-Ms response headers (used in
+development and when load testing). With N_PLUS_ONE_THRESHOLD=n, statements are
+also fingerprinted (app/utils/query_budget.py) and a request that runs the same
+statement n or more times is logged as a likely N+1 query.
+
+With SERVER_TIMING=true (development; off by default, since it tells any client
+how the time went) responses carry a Server-Timing header splitting the request
+into db (SQL execution), serialize (encoding cached responses,
+app/utils/response_cache.py), upload (writing uploaded files, app/utils/uploads.py),
+smtp (send_email) and app (everything else, including response_model validation of
+uncached endpoints), which browser dev tools show next to the request. Other code
+can charge time to a named entry with add_timing(). The time spent sending the
+body, from the response start to its last chunk (streamed and file responses), is
+recorded as send; it comes after the headers, so only the slow-request log has it.
+
+Requests slower than SLOW_REQUEST_MS (default 1000, 0 turns it off) are written as
+one JSON line to SLOW_REQUEST_LOG, or printed when that is unset, with the timings
+and the normalised statements the request ran, their counts and durations. With
+SLOW_REQUEST_EXPLAIN_RATE=0.1, one in ten of those records also gets the plan of the
+request's slowest SELECT: EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL, which runs the
+query again (inside a rolled back transaction, with a statement timeout), or EXPLAIN
+QUERY PLAN on SQLite. Plans can show literal values from the query.
+"""
+import json
+import os
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+from app.database import engine, async_engine
+from app.utils.query_budget import fingerprint
+
+CHECKOUTS_HEADER = "X-DB-Checkouts"
+PEAK_CONNECTIONS_HEADER = "X-DB-Peak-Connections"
+STATEMENTS_HEADER = "X-DB-Statements"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+REQUEST_STATS_HEADERS = os.getenv("REQUEST_STATS_HEADERS", "false").lower() in ("1", "true", "yes")
+# 0 turns fingerprinting off (the default in production)
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "0"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_REQUEST_LOG = os.getenv("SLOW_REQUEST_LOG")
+SLOW_REQUEST_EXPLAIN_RATE = float(os.getenv("SLOW_REQUEST_EXPLAIN_RATE", "0"))
+# Statements listed in a slow-request record, slowest total first
+SLOW_REQUEST_TOP_STATEMENTS = 20
+EXPLAIN_TIMEOUT_MS = 5000
+
+
+class RequestStats:
+    """Counters for one request. Mutated in place, so threadpool copies of the context see the same object."""
+
+    __slots__ = ("checkouts", "open_connections", "peak_connections", "statements", "db_time", "fingerprints",
+                 "timings", "statement_times", "slowest")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.open_connections = 0
+        self.peak_connections = 0
+        self.statements = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter() if N_PLUS_ONE_THRESHOLD else None
+        # Server-Timing entry -> seconds, besides db
+        self.timings = {}
+        # For the slow-request log: fingerprint -> [count, total seconds, max seconds],
+        # and (seconds, statement, parameters) of the slowest single-row statement
+        self.statement_times = {} if SLOW_REQUEST_MS > 0 else None
+        self.slowest = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, or None outside a request (startup, workers, scripts)."""
+    return _current.get()
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """Charge time to a Server-Timing entry of the current request (a no-op outside requests)."""
+    stats = _current.get()
+    if stats is not None:
+        stats.timings[name] = stats.timings.get(name, 0.0) + seconds
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.checkouts += 1
+    stats.open_connections += 1
+    stats.peak_connections = max(stats.peak_connections, stats.open_connections)
+    # Check-in can happen outside the request context, so remember whose connection this is
+    connection_record.info["request_stats"] = stats
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    stats = connection_record.info.pop("request_stats", None)
+    if stats is not None:
+        stats.open_connections -= 1
+
+
+def _on_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        if stats.fingerprints is not None:
+            stats.fingerprints[fingerprint(statement)] += 1
+        conn.info["request_stats_started"] = time.perf_counter()
+
+
+def _after_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("request_stats_started", None)
+    stats = _current.get()
+    if started is None or stats is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.db_time += elapsed
+    if stats.statement_times is not None:
+        entry = stats.statement_times.setdefault(fingerprint(statement), [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        if not executemany and (stats.slowest is None or elapsed > stats.slowest[0]):
+            stats.slowest = (elapsed, statement, parameters)
+
+
+for _engine in (engine, async_engine.sync_engine if async_engine is not None else None):
+    if _engine is not None:
+        event.listen(_engine, "checkout", _on_checkout)
+        event.listen(_engine, "checkin", _on_checkin)
+        event.listen(_engine, "before_cursor_execute", _on_statement)
+        event.listen(_engine, "after_cursor_execute", _after_statement)
+
+
+def server_timing(stats: RequestStats, total: float) -> str:
+    """Server-Timing header value, durations in milliseconds; app is the time not accounted for elsewhere."""
+    entries = [f'db;dur={stats.db_time * 1000:.1f};desc="{stats.statements} statements"']
+    accounted = stats.db_time
+    for name, seconds in stats.timings.items():
+        entries.append(f"{name};dur={seconds * 1000:.1f}")
+        accounted += seconds
+    entries.append(f"app;dur={max(total - accounted, 0.0) * 1000:.1f}")
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _explain(statement: str, parameters) -> Optional[dict]:
+    """Plan of a SELECT, run on a separate connection; None for other statements and dialects."""
+    head = statement.lstrip().upper()
+    if not head.startswith(("SELECT", "WITH")) or "FOR UPDATE" in head:
+        return None
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    try:
+        with engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                if dialect == "postgresql":
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}")
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+            finally:
+                trans.rollback()
+    except Exception as e:
+        return {"statement": fingerprint(statement), "error": str(e)}
+    # PostgreSQL returns one text column per plan line, SQLite (id, parent, notused, detail)
+    return {"statement": fingerprint(statement), "plan": [row[-1] for row in rows]}
+
+
+def _log_slow_request(stats: RequestStats, method: str, path: str, status: Optional[int], duration: float) -> None:
+    statements = sorted(stats.statement_times.items(), key=lambda item: item[1][1], reverse=True)
+    record = {
+        "time": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 1),
+        "db_ms": round(stats.db_time * 1000, 1),
+        "timings_ms": {name: round(seconds * 1000, 1) for name, seconds in stats.timings.items()},
+        "statement_count": stats.statements,
+        "statements": [
+            {"sql": sql, "count": count, "total_ms": round(total * 1000, 2), "max_ms": round(longest * 1000, 2)}
+            for sql, (count, total, longest) in statements[:SLOW_REQUEST_TOP_STATEMENTS]
+        ],
+    }
+    if stats.slowest is not None and SLOW_REQUEST_EXPLAIN_RATE > 0 and random.random() < SLOW_REQUEST_EXPLAIN_RATE:
+        seconds, statement, parameters = stats.slowest
+        explained = _explain(statement, parameters)
+        if explained is not None:
+            record["explain"] = {**explained, "duration_ms": round(seconds * 1000, 2)}
+
+    line = json.dumps(record, default=str)
+    if SLOW_REQUEST_LOG:
+        try:
+            with open(SLOW_REQUEST_LOG, "a") as f:
+                f.write(line + "\n")
+            return
+        except OSError as e:
+            print(f"Could not write to SLOW_REQUEST_LOG {SLOW_REQUEST_LOG}: {e}")
+    print(f"Slow request: {line}")
+
+
+class RequestStatsMiddleware:
+    """ASGI middleware installing a fresh RequestStats for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = None
+        response_started = None
+
+        async def send_with_stats(message):
+            nonlocal status, response_started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_started = time.perf_counter()
+                if REQUEST_STATS_HEADERS or SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    if REQUEST_STATS_HEADERS:
+                        headers.append((CHECKOUTS_HEADER.lower().encode(), str(stats.checkouts).encode()))
+                        headers.append((PEAK_CONNECTIONS_HEADER.lower().encode(), str(stats.peak_connections).encode()))
+                        headers.append((STATEMENTS_HEADER.lower().encode(), str(stats.statements).encode()))
+                        headers.append((DB_TIME_HEADER.lower().encode(), f"{stats.db_time * 1000:.1f}".encode()))
+                    if SERVER_TIMING:
+                        value = server_timing(stats, time.perf_counter() - started)
+                        headers.append((b"server-timing", value.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                add_timing("send", time.perf_counter() - response_started)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            duration = time.perf_counter() - started
+            if stats.statement_times is not None and duration * 1000 >= SLOW_REQUEST_MS:
+                # Off the event loop: it writes a file and may run EXPLAIN
+                await run_in_threadpool(_log_slow_request, stats, scope["method"], scope["path"], status, duration)
+            if stats.peak_connections > 1:
+                print(f"{scope['method']} {scope['path']} held {stats.peak_connections} database connections at once")
+            if stats.fingerprints:
+                for statement, count in stats.fingerprints.most_common():
+                    if count < N_PLUS_ONE_THRESHOLD:
+                        break
+                    print(f"Possible N+1: {scope['method']} {scope['path']} ran {count}x: {statement[:200]}")
@@ -0,0 +1,283 @@
+"""
+Response cache with pluggable storage (see app/utils/cache_backends.py).
+
+Cache(namespace, ttl) keeps byte strings under string keys with a time to live, a
+bounded number of entries and per-namespace statistics (cache_stats(), and
+cache_requests_total on /metrics). get_or_compute() is single-flight: when an entry
+is missing, one caller recomputes it while the others, in this worker and (with the
+shm or redis backend) in other workers, wait for its result instead of running the
+same queries at the same time.
+
+Endpoints opt in with a decorator placed under the route decorator:
+
+    @router.get("/", response_model=List[PackageOut])
+    @cached_endpoint("packages", ttl=300, invalidate_on=("packages",))
+    def list_packages(db: Session = Depends(get_db), skip: int = 0, limit: int = 20):
+
+Entries are keyed on the endpoint plus its resolved path and query parameters
+(defaults applied, dependencies such as db or current_user left out), so
+"?limit=20" and no query string share one entry. A miss serialises the result with
+the route's response_model; hits return the stored JSON as is, with X-Cache: HIT.
+invalidate_on names cache bus entities (app/utils/cache_bus.py) whose writes clear
+the namespace; otherwise entries live for ttl seconds (RESPONSE_CACHE_TTL is the
+usual choice).
+
+With etag=True responses carry a strong ETag (a hash of the body) and a request
+whose If-None-Match matches gets an empty 304; cache_control and surrogate_keys set
+Cache-Control and Surrogate-Key (for purging a CDN by key) on both. Only cache endpoints whose
+response depends on nothing but those parameters (not on the current user) and
+that set no response headers of their own.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, params
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.utils.cache_backends import CacheBackend, make_backend
+from app.utils.cache_bus import register_cache
+from app.utils.metrics import observe_cache
+from app.utils.request_stats import add_timing
+
+CACHE_STATUS_HEADER = "X-Cache"
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+# Default lifetime of cached responses; writes seen by the cache bus clear them sooner
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# Name of the Request parameter cached_endpoint adds to the endpoint signature
+_REQUEST_PARAM = "_cache_request"
+# How often a worker waiting on another worker's recompute looks for the result
+_WAIT_POLL = 0.025
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "coalesced", "errors", "compute_seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.compute_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+            "compute_seconds": round(self.compute_seconds, 3),
+        }
+
+
+_STAT_FIELDS = {"hit": "hits", "miss": "misses", "coalesced": "coalesced"}
+
+_caches: Dict[str, "Cache"] = {}
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Statistics of every cache namespace in this worker."""
+    return {namespace: cache.stats.as_dict() for namespace, cache in _caches.items()}
+
+
+class Cache:
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        maxsize: int = 256,
+        backend=None,
+        lock_timeout: float = 10.0,
+        invalidate_on: Iterable[str] = (),
+    ):
+        """backend: a CacheBackend, or memory / shm / redis (default CACHE_BACKEND)."""
+        self.namespace = namespace
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.backend = backend if isinstance(backend, CacheBackend) else make_backend(namespace, backend, maxsize)
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        # Bumped by clear(), so a recompute that started before it does not store a stale value
+        self._generation = 0
+        _caches[namespace] = self
+        if invalidate_on:
+            register_cache(f"response:{namespace}", self, clear_on=invalidate_on)
+
+    def _count(self, result: str) -> None:
+        field = _STAT_FIELDS[result]
+        setattr(self.stats, field, getattr(self.stats, field) + 1)
+        observe_cache(self.namespace, result)
+
+    def _backend(self, method: str, *args, default=None):
+        """Call the backend; a failing backend counts as a miss rather than failing the request."""
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            self.stats.errors += 1
+            observe_cache(self.namespace, "error")
+            print(f"Cache {self.namespace}: {method} failed: {e}")
+            return default
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._backend("get", key)
+
+    def set(self, key: str, value: bytes) -> None:
+        self._backend("set", key, value, self.ttl)
+
+    def delete(self, key: str) -> None:
+        self._backend("delete", key)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._backend("clear")
+
+    def get_or_compute(self, key: str, compute: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """Return (value, "hit" | "coalesced" | "miss"), calling compute() at most once at a time per key."""
+        value = self.get(key)
+        if value is not None:
+            self._count("hit")
+            return value, "hit"
+
+        with self._lock:
+            done = self._inflight.get(key)
+            leader = done is None
+            if leader:
+                done = self._inflight[key] = threading.Event()
+
+        if not leader:
+            # Another thread of this worker is computing the same entry
+            done.wait(self.lock_timeout)
+            value = self.get(key)
+            if value is not None:
+                self._count("coalesced")
+                return value, "coalesced"
+            return self._compute(key, compute, store=False), "miss"
+
+        try:
+            if not self._backend("acquire", key, self.lock_timeout, default=True):
+                value = self._wait_for_other_worker(key)
+                if value is not None:
+                    self._count("coalesced")
+                    return value, "coalesced"
+            try:
+                return self._compute(key, compute, store=True), "miss"
+            finally:
+                self._backend("release", key)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def _wait_for_other_worker(self, key: str) -> Optional[bytes]:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(_WAIT_POLL)
+            value = self.get(key)
+            if value is not None:
+                return value
+            # The other worker gave up (error) or died: compute here instead
+            if self._backend("acquire", key, self.lock_timeout, default=True):
+                return None
+        return None
+
+    def _compute(self, key: str, compute: Callable[[], bytes], store: bool) -> bytes:
+        generation = self._generation
+        started = time.perf_counter()
+        value = compute()
+        self.stats.compute_seconds += time.perf_counter() - started
+        self._count("miss")
+        if store and generation == self._generation:
+            self.set(key, value)
+        return value
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(response_model) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def _serialize(request: Request, result) -> bytes:
+    """JSON the way FastAPI would send it: validated through the route's response_model."""
+    started = time.perf_counter()
+    response_model = getattr(request.scope.get("route"), "response_model", None)
+    if response_model is not None:
+        adapter = _adapter(response_model)
+        body = adapter.dump_json(adapter.validate_python(result, from_attributes=True), by_alias=True)
+    else:
+        body = json.dumps(jsonable_encoder(result)).encode("utf-8")
+    add_timing("serialize", time.perf_counter() - started)
+    return body
+
+
+def etag_for(body: bytes) -> str:
+    """Strong entity tag: the same bytes always get the same tag, in every worker."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def cached_endpoint(
+    namespace: str,
+    ttl: float,
+    maxsize: int = 256,
+    backend=None,
+    invalidate_on: Iterable[str] = (),
+    etag: bool = False,
+    cache_control: Optional[str] = None,
+    surrogate_keys: Iterable[str] = (),
+):
+    """Cache a (sync) endpoint's JSON response; see the module docstring."""
+    cache = Cache(namespace, ttl, maxsize=maxsize, backend=backend, invalidate_on=invalidate_on)
+    static_headers = {}
+    if cache_control:
+        static_headers["Cache-Control"] = cache_control
+    if surrogate_keys:
+        static_headers[SURROGATE_KEY_HEADER] = " ".join(surrogate_keys)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            raise TypeError(f"cached_endpoint only supports def endpoints, {func.__qualname__} is async")
+        signature = inspect.signature(func)
+        key_params = [
+            name for name, param in signature.parameters.items()
+            if not isinstance(param.default, params.Depends) and param.annotation not in (Request, Response)
+        ]
+        endpoint = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            request = kwargs.pop(_REQUEST_PARAM)
+            key = endpoint + "?" + urlencode(sorted((name, str(kwargs.get(name))) for name in key_params))
+            body, result = cache.get_or_compute(key, lambda: _serialize(request, func(*args, **kwargs)))
+            headers = {**static_headers, CACHE_STATUS_HEADER: "MISS" if result == "miss" else "HIT"}
+            if etag:
+                headers["ETag"] = etag_for(body)
+                if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                    return Response(status_code=304, headers=headers)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
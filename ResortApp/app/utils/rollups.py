@@ -0,0 +1,281 @@
+"""
+Incremental maintenance of the daily_rollups table.
+
+Checkout, FoodOrder and Expense rows are picked up from the ORM unit of work
+(new, changed and deleted objects) and folded into their day's rollup row in the
+same transaction, whichever code path wrote them. Room-night changes are applied
+by app/utils/room_nights.py through add_occupancy(), since the ledger is written
+with bulk statements that bypass the unit of work.
+
+Run `python -m app.utils.rollups` to rebuild the table from the raw data.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, select, delete, func, insert, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models.checkout import Checkout
+from app.models.daily_rollup import DailyRollup
+from app.models.expense import Expense
+from app.models.foodorder import FoodOrder
+from app.models.room_night import RoomNight
+
+ROLLUP_FIELDS = (
+    "room_revenue", "package_revenue", "food_revenue", "service_revenue", "tax", "discount",
+    "grand_total", "checkouts", "food_orders", "food_order_amount", "expenses", "expense_count",
+    "occupied_rooms",
+)
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+# Checkout column -> rollup field
+CHECKOUT_FIELDS = {
+    "room_total": "room_revenue",
+    "package_total": "package_revenue",
+    "food_total": "food_revenue",
+    "service_total": "service_revenue",
+    "tax_amount": "tax",
+    "discount_amount": "discount",
+    "grand_total": "grand_total",
+}
+
+
+def _checkout_delta(values: Dict[str, float], sign: int) -> Dict[str, float]:
+    delta = {field: sign * (values.get(column) or 0) for column, field in CHECKOUT_FIELDS.items()}
+    delta["checkouts"] = sign
+    return delta
+
+
+def _checkout_values(c: Checkout) -> Dict[str, float]:
+    return {column: getattr(c, column) for column in CHECKOUT_FIELDS}
+
+
+def _previous_value(obj, attr):
+    """Value of attr before the pending change (the current value if it is unchanged)."""
+    history = get_history(obj, attr)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def apply_deltas(conn, deltas: Dict[date, Dict[str, float]]) -> None:
+    """
+    Add per-day deltas to daily_rollups with one upsert per day
+    (INSERT .. ON CONFLICT (date) DO UPDATE SET col = col + excluded.col).
+    """
+    deltas = {day: d for day, d in deltas.items() if day is not None and any(d.values())}
+    if not deltas:
+        return
+
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        table = DailyRollup.__table__
+        for day in sorted(deltas):
+            values = {field: deltas[day].get(field, 0) for field in ROLLUP_FIELDS}
+            stmt = dialect_insert(table).values(date=day, **values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.date],
+                set_={field: table.c[field] + stmt.excluded[field] for field in ROLLUP_FIELDS},
+            )
+            conn.execute(stmt)
+        return
+
+    # Other databases: update, and insert when the day has no row yet
+    table = DailyRollup.__table__
+    for day in sorted(deltas):
+        values = {field: deltas[day].get(field, 0) for field in ROLLUP_FIELDS}
+        result = conn.execute(
+            update(table).where(table.c.date == day).values(
+                {table.c[field]: table.c[field] + value for field, value in values.items()}
+            )
+        )
+        if result.rowcount == 0:
+            conn.execute(insert(table).values(date=day, **values))
+
+
+def add_occupancy(db: Session, nights: Iterable[date], sign: int = 1) -> None:
+    """Adjust occupied_rooms by one (or -1) for every room night given."""
+    deltas = defaultdict(lambda: defaultdict(float))
+    for night in nights:
+        deltas[night]["occupied_rooms"] += sign
+    apply_deltas(db.connection(), deltas)
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Make SQLAlchemy load the stored value before an expired attribute is overwritten,
+# so before_flush can subtract what the row contributed until now
+for _attr in [Expense.amount, Expense.date, FoodOrder.amount, Checkout.checkout_date] + [
+    getattr(Checkout, column) for column in CHECKOUT_FIELDS
+]:
+    event.listen(_attr, "set", _keep_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_rollup_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault("rollup_deltas", defaultdict(lambda: defaultdict(float)))
+
+    def add(day, values):
+        for field, value in values.items():
+            deltas[day][field] += value
+
+    now = datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, Checkout):
+            add(_as_date(obj.checkout_date) or now.date(), _checkout_delta(_checkout_values(obj), 1))
+        elif isinstance(obj, FoodOrder):
+            add(_as_date(obj.created_at) or now.date(), {"food_orders": 1, "food_order_amount": obj.amount or 0})
+        elif isinstance(obj, Expense):
+            add(_as_date(obj.date), {"expenses": obj.amount or 0, "expense_count": 1})
+        elif isinstance(obj, RoomNight):
+            add(obj.night, {"occupied_rooms": 1})
+
+    for obj in session.deleted:
+        if isinstance(obj, Checkout):
+            add(_as_date(obj.checkout_date), _checkout_delta(_checkout_values(obj), -1))
+        elif isinstance(obj, FoodOrder):
+            add(_as_date(obj.created_at), {"food_orders": -1, "food_order_amount": -(obj.amount or 0)})
+        elif isinstance(obj, Expense):
+            add(_as_date(obj.date), {"expenses": -(obj.amount or 0), "expense_count": -1})
+        elif isinstance(obj, RoomNight):
+            # Ledger rows removed through a booking's delete-orphan cascade
+            add(obj.night, {"occupied_rooms": -1})
+
+    for obj in session.dirty:
+        if isinstance(obj, FoodOrder):
+            if get_history(obj, "amount").has_changes():
+                old_amount = _previous_value(obj, "amount")
+                add(_as_date(obj.created_at), {"food_order_amount": (obj.amount or 0) - (old_amount or 0)})
+        elif isinstance(obj, Expense):
+            if get_history(obj, "amount").has_changes() or get_history(obj, "date").has_changes():
+                add(_as_date(_previous_value(obj, "date")),
+                    {"expenses": -(_previous_value(obj, "amount") or 0), "expense_count": -1})
+                add(_as_date(obj.date), {"expenses": obj.amount or 0, "expense_count": 1})
+        elif isinstance(obj, Checkout):
+            columns = list(CHECKOUT_FIELDS) + ["checkout_date"]
+            if any(get_history(obj, column).has_changes() for column in columns):
+                previous = {column: _previous_value(obj, column) for column in CHECKOUT_FIELDS}
+                add(_as_date(_previous_value(obj, "checkout_date")), _checkout_delta(previous, -1))
+                add(_as_date(obj.checkout_date), _checkout_delta(_checkout_values(obj), 1))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_rollup_deltas(session, flush_context):
+    deltas = session.info.pop("rollup_deltas", None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_rollup_deltas(session, previous_transaction):
+    # Deltas are only pending between before_flush and after_flush, so whatever is
+    # left belongs to the flush that failed, whether it ran in a savepoint or not.
+    # Deltas already applied in a rolled-back savepoint were undone with it; those
+    # of the outer transaction stay in its connection.
+    session.info.pop("rollup_deltas", None)
+
+
+def refresh_occupancy(db: Session, since: Optional[date] = None) -> None:
+    """
+    Recount occupied_rooms from the ledger (after the ledger is rebuilt), for every day
+    or only for since and later. Does not commit.
+    """
+    table = DailyRollup.__table__
+    if not db.execute(select(table.c.date).limit(1)).first():
+        # Not built yet; ensure_daily_rollups_backfilled() will count occupancy with everything else
+        return
+    reset = update(table).values(occupied_rooms=0)
+    recount = select(RoomNight.night, func.count(RoomNight.id)).group_by(RoomNight.night)
+    if since is not None:
+        reset = reset.where(table.c.date >= since)
+        recount = recount.where(RoomNight.night >= since)
+    db.execute(reset)
+    counts = defaultdict(lambda: defaultdict(float))
+    for night, count in db.execute(recount):
+        counts[night]["occupied_rooms"] = count
+    apply_deltas(db.connection(), counts)
+
+
+def backfill_daily_rollups(db: Session) -> int:
+    """Rebuild daily_rollups from checkouts, food orders, expenses and room nights. Commits."""
+    db.execute(delete(DailyRollup))
+    rows = defaultdict(lambda: defaultdict(float))
+
+    checkout_day = func.date(Checkout.checkout_date)
+    for day, *totals in db.execute(
+        select(
+            checkout_day,
+            *(func.sum(getattr(Checkout, column)) for column in CHECKOUT_FIELDS),
+            func.count(Checkout.id),
+        ).group_by(checkout_day)
+    ):
+        for field, value in zip(list(CHECKOUT_FIELDS.values()) + ["checkouts"], totals):
+            rows[day][field] += value or 0
+
+    order_day = func.date(FoodOrder.created_at)
+    for day, count, amount in db.execute(
+        select(order_day, func.count(FoodOrder.id), func.sum(FoodOrder.amount)).group_by(order_day)
+    ):
+        rows[day]["food_orders"] += count
+        rows[day]["food_order_amount"] += amount or 0
+
+    for day, amount, count in db.execute(
+        select(Expense.date, func.sum(Expense.amount), func.count(Expense.id)).group_by(Expense.date)
+    ):
+        rows[day]["expenses"] += amount or 0
+        rows[day]["expense_count"] += count
+
+    for day, count in db.execute(select(RoomNight.night, func.count(RoomNight.id)).group_by(RoomNight.night)):
+        rows[day]["occupied_rooms"] += count
+
+    # func.date() returns strings on SQLite and dates on PostgreSQL; normalise before merging
+    merged = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+    for day, totals in rows.items():
+        if day is None:
+            continue
+        day = day if isinstance(day, date) else date.fromisoformat(str(day)[:10])
+        for field in ROLLUP_FIELDS:
+            merged[day][field] += totals.get(field, 0)
+    if merged:
+        db.execute(insert(DailyRollup), [{"date": day, **totals} for day, totals in merged.items()])
+    db.commit()
+    return len(merged)
+
+
+def ensure_daily_rollups_backfilled(db: Session) -> None:
+    """Populate an empty rollup table on startup so upgraded databases work without a manual step."""
+    if db.execute(select(func.count()).select_from(DailyRollup)).scalar():
+        return
+    has_data = any(
+        db.execute(select(model.id).limit(1)).first()
+        for model in (Checkout, FoodOrder, Expense, RoomNight)
+    )
+    if has_data:
+        written = backfill_daily_rollups(db)
+        print(f"Daily rollups backfilled for {written} days")
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"Daily rollups rebuilt for {backfill_daily_rollups(session)} days")
+    finally:
+        session.close()
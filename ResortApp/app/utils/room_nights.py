@@ -0,0 +1,191 @@
+"""
+Maintenance helpers for the room_nights occupancy ledger.
+
+Every write path that creates, cancels, extends or checks out a booking calls into
+this module inside its own transaction, so the ledger always mirrors the set of
+active bookings. Nothing here commits; callers commit once when they are done.
+
+Run `python -m app.utils.room_nights` to rebuild the ledger from existing bookings.
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, delete, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking, BookingRoom
+from app.models.Package import PackageBooking, PackageBookingRoom
+from app.models.room_night import RoomNight
+from app.utils.cache import mark_changed
+from app.utils.cache_bus import publish
+from app.utils.rollups import add_occupancy, refresh_occupancy
+
+ACTIVE_BOOKING_STATUSES = ("booked", "checked-in", "checked_in")
+
+# Cache namespace invalidated whenever the ledger or a room changes (see app/utils/availability.py)
+AVAILABILITY_CACHE_NAMESPACE = "room_availability"
+
+
+def nights_between(check_in: date, check_out: date) -> List[date]:
+    """Nights held by a stay: check_in up to, but not including, check_out."""
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def reserve_nights(
+    db: Session,
+    room_ids: Iterable[int],
+    check_in: date,
+    check_out: date,
+    booking_id: Optional[int] = None,
+    package_booking_id: Optional[int] = None,
+) -> None:
+    """
+    Insert ledger rows for every room and night of the stay in one statement.
+
+    The unique (room_id, night) constraint rejects a double booking even if two
+    requests pass the availability check at the same time; that surfaces as the
+    same 400 the availability check gives. Only the insert is undone (it runs in a
+    savepoint); the rest of the caller's transaction is left to the caller.
+    """
+    rows = [
+        {"room_id": room_id, "night": night, "booking_id": booking_id, "package_booking_id": package_booking_id}
+        for room_id in sorted({int(r) for r in room_ids})
+        for night in nights_between(check_in, check_out)
+    ]
+    if not rows:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(RoomNight), rows)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="One or more rooms are not available for the selected dates.")
+    add_occupancy(db, [row["night"] for row in rows])
+    mark_changed(db, AVAILABILITY_CACHE_NAMESPACE)
+    publish(db, "room_nights")
+
+
+def release_nights(
+    db: Session,
+    booking_id: Optional[int] = None,
+    package_booking_id: Optional[int] = None,
+    room_ids: Optional[Iterable[int]] = None,
+    from_night: Optional[date] = None,
+) -> None:
+    """
+    Delete the ledger rows held by a booking or package booking.
+    Optionally limited to some of its rooms and/or to nights on or after from_night
+    (used by checkout, which keeps the nights already stayed as occupancy history).
+    """
+    if booking_id is None and package_booking_id is None:
+        return
+    stmt = delete(RoomNight)
+    if booking_id is not None:
+        stmt = stmt.where(RoomNight.booking_id == booking_id)
+    else:
+        stmt = stmt.where(RoomNight.package_booking_id == package_booking_id)
+    if room_ids is not None:
+        stmt = stmt.where(RoomNight.room_id.in_([int(r) for r in room_ids]))
+    if from_night is not None:
+        stmt = stmt.where(RoomNight.night >= from_night)
+    released = db.execute(stmt.returning(RoomNight.night).execution_options(synchronize_session=False)).scalars().all()
+    add_occupancy(db, released, sign=-1)
+    mark_changed(db, AVAILABILITY_CACHE_NAMESPACE)
+    publish(db, "room_nights")
+
+
+def occupied_room_ids(db: Session, night: Optional[date] = None) -> set:
+    """Ids of all rooms held by an active booking on the given night (default today)."""
+    night = night or date.today()
+    return set(db.execute(select(RoomNight.room_id).where(RoomNight.night == night)).scalars())
+
+
+def backfill_room_nights(db: Session) -> int:
+    """
+    Rebuild the ledger from all active bookings and package bookings.
+
+    Nights from today on are rewritten. Earlier nights are only added where missing:
+    the rows already there are the history of stays that have been checked out
+    since (checkout keeps the nights stayed), which active bookings no longer show,
+    and daily_rollups counts its past occupancy from them.
+
+    Older data can contain overlapping bookings that were accepted before the ledger
+    existed; the earliest booking keeps the night and the clash is logged.
+    Returns the number of ledger rows written. Commits.
+    """
+    today = date.today()
+    db.execute(delete(RoomNight).where(RoomNight.night >= today))
+
+    regular = db.execute(
+        select(BookingRoom.room_id, Booking.id, Booking.check_in, Booking.check_out)
+        .join(Booking, Booking.id == BookingRoom.booking_id)
+        .where(Booking.status.in_(ACTIVE_BOOKING_STATUSES), BookingRoom.room_id.isnot(None))
+        .order_by(Booking.id)
+    ).all()
+    package = db.execute(
+        select(PackageBookingRoom.room_id, PackageBooking.id, PackageBooking.check_in, PackageBooking.check_out)
+        .join(PackageBooking, PackageBooking.id == PackageBookingRoom.package_booking_id)
+        .where(PackageBooking.status.in_(ACTIVE_BOOKING_STATUSES), PackageBookingRoom.room_id.isnot(None))
+        .order_by(PackageBooking.id)
+    ).all()
+
+    taken = {}
+    earliest = min((check_in for _, _, check_in, _ in regular + package), default=today)
+    for room_id, night, booking_id, package_booking_id in db.execute(
+        select(RoomNight.room_id, RoomNight.night, RoomNight.booking_id, RoomNight.package_booking_id)
+        .where(RoomNight.night >= earliest)
+    ):
+        taken[(room_id, night)] = (
+            f"booking {booking_id}" if booking_id is not None else f"package booking {package_booking_id}"
+        )
+
+    rows = []
+    for is_package, stays in ((False, regular), (True, package)):
+        for room_id, owner_id, check_in, check_out in stays:
+            holder = f"{'package booking' if is_package else 'booking'} {owner_id}"
+            for night in nights_between(check_in, check_out):
+                key = (room_id, night)
+                if key in taken:
+                    if taken[key] != holder:
+                        print(f"Room night clash: room {room_id} on {night} held by {taken[key]}, skipping {holder}")
+                    continue
+                taken[key] = holder
+                rows.append({
+                    "room_id": room_id,
+                    "night": night,
+                    "booking_id": None if is_package else owner_id,
+                    "package_booking_id": owner_id if is_package else None,
+                })
+
+    if rows:
+        db.execute(insert(RoomNight), rows)
+    refresh_occupancy(db, since=min([today] + [row["night"] for row in rows]))
+    mark_changed(db, AVAILABILITY_CACHE_NAMESPACE)
+    publish(db, "room_nights")
+    db.commit()
+    return len(rows)
+
+
+def ensure_room_nights_backfilled(db: Session) -> None:
+    """Populate an empty ledger on startup so upgraded databases work without a manual step."""
+    if db.execute(select(func.count(RoomNight.id))).scalar():
+        return
+    has_active = db.execute(
+        select(Booking.id).where(Booking.status.in_(ACTIVE_BOOKING_STATUSES)).limit(1)
+    ).first() or db.execute(
+        select(PackageBooking.id).where(PackageBooking.status.in_(ACTIVE_BOOKING_STATUSES)).limit(1)
+    ).first()
+    if has_active:
+        written = backfill_room_nights(db)
+        print(f"Room night ledger backfilled with {written} rows")
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        print(f"Room night ledger rebuilt with {backfill_room_nights(session)} rows")
+    finally:
+        session.close()
@@ -1,95 +1,97 @@
+"""
+Room status service.
+
+Room status is derived from the room_nights ledger and only recomputed when
+something that affects it happens: a booking is created, cancelled, extended,
+checked in or checked out (for the rooms involved), and once a day for all rooms
+when "tonight" moves on. Read paths never write room status.
+
+    python -m app.utils.room_status    # day-rollover job, see resort-room-status.timer
+"""
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import OperationalError, DisconnectionError
+
 from app.models.room import Room
-from app.models.booking import Booking, BookingRoom
-from datetime import date
-import time
+from app.models.room_night import RoomNight
+from app.utils.cache import mark_changed
+from app.utils.cache_bus import publish
+from app.utils.room_nights import AVAILABILITY_CACHE_NAMESPACE
+
 
-def update_room_statuses(db: Session):
+def recompute_room_statuses(db: Session, room_ids: Optional[Iterable[int]] = None, today: Optional[date] = None) -> int:
     """
-    Update room statuses based on current bookings.
-    Only shows current day status - not future bookings.
-    With improved error handling and retry logic.
+    Recompute the status of the given rooms (all rooms when room_ids is None):
+      - "Maintenance" is set by staff and never overwritten here
+      - "Occupied" if tonight's night is held by an active booking or package booking
+      - "Available" otherwise
+
+    Uses one read and at most two bulk UPDATEs regardless of the number of rooms.
+    Does not commit; returns the number of rooms whose status changed.
     """
-    max_retries = 3
-    retry_delay = 1
-    
-    for attempt in range(max_retries):
-        try:
-            today = date.today()
-            
-            # Use with_for_update(nowait=True) to prevent deadlocks, but fallback if it fails
-            try:
-                rooms = db.query(Room).with_for_update(skip_locked=True).all()
-            except Exception:
-                # Fallback to regular query if row-level locking fails
-                rooms = db.query(Room).all()
-            
-            updated_count = 0
-            for room in rooms:
-                try:
-                    # Check if room has active bookings (currently occupied)
-                    # Normalize status values to handle both formats
-                    active_booking = db.query(BookingRoom).join(Booking).filter(
-                        BookingRoom.room_id == room.id,
-                        Booking.status.in_(['booked', 'checked-in', 'checked_in']),
-                        Booking.check_in <= today,
-                        Booking.check_out > today
-                    ).first()
-                    
-                    new_status = None
-                    if active_booking:
-                        # Room is currently occupied
-                        new_status = "Occupied"
-                    else:
-                        # Check if booking has ended today or before
-                        past_booking = db.query(BookingRoom).join(Booking).filter(
-                            BookingRoom.room_id == room.id,
-                            Booking.status.in_(['booked', 'checked-in', 'checked_in']),
-                            Booking.check_out <= today
-                        ).first()
-                        
-                        # No active booking, make available
-                        new_status = "Available"
-                    
-                    # Only update if status changed to reduce unnecessary commits
-                    if room.status != new_status:
-                        room.status = new_status
-                        updated_count += 1
-                        
-                except Exception as room_error:
-                    # Log individual room errors but continue processing
-                    print(f"Error updating room {room.id}: {room_error}")
-                    continue
-            
-            try:
-                db.commit()
-            except Exception as commit_err:
-                # Roll back any failed commit to avoid pending transaction errors
-                db.rollback()
-                print(f"Commit failed during room status update: {commit_err}")
-                return 0
-            if updated_count > 0:
-                print(f"Updated room statuses for {updated_count} out of {len(rooms)} rooms")
-            return updated_count
-            
-        except (OperationalError, DisconnectionError) as e:
-            db.rollback()
-            if attempt < max_retries - 1:
-                print(f"Database error (attempt {attempt + 1}/{max_retries}): {e}. Retrying...")
-                time.sleep(retry_delay * (attempt + 1))
-                # Try to refresh the session
-                db.expire_all()
-                continue
-            else:
-                print(f"Error updating room statuses after {max_retries} attempts: {e}")
-                # Don't raise - let the endpoint handle gracefully
-                return 0
-        except Exception as e:
-            db.rollback()
-            print(f"Error updating room statuses: {e}")
-            print(f"Error type: {type(e)}")
-            # Don't raise - allow room fetching to continue even if status update fails
+    today = today or date.today()
+    if room_ids is not None:
+        room_ids = sorted({int(r) for r in room_ids if r is not None})
+        if not room_ids:
             return 0
-    
-    return 0
+
+    tonight = select(RoomNight.room_id).where(RoomNight.night == today)
+    if room_ids is not None:
+        tonight = tonight.where(RoomNight.room_id.in_(room_ids))
+    occupied_ids = set(db.execute(tonight).scalars())
+
+    if room_ids is None:
+        room_ids = list(db.execute(select(Room.id)).scalars())
+
+    groups = {
+        "Occupied": [r for r in room_ids if r in occupied_ids],
+        "Available": [r for r in room_ids if r not in occupied_ids],
+    }
+
+    changed = 0
+    for status, ids in groups.items():
+        if not ids:
+            continue
+        updated = (
+            db.query(Room)
+            .filter(
+                Room.id.in_(ids),
+                func.lower(func.coalesce(Room.status, "")) != "maintenance",
+                func.coalesce(Room.status, "") != status,
+            )
+            .update({"status": status}, synchronize_session=False)
+        )
+        if updated:
+            # Bulk UPDATE bypasses the flush hook of the cache bus
+            for room_id in ids:
+                publish(db, "rooms", room_id)
+        changed += updated
+    if changed:
+        mark_changed(db, AVAILABILITY_CACHE_NAMESPACE)
+    return changed
+
+
+def update_room_statuses(db: Session) -> int:
+    """Recompute and commit the status of every room. Used by the day-rollover job and the manual endpoint."""
+    try:
+        changed = recompute_room_statuses(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error updating room statuses: {e}")
+        raise
+    if changed:
+        print(f"Updated room statuses for {changed} rooms")
+    return changed
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        update_room_statuses(session)
+    finally:
+        session.close()
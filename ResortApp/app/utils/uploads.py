@@ -0,0 +1,23 @@
+"""
+Saving uploaded files.
+
+save_upload() streams an UploadFile to disk and charges the time to the request's
+"upload" Server-Timing entry (app/utils/request_stats.py), so slow disk writes show
+up next to database and serialization time.
+"""
+import shutil
+import time
+
+from fastapi import UploadFile
+
+from app.utils.request_stats import add_timing
+
+
+def save_upload(upload: UploadFile, path: str) -> None:
+    """Write the uploaded file to path, replacing any existing file."""
+    started = time.perf_counter()
+    try:
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(upload.file, buffer)
+    finally:
+        add_timing("upload", time.perf_counter() - started)
@@ -0,0 +1,81 @@
+"""
+Pick the bcrypt cost factor (BCRYPT_ROUNDS) for this host.
+
+Times one hash per cost factor, recommends the highest cost whose hash stays under
+the target latency, then replays a login burst through the app's hashing executor
+to show the queueing a shift change would see at that cost.
+
+    cd ResortApp
+    python benchmarks/bcrypt_cost.py --target-ms 250 --burst 40
+
+Existing hashes are upgraded to the new cost as users log in (app/utils/hashing.py).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def time_cost(rounds, samples):
+    salt = bcrypt.gensalt(rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"benchmark-password", salt)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="longest acceptable single hash")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--burst", type=int, default=40, help="concurrent logins to replay through the executor")
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6} {'ms/hash':>10}")
+    recommended = args.min_rounds
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        ms = time_cost(rounds, args.samples)
+        print(f"{rounds:>6} {ms:>10.1f}")
+        if ms <= args.target_ms:
+            recommended = rounds
+        else:
+            break
+    print(f"\nRecommended BCRYPT_ROUNDS={recommended} (target {args.target_ms:.0f} ms per hash)")
+
+    # The executor reads BCRYPT_ROUNDS at import time
+    os.environ["BCRYPT_ROUNDS"] = str(recommended)
+    from app.utils import hashing
+
+    hashed = hashing.hash_password("benchmark-password")
+    latencies = []
+
+    def login(_):
+        start = time.perf_counter()
+        hashing.check_password("benchmark-password", hashed)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.burst) as clients:
+        list(clients.map(login, range(args.burst)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    stats = hashing.hashing_stats()
+    print(f"\nBurst of {args.burst} logins on {stats['workers']} hashing workers (HASH_WORKERS):")
+    print(f"  wall time        {elapsed * 1000:.0f} ms")
+    print(f"  p50 / p95 / max  {latencies[len(latencies) // 2]:.0f} / "
+          f"{latencies[int(len(latencies) * 0.95) - 1]:.0f} / {latencies[-1]:.0f} ms")
+    print(f"  mean queue wait  {stats['wait_seconds_total'] / max(1, stats['completed']) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two load test baselines (benchmarks/load_test.py --output) for CI.
+
+Matches results by (mode, concurrency, scenario) and fails (exit status 1) when the
+new run's p95 latency grew by more than --max-latency-increase percent, or its
+throughput fell by more than --max-throughput-drop percent, or it had errors the
+old one did not. Latency changes smaller than --min-ms are treated as noise.
+
+    cd ResortApp
+    python benchmarks/compare_baselines.py benchmarks/baseline.json new.json
+    python benchmarks/compare_baselines.py old.json new.json --max-latency-increase 10 --metric p99_ms
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        baseline = json.load(f)
+    return baseline, {(r["mode"], r["concurrency"], r["scenario"]): r for r in baseline["results"]}
+
+
+def change(old, new):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+    parser.add_argument("--max-latency-increase", type=float, default=20.0, help="percent")
+    parser.add_argument("--max-throughput-drop", type=float, default=20.0, help="percent")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    old_meta, old = load(args.old)
+    new_meta, new = load(args.new)
+    if old_meta.get("dataset") != new_meta.get("dataset") or old_meta.get("database") != new_meta.get("database"):
+        print("Warning: the baselines were measured on different datasets or databases\n")
+
+    regressions = 0
+    print(f"{'mode':9} {'c':>4} {'scenario':22} {args.metric + ' old/new':>22} {'change':>8} "
+          f"{'req/s old/new':>20} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        latency = change(before[args.metric], after[args.metric])
+        throughput = change(before["throughput_rps"], after["throughput_rps"])
+        problems = []
+        if latency > args.max_latency_increase and after[args.metric] - before[args.metric] >= args.min_ms:
+            problems.append("latency")
+        if -throughput > args.max_throughput_drop:
+            problems.append("throughput")
+        if after["errors"] > before["errors"]:
+            problems.append("errors")
+        regressions += bool(problems)
+        mode, concurrency, scenario = key
+        print(f"{mode:9} {concurrency:>4} {scenario:22} "
+              f"{before[args.metric]:>10.1f}/{after[args.metric]:<11.1f} {latency:>+7.1f}% "
+              f"{before['throughput_rps']:>9.1f}/{after['throughput_rps']:<10.1f} {throughput:>+7.1f}%"
+              + (f"  REGRESSION ({', '.join(problems)})" if problems else ""))
+
+    for key in sorted(old.keys() - new.keys()):
+        print(f"missing from new run: {key}")
+    print(f"\n{regressions} regression(s) against {args.old}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
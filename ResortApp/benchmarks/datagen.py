@@ -0,0 +1,287 @@
+"""
+Synthetic resort data for benchmarks.
+
+Fills an empty database with a resort's worth of history: rooms with back-to-back
+stays over the last YEARS years and the next 60 days (checked out, in house,
+upcoming and some cancelled), package bookings, checkouts with their bills, food
+orders and items, assigned services, expenses and staff, plus an admin login.
+The room_nights ledger and daily_rollups are then rebuilt with the app's own
+backfill functions, so the database looks like one the app wrote itself.
+
+    cd ResortApp
+    python benchmarks/datagen.py --database-url sqlite:////tmp/resort-bench.db
+    python benchmarks/datagen.py --database-url postgresql://.../resort_bench \
+        --rooms 200 --bookings 100000 --food-order-items 500000 --years 3
+
+The same --seed always gives the same data. The admin login is
+admin@example.com / benchmark unless --admin-email / --admin-password say otherwise.
+benchmarks/load_test.py calls generate() itself when it needs a scratch database.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK = 20000
+TAX_RATE = 0.12
+ROOM_TYPES = [("Standard", 2500.0), ("Deluxe", 4000.0), ("Suite", 7500.0), ("Villa", 12000.0)]
+EXPENSE_CATEGORIES = ["Supplies", "Maintenance", "Utilities", "Laundry", "Transport"]
+DEFAULT_ADMIN_EMAIL = "admin@example.com"
+DEFAULT_ADMIN_PASSWORD = "benchmark"
+
+
+def _insert(conn, model, rows):
+    for start in range(0, len(rows), CHUNK):
+        conn.execute(model.__table__.insert(), rows[start:start + CHUNK])
+    return len(rows)
+
+
+def _schedule_stays(rng, rooms, wanted, start, end):
+    """Up to `wanted` non-overlapping (room_id, check_in, check_out) stays spread over all rooms and days."""
+    per_room = -(-wanted // rooms)
+    slot = max(1.0, (end - start).days / per_room)
+    longest = max(1, int(slot * 1.3))
+    longest_gap = max(0, int(slot * 0.5))
+    stays = []
+    for room_id in range(1, rooms + 1):
+        day = start + timedelta(days=rng.randint(0, longest_gap))
+        while True:
+            check_out = day + timedelta(days=rng.randint(1, longest))
+            if check_out > end:
+                break
+            stays.append((room_id, day, check_out))
+            day = check_out + timedelta(days=rng.randint(0, longest_gap))
+    # The calendar is filled a little beyond `wanted`; keep a random subset of it
+    rng.shuffle(stays)
+    return stays[:wanted]
+
+
+def _status(rng, check_in, check_out, today):
+    if check_out <= today:
+        return "cancelled" if rng.random() < 0.05 else "checked_out"
+    if check_in <= today:
+        return "checked-in"
+    return "cancelled" if rng.random() < 0.05 else "booked"
+
+
+def generate(engine, rooms=200, bookings=100_000, food_order_items=500_000, years=3, seed=7,
+             admin_email=DEFAULT_ADMIN_EMAIL, admin_password=DEFAULT_ADMIN_PASSWORD, today=None):
+    """Seed an empty database. Returns the number of rows written per table."""
+    from sqlalchemy import func, select, text
+    from sqlalchemy.orm import Session
+
+    import app.models  # noqa: F401
+    from app.database import Base
+    from app.models.booking import Booking, BookingRoom
+    from app.models.checkout import Checkout
+    from app.models.employee import Employee
+    from app.models.expense import Expense
+    from app.models.food_category import FoodCategory
+    from app.models.food_item import FoodItem
+    from app.models.foodorder import FoodOrder, FoodOrderItem
+    from app.models.Package import Package, PackageBooking, PackageBookingRoom
+    from app.models.room import Room
+    from app.models.service import AssignedService, Service
+    from app.models.user import Role, User
+    from app.utils.hashing import hash_password
+    from app.utils.rollups import backfill_daily_rollups
+    from app.utils.room_nights import backfill_room_nights
+    from app.utils.room_status import update_room_statuses
+
+    rng = random.Random(seed)
+    today = today or date.today()
+    start, end = today - timedelta(days=365 * years), today + timedelta(days=60)
+    counts = {}
+
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(Room)).scalar():
+            raise SystemExit("Database already has rooms; datagen only seeds an empty database")
+
+    with engine.begin() as conn:
+        conn.execute(Role.__table__.insert(), [{"id": 1, "name": "admin", "permissions": '["*"]'}])
+        conn.execute(User.__table__.insert(), [{
+            "id": 1, "name": "Admin", "email": admin_email, "hashed_password": hash_password(admin_password),
+            "is_active": True, "role_id": 1,
+        }])
+
+        room_rows = []
+        for i in range(1, rooms + 1):
+            room_type, price = ROOM_TYPES[(i - 1) % len(ROOM_TYPES)]
+            room_rows.append({"id": i, "number": str(100 * (1 + (i - 1) // 50) + (i - 1) % 50 + 1),
+                              "type": room_type, "price": price, "status": "Available", "adults": 2, "children": 1})
+        counts["rooms"] = _insert(conn, Room, room_rows)
+        prices = {row["id"]: row["price"] for row in room_rows}
+        numbers = {row["id"]: row["number"] for row in room_rows}
+
+        packages = [{"id": i, "title": f"Package {i}", "description": "Stay with meals", "price": 8000.0 + 2000 * i}
+                    for i in range(1, 6)]
+        counts["packages"] = _insert(conn, Package, packages)
+        services = [{"id": i, "name": f"Service {i}", "charges": 150.0 * i} for i in range(1, 11)]
+        counts["services"] = _insert(conn, Service, services)
+        _insert(conn, FoodCategory, [{"id": i, "name": f"Category {i}"} for i in range(1, 6)])
+        food_items = [{"id": i, "name": f"Dish {i}", "description": "", "price": 120 + 15 * i, "available": "true",
+                       "category_id": 1 + i % 5} for i in range(1, 41)]
+        counts["food_items"] = _insert(conn, FoodItem, food_items)
+        employees = 60
+        counts["employees"] = _insert(conn, Employee, [
+            {"id": i, "name": f"Staff {i}", "role": "staff", "salary": 18000.0 + 250 * i,
+             "join_date": start - timedelta(days=i * 7)}
+            for i in range(1, employees + 1)
+        ])
+
+        # One stay per booking; a tenth of the stays are package bookings on top
+        package_count = bookings // 10
+        stays = _schedule_stays(rng, rooms, bookings + package_count, start, end)
+        guests = max(1, bookings // 3)
+        booking_rows, booking_links, package_rows, package_links = [], [], [], []
+        billed_stays = []  # (kind, booking row, room_id) of stays that ran up a bill
+        for n, (room_id, check_in, check_out) in enumerate(stays):
+            guest = rng.randint(1, guests)
+            row = {
+                "status": _status(rng, check_in, check_out, today), "guest_name": f"Guest {guest}",
+                "guest_email": f"guest{guest}@example.com", "guest_mobile": f"9{guest:09d}",
+                "check_in": check_in, "check_out": check_out, "adults": 2, "children": rng.randint(0, 2),
+                "user_id": 1,
+            }
+            if n < package_count:
+                row["id"] = len(package_rows) + 1
+                row["package_id"] = rng.randint(1, len(packages))
+                package_rows.append(row)
+                package_links.append({"package_booking_id": row["id"], "room_id": room_id})
+                kind = "package"
+            else:
+                row["id"] = len(booking_rows) + 1
+                row["total_amount"] = prices[room_id] * (check_out - check_in).days
+                booking_rows.append(row)
+                booking_links.append({"booking_id": row["id"], "room_id": room_id})
+                kind = "booking"
+            if row["status"] in ("checked_out", "checked-in"):
+                billed_stays.append((kind, row, room_id))
+        # Too many stays for the calendar: the rest are cancellations, which hold no nights
+        for _ in range(bookings - len(booking_rows)):
+            check_in = start + timedelta(days=rng.randint(0, (end - start).days - 1))
+            guest = rng.randint(1, guests)
+            booking_rows.append({
+                "id": len(booking_rows) + 1, "status": "cancelled", "guest_name": f"Guest {guest}",
+                "guest_email": f"guest{guest}@example.com", "guest_mobile": f"9{guest:09d}",
+                "check_in": check_in, "check_out": check_in + timedelta(days=1), "adults": 2, "children": 0,
+                "user_id": 1, "total_amount": 0.0,
+            })
+            booking_links.append({"booking_id": booking_rows[-1]["id"], "room_id": rng.randint(1, rooms)})
+        counts["bookings"] = _insert(conn, Booking, booking_rows)
+        _insert(conn, BookingRoom, booking_links)
+        counts["package_bookings"] = _insert(conn, PackageBooking, package_rows)
+        _insert(conn, PackageBookingRoom, package_links)
+
+        # Food orders are placed during stays; about 2.5 items per order
+        food_totals = {}
+        order_rows, item_rows = [], []
+        while billed_stays and len(item_rows) < food_order_items:
+            kind, stay, room_id = billed_stays[rng.randrange(len(billed_stays))]
+            nights = (stay["check_out"] - stay["check_in"]).days
+            created_at = datetime.combine(stay["check_in"], datetime.min.time()) + timedelta(
+                hours=rng.randint(14, 14 + 24 * nights - 18), minutes=rng.randint(0, 59))
+            order_id = len(order_rows) + 1
+            amount = 0
+            for _ in range(min(rng.randint(1, 4), food_order_items - len(item_rows))):
+                item = food_items[rng.randrange(len(food_items))]
+                quantity = rng.randint(1, 3)
+                amount += item["price"] * quantity
+                item_rows.append({"order_id": order_id, "food_item_id": item["id"], "quantity": quantity})
+            order_rows.append({
+                "id": order_id, "room_id": room_id, "amount": float(amount),
+                "assigned_employee_id": rng.randint(1, employees), "status": "completed",
+                "billing_status": "billed" if stay["status"] == "checked_out" else "unbilled",
+                "created_at": min(created_at, datetime.combine(today, datetime.min.time())),
+            })
+            food_totals[(kind, stay["id"])] = food_totals.get((kind, stay["id"]), 0) + amount
+        counts["food_orders"] = _insert(conn, FoodOrder, order_rows)
+        counts["food_order_items"] = _insert(conn, FoodOrderItem, item_rows)
+
+        service_rows = []
+        for _ in range(bookings // 5 if billed_stays else 0):
+            kind, stay, room_id = billed_stays[rng.randrange(len(billed_stays))]
+            service = services[rng.randrange(len(services))]
+            service_rows.append({
+                "service_id": service["id"], "employee_id": rng.randint(1, employees), "room_id": room_id,
+                "assigned_at": datetime.combine(stay["check_in"], datetime.min.time()) + timedelta(hours=15),
+                "status": "completed", "billing_status": "billed" if stay["status"] == "checked_out" else "unbilled",
+            })
+        counts["assigned_services"] = _insert(conn, AssignedService, service_rows)
+
+        package_prices = {row["id"]: row["price"] for row in packages}
+        checkout_rows = []
+        for kind, stay, room_id in billed_stays:
+            if stay["status"] != "checked_out":
+                continue
+            nights = (stay["check_out"] - stay["check_in"]).days
+            room_total = prices[room_id] * nights if kind == "booking" else 0.0
+            package_total = package_prices[stay["package_id"]] if kind == "package" else 0.0
+            food_total = float(food_totals.get((kind, stay["id"]), 0))
+            tax = round((room_total + package_total + food_total) * TAX_RATE, 2)
+            checkout_rows.append({
+                "booking_id": stay["id"] if kind == "booking" else None,
+                "package_booking_id": stay["id"] if kind == "package" else None,
+                "room_total": room_total, "package_total": package_total, "food_total": food_total,
+                "service_total": 0.0, "tax_amount": tax, "discount_amount": 0.0,
+                "grand_total": room_total + package_total + food_total + tax,
+                "guest_name": stay["guest_name"], "room_number": numbers[room_id],
+                "checkout_date": datetime.combine(stay["check_out"], datetime.min.time()) + timedelta(hours=11),
+                "payment_method": rng.choice(["Cash", "Card", "UPI"]), "payment_status": "Paid",
+            })
+        counts["checkouts"] = _insert(conn, Checkout, checkout_rows)
+
+        counts["expenses"] = _insert(conn, Expense, [
+            {"category": rng.choice(EXPENSE_CATEGORIES), "amount": float(rng.randint(200, 20000)),
+             "date": start + timedelta(days=d), "description": f"Expense {d}-{k}",
+             "employee_id": rng.randint(1, employees)}
+            for d in range((today - start).days) for k in range(3)
+        ])
+
+        if conn.dialect.name == "postgresql":
+            # Rows above were written with explicit ids; move the sequences past them
+            for model in (Role, User, Room, Package, Service, FoodCategory, FoodItem, Employee, Booking,
+                          PackageBooking, FoodOrder):
+                table = model.__tablename__
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+                ))
+
+    with Session(engine) as db:
+        counts["room_nights"] = backfill_room_nights(db)
+        backfill_daily_rollups(db)
+        update_room_statuses(db)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="empty database to fill")
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--food-order-items", type=int, default=500_000)
+    parser.add_argument("--years", type=int, default=3, help="years of history before today")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--admin-email", default=DEFAULT_ADMIN_EMAIL)
+    parser.add_argument("--admin-password", default=DEFAULT_ADMIN_PASSWORD)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app.database import engine
+
+    started = time.perf_counter()
+    counts = generate(engine, rooms=args.rooms, bookings=args.bookings, food_order_items=args.food_order_items,
+                      years=args.years, seed=args.seed, admin_email=args.admin_email,
+                      admin_password=args.admin_password)
+    for table, count in counts.items():
+        print(f"{table:20} {count:>10}")
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
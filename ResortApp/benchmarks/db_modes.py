@@ -0,0 +1,121 @@
+"""
+Compare the sync and async (USE_ASYNC_DB=true) request paths on the hot read endpoints.
+
+Starts the app once per mode with uvicorn against the configured DATABASE_URL, logs in,
+and fires concurrent GETs at the rooms, bookings, food orders and dashboard endpoints,
+then prints throughput and latency percentiles side by side.
+
+    cd ResortApp
+    python benchmarks/db_modes.py --email admin@example.com --password secret \
+        --concurrency 50 --requests 2000
+
+Set DASHBOARD_CACHE_TTL=0 in the environment to measure the dashboard queries rather
+than the shared cache.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = [
+    "/api/rooms/?limit=50",
+    "/api/bookings?limit=20",
+    "/api/food-orders/?limit=20",
+    "/api/dashboard/kpis",
+    "/api/dashboard/summary?period=month",
+]
+
+
+def _request(url, token=None, data=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    req = urllib.request.Request(url, data=json.dumps(data).encode() if data else None, headers=headers)
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return resp.status, resp.read()
+
+
+def _wait_until_up(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _request(f"{base_url}/health")
+            return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def run_mode(use_async, args):
+    env = dict(os.environ, USE_ASYNC_DB="true" if use_async else "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_until_up(base_url)
+        _, body = _request(f"{base_url}/api/auth/login", data={"email": args.email, "password": args.password})
+        token = json.loads(body)["access_token"]
+
+        def timed(i):
+            start = time.perf_counter()
+            try:
+                status, _ = _request(base_url + ENDPOINTS[i % len(ENDPOINTS)], token)
+            except Exception:
+                status = 0
+            return ENDPOINTS[i % len(ENDPOINTS)], status, (time.perf_counter() - start) * 1000
+
+        # Warm up the pools before measuring
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(timed, range(len(ENDPOINTS) * 2)))
+            started = time.perf_counter()
+            results = list(pool.map(timed, range(args.requests)))
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    summary = {"rps": len(results) / elapsed, "errors": sum(1 for _, status, _ in results if status != 200)}
+    for endpoint in ENDPOINTS + ["all"]:
+        latencies = sorted(ms for e, _, ms in results if endpoint in ("all", e))
+        if latencies:
+            summary[endpoint] = {
+                "p50": statistics.median(latencies),
+                "p95": latencies[int(len(latencies) * 0.95) - 1],
+                "max": latencies[-1],
+            }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {"sync": run_mode(False, args), "async": run_mode(True, args)}
+
+    print(f"{'':44} {'sync':>22} {'async':>22}")
+    print(f"{'requests/s':44} {results['sync']['rps']:>22.1f} {results['async']['rps']:>22.1f}")
+    print(f"{'errors':44} {results['sync']['errors']:>22} {results['async']['errors']:>22}")
+    for endpoint in ENDPOINTS + ["all"]:
+        cells = []
+        for mode in ("sync", "async"):
+            stats = results[mode].get(endpoint)
+            cells.append(f"{stats['p50']:.1f}/{stats['p95']:.1f} ms" if stats else "-")
+        print(f"{endpoint + ' p50/p95':44} {cells[0]:>22} {cells[1]:>22}")
+
+
+if __name__ == "__main__":
+    main()
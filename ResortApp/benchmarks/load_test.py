@@ -0,0 +1,293 @@
+"""
+API load test with a JSON baseline.
+
+Drives the main endpoints at several concurrency levels and records p50/p95/p99
+latency, throughput and errors per endpoint:
+
+    booking_create          POST /api/bookings (a free room and dates far in the future)
+    bookings_list           GET  /api/bookings?limit=20
+    rooms                   GET  /api/rooms/?limit=50
+    dashboard_kpis          GET  /api/dashboard/kpis
+    checkout_bill           GET  /api/bill/{room_number} of an in-house room
+    report_food_orders      GET  /api/reports/food-orders?limit=20
+    report_daily_revenue    GET  /api/reports/daily-revenue?group_by=month
+
+Two modes: "inprocess" calls the ASGI app directly (no network, one process), and
+"http" starts uvicorn with --workers and goes through real sockets, or uses
+--base-url when a server is already running. Without --database-url a scratch
+SQLite database is seeded with benchmarks/datagen.py first (the defaults give a
+200 room resort with 100k bookings and 500k food order items; that takes a while).
+SQLite allows one writer at a time, so booking_create fails with "database is
+locked" once requests overlap; measure writes under concurrency on PostgreSQL.
+
+    cd ResortApp
+    python benchmarks/load_test.py --output benchmarks/baseline.json
+    python benchmarks/load_test.py --bookings 5000 --food-order-items 20000 --requests 100 \
+        --concurrency 1,10 --output /tmp/quick.json
+    python benchmarks/load_test.py --database-url postgresql://.../resort_bench --modes http --workers 4 \
+        --output new.json
+
+Compare two runs with benchmarks/compare_baselines.py (exit status 1 on regression).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+import datagen  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="seeded database to test against (default: scratch SQLite, seeded)")
+    parser.add_argument("--rooms", type=int, default=200, help="datagen size when seeding a scratch database")
+    parser.add_argument("--bookings", type=int, default=100_000)
+    parser.add_argument("--food-order-items", type=int, default=500_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--modes", default="inprocess,http", help="comma separated: inprocess, http")
+    parser.add_argument("--base-url", help="running server for http mode (default: start uvicorn)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers in http mode")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--concurrency", default="1,10,50", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per endpoint and level")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per endpoint and level")
+    parser.add_argument("--scenarios", help="comma separated subset of the endpoints above")
+    parser.add_argument("--email", default=datagen.DEFAULT_ADMIN_EMAIL)
+    parser.add_argument("--password", default=datagen.DEFAULT_ADMIN_PASSWORD)
+    parser.add_argument("--output", help="write the results as a JSON baseline")
+    return parser.parse_args()
+
+
+class Fixtures:
+    """Ids the scenarios need, read from the API once per mode."""
+
+    def __init__(self, room_ids, bill_rooms):
+        self.room_ids = room_ids
+        self.bill_rooms = bill_rooms
+        # New bookings take consecutive two-night slots per room far in the future, from a
+        # random start so repeated runs against one database do not collide
+        self.booking_start = date.today() + timedelta(days=365 * 5 + random.SystemRandom().randint(0, 365 * 50))
+        self.booking_counter = itertools.count()
+
+
+def booking_create(fixtures, i):
+    n = next(fixtures.booking_counter)
+    room_id = fixtures.room_ids[n % len(fixtures.room_ids)]
+    check_in = fixtures.booking_start + timedelta(days=3 * (n // len(fixtures.room_ids)))
+    return "POST", "/api/bookings", {
+        "room_ids": [room_id], "guest_name": f"Load Test {n}", "guest_mobile": f"8{n:09d}",
+        "guest_email": f"loadtest{n}@example.com", "check_in": str(check_in),
+        "check_out": str(check_in + timedelta(days=2)), "adults": 2, "children": 0,
+    }
+
+
+SCENARIOS = {
+    "booking_create": booking_create,
+    "bookings_list": lambda f, i: ("GET", "/api/bookings?limit=20", None),
+    "rooms": lambda f, i: ("GET", "/api/rooms/?limit=50", None),
+    "dashboard_kpis": lambda f, i: ("GET", "/api/dashboard/kpis", None),
+    "checkout_bill": lambda f, i: ("GET", f"/api/bill/{f.bill_rooms[i % len(f.bill_rooms)]}", None),
+    "report_food_orders": lambda f, i: ("GET", "/api/reports/food-orders?limit=20", None),
+    "report_daily_revenue": lambda f, i: ("GET", "/api/reports/daily-revenue?group_by=month", None),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def login(client, args):
+    response = await client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def load_fixtures(client, headers):
+    rooms = (await client.get("/api/rooms/?limit=1000", headers=headers)).json()
+    active = (await client.get("/api/bill/active-rooms?limit=1000", headers=headers)).json()
+    bill_rooms = [entry["room_number"] for entry in active if entry.get("checkout_mode") == "single"]
+    if not rooms or not bill_rooms:
+        raise SystemExit("The database needs rooms and checked-in bookings; seed it with benchmarks/datagen.py")
+    return Fixtures([room["id"] for room in rooms], bill_rooms)
+
+
+async def run_level(client, headers, fixtures, build, concurrency, requests):
+    latencies, errors = [], Counter()
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            method, path, body = build(fixtures, i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                if response.status_code >= 400:
+                    errors[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": sum(errors.values()),
+        "errors_by_status": dict(errors),
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def run_mode(mode, client, args, scenarios, levels):
+    headers = await login(client, args)
+    fixtures = await load_fixtures(client, headers)
+    results = []
+    for concurrency in levels:
+        for name in scenarios:
+            build = SCENARIOS[name]
+            if args.warmup:
+                await run_level(client, headers, fixtures, build, min(concurrency, args.warmup), args.warmup)
+            stats = await run_level(client, headers, fixtures, build, concurrency, args.requests)
+            results.append({"mode": mode, "concurrency": concurrency, "scenario": name, **stats})
+            print(f"{mode:9} c={concurrency:<4} {name:22} {stats['throughput_rps']:>9.1f} req/s  "
+                  f"p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms  "
+                  f"errors {stats['errors']} {stats['errors_by_status'] or ''}")
+    return results
+
+
+async def run_inprocess(args, scenarios, levels):
+    from main import app
+
+    limits = httpx.Limits(max_connections=max(levels))
+    # Unhandled errors come back as 500s, like they would through a server
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits, timeout=120) as client:
+        return await run_mode("inprocess", client, args, scenarios, levels)
+
+
+def _wait_until_up(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def run_http(args, scenarios, levels):
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR, "--port", str(args.port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            env=dict(os.environ),
+        )
+    try:
+        _wait_until_up(base_url)
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            return await run_mode("http", client, args, scenarios, levels)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    args = parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    scenarios = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    workdir = tempfile.mkdtemp(prefix="resort-load-")
+    os.environ.setdefault("SECRET_KEY", "load-test")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("CACHE_DIR", os.path.join(workdir, "cache"))
+    dataset = None
+    if not args.database_url:
+        args.database_url = "sqlite:///" + os.path.join(workdir, "load.db")
+        os.environ["DATABASE_URL"] = args.database_url
+        from app.database import engine
+
+        print(f"Seeding {args.bookings} bookings into {args.database_url} ...")
+        dataset = datagen.generate(engine, rooms=args.rooms, bookings=args.bookings,
+                                   food_order_items=args.food_order_items, years=args.years,
+                                   admin_email=args.email, admin_password=args.password)
+    os.environ["DATABASE_URL"] = args.database_url
+    # main.py mounts these relative to the working directory (uvicorn inherits it)
+    os.chdir(workdir)
+    os.makedirs("uploads", exist_ok=True)
+    os.makedirs("static", exist_ok=True)
+
+    results = []
+    for mode in args.modes.split(","):
+        if mode == "inprocess":
+            results += asyncio.run(run_inprocess(args, scenarios, levels))
+        elif mode == "http":
+            results += asyncio.run(run_http(args, scenarios, levels))
+        else:
+            raise SystemExit(f"Unknown mode {mode!r}")
+
+    if args.output:
+        baseline = {
+            "version": 1,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": args.database_url.split(":", 1)[0],
+            "dataset": dataset,
+            "settings": {"requests": args.requests, "warmup": args.warmup, "workers": args.workers},
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Query budget check for the list and report endpoints.
+
+Seeds a scratch SQLite database, calls each endpoint below through the app with a
+page of 20 rows and fails (exit status 1) when it runs more SQL statements than its
+budget, or the same statement more than MAX_REPEATS times, which is what an N+1
+query looks like: one statement per row of the page.
+
+    cd ResortApp
+    python benchmarks/query_budgets.py            # check
+    python benchmarks/query_budgets.py --verbose  # print the statements of every endpoint
+
+Each endpoint is called once to warm the principal cache (app/utils/auth.py) and
+then measured. Budgets do not depend on the page size; raise one only together with
+the change that needs it. See app/utils/query_budget.py for query_budget() and fingerprints.
+tests/test_query_budgets.py runs the same BUDGETS under pytest.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MAX_REPEATS = 2
+
+# (endpoint, statement budget)
+BUDGETS = [
+    ("/api/rooms/?limit=20", 3),
+    ("/api/bookings?limit=20", 4),
+    ("/api/food-orders/?limit=20", 4),
+    ("/api/expenses/?limit=20", 2),
+    ("/api/reports/food-orders?limit=20", 4),
+    ("/api/reports/room-bookings?limit=20", 3),
+    ("/api/reports/package-bookings?limit=20", 5),
+    ("/api/reports/service-charges?limit=20", 2),
+    ("/api/reports/expenses?limit=20", 2),
+    ("/api/reports/user-history?user_id=1", 8),
+    ("/api/dashboard/kpis", 2),
+    ("/api/dashboard/charts", 7),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200, help="bookings to seed (other tables scale with it)")
+    parser.add_argument("--verbose", action="store_true", help="print the statement fingerprints of every endpoint")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Imported by the tests, the environment comes from tests/conftest.py instead
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="resort-budgets-")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "budgets.db")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+    # Measure the queries, not the dashboard cache
+    os.environ["DASHBOARD_CACHE_TTL"] = "0"
+    os.environ.setdefault("SECRET_KEY", "query-budget-check")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    # main.py mounts these relative to the working directory
+    os.chdir(workdir)
+    os.makedirs("uploads", exist_ok=True)
+    os.makedirs("static", exist_ok=True)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models.booking import Booking, BookingRoom  # noqa: E402
+from app.models.employee import Employee  # noqa: E402
+from app.models.expense import Expense  # noqa: E402
+from app.models.food_item import FoodItem  # noqa: E402
+from app.models.foodorder import FoodOrder, FoodOrderItem  # noqa: E402
+from app.models.Package import Package, PackageBooking, PackageBookingRoom  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.service import AssignedService, Service  # noqa: E402
+from app.utils.query_budget import QueryBudgetExceeded, query_budget  # noqa: E402
+from main import app  # noqa: E402
+
+TODAY = date.today()
+
+
+def seed(conn, bookings):
+    """Rows spread over enough rooms, guests and employees that a page of 20 touches 20 different ones."""
+    rng = random.Random(7)
+    rooms = max(40, bookings // 5)
+    employees = 30
+
+    conn.execute(insert(Room), [
+        {"id": i, "number": str(100 + i), "type": "Deluxe", "price": 3000.0, "status": "Available"}
+        for i in range(1, rooms + 1)
+    ])
+    conn.execute(insert(Package), [{"id": 1, "title": "Weekend", "description": "", "price": 9000.0}])
+    conn.execute(insert(Service), [{"id": 1, "name": "Laundry", "charges": 200.0}])
+    conn.execute(insert(FoodItem), [{"id": 1, "name": "Thali", "price": 250.0}])
+    conn.execute(insert(Employee), [
+        {"id": i, "name": f"Staff {i}", "role": "staff", "salary": 20000.0, "join_date": TODAY - timedelta(days=i)}
+        for i in range(1, employees + 1)
+    ])
+
+    booking_rows, link_rows, package_rows, package_links = [], [], [], []
+    for i in range(1, bookings + 1):
+        check_in = TODAY + timedelta(days=rng.randint(-30, 30))
+        room_id = (i - 1) % rooms + 1
+        booking_rows.append({
+            "id": i, "status": rng.choice(["booked", "checked-in"]), "guest_name": f"Guest {i}",
+            "guest_email": f"guest{i}@example.com", "guest_mobile": f"9{i:09d}", "user_id": 1,
+            "check_in": check_in, "check_out": check_in + timedelta(days=2), "total_amount": 6000.0,
+        })
+        link_rows.append({"booking_id": i, "room_id": room_id})
+        if i % 4 == 0:
+            package_rows.append({
+                "id": i, "package_id": 1, "status": "booked", "guest_name": f"Guest {i}", "user_id": 1,
+                "guest_email": f"guest{i}@example.com", "guest_mobile": f"9{i:09d}",
+                "check_in": check_in, "check_out": check_in + timedelta(days=2),
+            })
+            package_links.append({"package_booking_id": i, "room_id": room_id})
+    conn.execute(insert(Booking), booking_rows)
+    conn.execute(insert(BookingRoom), link_rows)
+    conn.execute(insert(PackageBooking), package_rows)
+    conn.execute(insert(PackageBookingRoom), package_links)
+
+    now = datetime.utcnow()
+    conn.execute(insert(FoodOrder), [
+        {"id": i, "room_id": (i - 1) % rooms + 1, "amount": 500.0, "assigned_employee_id": (i - 1) % employees + 1,
+         "status": "active", "billing_status": "unbilled", "created_at": now - timedelta(minutes=i)}
+        for i in range(1, bookings + 1)
+    ])
+    conn.execute(insert(FoodOrderItem), [
+        {"order_id": i, "food_item_id": 1, "quantity": 2} for i in range(1, bookings + 1)
+    ])
+    conn.execute(insert(AssignedService), [
+        {"service_id": 1, "employee_id": (i - 1) % employees + 1, "room_id": (i - 1) % rooms + 1,
+         "status": "pending", "billing_status": "unbilled", "assigned_at": now - timedelta(minutes=i)}
+        for i in range(1, bookings + 1)
+    ])
+    conn.execute(insert(Expense), [
+        {"category": "Supplies", "description": f"Expense {i}", "amount": 100.0,
+         "date": TODAY - timedelta(days=i % 30), "employee_id": (i - 1) % employees + 1}
+        for i in range(1, bookings + 1)
+    ])
+
+
+def main(args):
+    client = TestClient(app)
+    client.post("/api/users/setup-admin", json={"name": "Admin", "email": "admin@example.com", "password": "budget"})
+    token = client.post("/api/auth/login", json={"email": "admin@example.com", "password": "budget"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with engine.begin() as conn:
+        seed(conn, args.rows)
+
+    failures = 0
+    for endpoint, budget in BUDGETS:
+        # First call warms the principal cache and any per-process state
+        client.get(endpoint, headers=headers)
+        try:
+            with query_budget(budget, max_repeats=MAX_REPEATS) as log:
+                response = client.get(endpoint, headers=headers)
+            status = "ok" if response.status_code == 200 else f"HTTP {response.status_code}"
+            failures += response.status_code != 200
+            detail = log.report() if args.verbose else ""
+        except QueryBudgetExceeded as e:
+            status, detail = "FAIL", str(e)
+            failures += 1
+        print(f"{status:8} {endpoint:44} budget {budget}")
+        if detail:
+            print("         " + detail.replace("\n", "\n         "))
+
+    print(f"\n{len(BUDGETS) - failures}/{len(BUDGETS)} endpoints within their query budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(args))
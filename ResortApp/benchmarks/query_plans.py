@@ -0,0 +1,256 @@
+"""
+Query-plan regression check for the hot filter and join paths.
+
+Runs EXPLAIN on the queries the booking, billing, dashboard and HR endpoints issue
+and fails (exit status 1) when any of them reads its table with a sequential scan
+instead of one of the indexes from alembic/versions.
+
+    cd ResortApp
+    python benchmarks/query_plans.py                      # scratch SQLite database, seeded
+    python benchmarks/query_plans.py --database-url postgresql://.../resort_scratch --seed
+
+Without --database-url a temporary SQLite database is created from the models and
+seeded. Against PostgreSQL, point it at a scratch database (run `alembic upgrade head`
+first on an existing one); --seed only writes into an empty database. The check sets
+enable_seqscan = off, so a sequential scan in the plan means no usable index exists,
+whatever the table size. tests/test_query_plans.py runs the same QUERIES on SQLite.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="database to check (default: a temporary SQLite file)")
+    parser.add_argument("--seed", action="store_true", help="seed an empty database before checking")
+    parser.add_argument("--rows", type=int, default=5000, help="bookings to seed (other tables scale with it)")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Imported by the tests, the environment comes from tests/conftest.py instead
+    args = parse_args()
+    if not args.database_url:
+        args.database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="resort-plans-"), "plans.db")
+        args.seed = True
+    os.environ["DATABASE_URL"] = args.database_url
+
+from sqlalchemy import func, insert, select, text  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.database import Base, engine  # noqa: E402
+from app.models.booking import Booking, BookingRoom  # noqa: E402
+from app.models.checkout import Checkout  # noqa: E402
+from app.models.employee import Attendance, Employee, Leave, WorkingLog  # noqa: E402
+from app.models.foodorder import FoodOrder, FoodOrderItem  # noqa: E402
+from app.models.Package import Package, PackageBooking, PackageBookingRoom  # noqa: E402
+from app.models.room import Room  # noqa: E402
+from app.models.room_night import RoomNight  # noqa: E402
+from app.models.service import AssignedService, Service  # noqa: E402
+
+TODAY = date(2026, 1, 15)
+ACTIVE = ["booked", "checked-in", "checked_in"]
+
+# (name, table that must be read through an index, statement)
+QUERIES = [
+    ("rooms of a booking", "booking_rooms",
+     select(BookingRoom.room_id).where(BookingRoom.booking_id == 42)),
+    ("bookings holding a room", "booking_rooms",
+     select(BookingRoom.booking_id).where(BookingRoom.room_id == 7)),
+    ("package bookings holding a room", "package_booking_rooms",
+     select(PackageBookingRoom.package_booking_id).where(PackageBookingRoom.room_id == 7)),
+    ("rooms of a package booking", "package_booking_rooms",
+     select(PackageBookingRoom.room_id).where(PackageBookingRoom.package_booking_id == 42)),
+    ("active bookings on a date", "bookings",
+     select(Booking.id).where(Booking.status.in_(ACTIVE), Booking.check_in <= TODAY, Booking.check_out > TODAY)),
+    ("active package bookings on a date", "package_bookings",
+     select(PackageBooking.id).where(
+         PackageBooking.status.in_(ACTIVE), PackageBooking.check_in <= TODAY, PackageBooking.check_out > TODAY)),
+    ("rooms held tonight", "room_nights",
+     select(RoomNight.room_id, RoomNight.package_booking_id).where(RoomNight.night == TODAY)),
+    ("bookings by guest contact", "bookings",
+     select(Booking.id).where(Booking.guest_email == "guest42@example.com", Booking.guest_mobile == "9000000042")),
+    ("unbilled food orders of a room", "food_orders",
+     select(func.sum(FoodOrder.amount)).where(FoodOrder.room_id == 7, FoodOrder.billing_status == "unbilled")),
+    ("items of a food order", "food_order_items",
+     select(FoodOrderItem.food_item_id).where(FoodOrderItem.order_id == 42)),
+    ("unbilled services of a room", "assigned_services",
+     select(AssignedService.id).where(AssignedService.room_id == 7, AssignedService.billing_status == "unbilled")),
+    ("checkouts in a date range", "checkouts",
+     select(Checkout.id).where(
+         Checkout.checkout_date >= datetime.combine(TODAY - timedelta(days=7), datetime.min.time()),
+         Checkout.checkout_date < datetime.combine(TODAY, datetime.min.time()))),
+    ("checkouts of a room today", "checkouts",
+     select(Checkout.id).where(func.date(Checkout.checkout_date) == TODAY)),
+    ("rooms under maintenance", "rooms",
+     select(Room.id).where(func.lower(Room.status) == "maintenance")),
+    ("room nights of a room", "room_nights",
+     select(RoomNight.night).where(RoomNight.room_id == 7, RoomNight.night >= TODAY)),
+    ("working logs of an employee", "working_logs",
+     select(WorkingLog.id).where(WorkingLog.employee_id == 3, WorkingLog.date >= TODAY - timedelta(days=30))),
+    ("attendance of an employee", "attendances",
+     select(Attendance.id).where(Attendance.employee_id == 3)),
+    ("approved leaves of an employee", "leaves",
+     select(Leave.id).where(Leave.employee_id == 3, Leave.status == "approved")),
+]
+
+
+def seed(conn, bookings):
+    """Bulk-insert a resort's worth of rows (ids are explicit; the database must be empty)."""
+    rng = random.Random(7)
+    rooms = max(20, bookings // 25)
+    employees = 50
+    statuses = ["booked", "checked-in", "checked_out", "cancelled"]
+
+    conn.execute(insert(Room), [
+        {"id": i, "number": str(100 + i), "type": "Deluxe", "price": 3000.0,
+         "status": rng.choice(["Available", "Booked", "Maintenance"])}
+        for i in range(1, rooms + 1)
+    ])
+    conn.execute(insert(Package), [{"id": 1, "title": "Weekend", "price": 9000.0}])
+    conn.execute(insert(Service), [{"id": 1, "name": "Laundry", "charges": 200.0}])
+    conn.execute(insert(Employee), [{"id": i, "name": f"Staff {i}", "role": "staff", "salary": 20000.0}
+                                    for i in range(1, employees + 1)])
+
+    booking_rows, link_rows, package_rows, package_links, night_rows = [], [], [], [], []
+    for i in range(1, bookings + 1):
+        check_in = TODAY + timedelta(days=rng.randint(-400, 60))
+        check_out = check_in + timedelta(days=rng.randint(1, 5))
+        room_id = rng.randint(1, rooms)
+        status = rng.choice(statuses)
+        booking_rows.append({
+            "id": i, "status": status, "guest_name": f"Guest {i}", "guest_email": f"guest{i}@example.com",
+            "guest_mobile": f"9{i:09d}", "check_in": check_in, "check_out": check_out, "total_amount": 3000.0,
+        })
+        link_rows.append({"id": i, "booking_id": i, "room_id": room_id})
+        if i % 5 == 0:
+            package_rows.append({
+                "id": i, "package_id": 1, "status": status, "guest_name": f"Guest {i}",
+                "guest_email": f"guest{i}@example.com", "guest_mobile": f"9{i:09d}",
+                "check_in": check_in, "check_out": check_out,
+            })
+            package_links.append({"id": i, "package_booking_id": i, "room_id": room_id})
+        if status in ACTIVE:
+            night_rows.extend(
+                {"booking_id": i, "room_id": room_id, "night": check_in + timedelta(days=n)}
+                for n in range((check_out - check_in).days)
+            )
+    conn.execute(insert(Booking), booking_rows)
+    conn.execute(insert(BookingRoom), link_rows)
+    conn.execute(insert(PackageBooking), package_rows)
+    conn.execute(insert(PackageBookingRoom), package_links)
+
+    # The ledger only holds one booking per room night
+    seen, unique_nights = set(), []
+    for row in night_rows:
+        if (row["room_id"], row["night"]) not in seen:
+            seen.add((row["room_id"], row["night"]))
+            unique_nights.append(row)
+    if unique_nights:
+        conn.execute(insert(RoomNight), unique_nights)
+
+    conn.execute(insert(FoodOrder), [
+        {"id": i, "room_id": rng.randint(1, rooms), "amount": 450.0, "assigned_employee_id": rng.randint(1, employees),
+         "billing_status": rng.choice(["billed", "billed", "unbilled"]),
+         "created_at": datetime.combine(TODAY, datetime.min.time()) - timedelta(hours=rng.randint(0, 9000))}
+        for i in range(1, bookings * 2 + 1)
+    ])
+    conn.execute(insert(FoodOrderItem), [
+        {"order_id": i, "food_item_id": 1, "quantity": 2} for i in range(1, bookings * 2 + 1)
+    ])
+    conn.execute(insert(AssignedService), [
+        {"service_id": 1, "employee_id": rng.randint(1, employees), "room_id": rng.randint(1, rooms),
+         "status": "completed", "billing_status": rng.choice(["billed", "unbilled"])}
+        for _ in range(bookings)
+    ])
+    conn.execute(insert(Checkout), [
+        {"booking_id": row["id"], "room_number": str(100 + link["room_id"]), "grand_total": 3540.0,
+         "checkout_date": datetime.combine(row["check_out"], datetime.min.time()), "payment_status": "Paid"}
+        for row, link in zip(booking_rows, link_rows) if row["status"] == "checked_out"
+    ])
+
+    days = 365
+    conn.execute(insert(WorkingLog), [
+        {"employee_id": e, "date": TODAY - timedelta(days=d), "location": "Office"}
+        for e in range(1, employees + 1) for d in range(days)
+    ])
+    conn.execute(insert(Attendance), [
+        {"employee_id": e, "date": TODAY - timedelta(days=d), "status": "Present"}
+        for e in range(1, employees + 1) for d in range(days)
+    ])
+    conn.execute(insert(Leave), [
+        {"employee_id": rng.randint(1, employees), "from_date": TODAY - timedelta(days=d), "to_date": TODAY - timedelta(days=d),
+         "reason": "Personal", "status": rng.choice(["pending", "approved", "rejected"])}
+        for d in range(bookings // 5)
+    ])
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _pg_seq_scans(plan, table):
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        found.append(f"Seq Scan on {table}")
+    for child in plan.get("Plans", []):
+        found.extend(_pg_seq_scans(child, table))
+    return found
+
+
+def explain(conn, statement, table):
+    """Return (plan text, list of sequential scans on table)."""
+    sql = _sql(statement)
+    if engine.dialect.name == "postgresql":
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]["Plan"]
+        return json.dumps(root, indent=2), _pg_seq_scans(root, table)
+
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    details = [row[-1] for row in rows]
+    # "SCAN t" reads the whole table; "SEARCH t USING INDEX ..." is an index range lookup
+    scans = [d for d in details if re.match(rf"SCAN {table}\b", d) and "USING" not in d]
+    return "\n".join(details), scans
+
+
+def main(args):
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        if args.seed:
+            if conn.execute(select(func.count()).select_from(Room)).scalar():
+                print("Database already has data; not seeding")
+            else:
+                print(f"Seeding {args.rows} bookings...")
+                seed(conn, args.rows)
+        conn.execute(text("ANALYZE"))
+
+    failures = 0
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, table, statement in QUERIES:
+            plan, scans = explain(conn, statement, table)
+            status = "FAIL" if scans else "ok"
+            failures += bool(scans)
+            print(f"{status:5} {name:38} {table}")
+            if scans or args.verbose:
+                print("      " + plan.replace("\n", "\n      "))
+
+    print(f"\n{len(QUERIES) - failures}/{len(QUERIES)} queries use an index on {engine.dialect.name}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(args))
@@ -366,6 +366,10 @@ except Exception as e:
     exit(1)
 "
 
+# Indexes and later schema changes for databases created by earlier releases
+print_status "Applying database migrations..."
+alembic upgrade head
+
 print_section "CONFIGURING SYSTEMD SERVICE"
 
 # Create systemd service file if it doesn't exist
@@ -419,8 +423,12 @@ fi
 # Install systemd service
 print_status "Installing systemd service..."
 cp resort.service /etc/systemd/system/
+cp resort-room-status.service resort-room-status.timer /etc/systemd/system/
+cp resort-email-worker.service /etc/systemd/system/
 systemctl daemon-reload
 systemctl enable resort.service
+systemctl enable resort-room-status.timer
+systemctl enable resort-email-worker.service
 
 print_section "CONFIGURING NGINX"
 
@@ -630,6 +638,8 @@ systemctl enable redis-server
 systemctl start postgresql
 systemctl enable postgresql
 systemctl start resort.service
+systemctl start resort-room-status.timer
+systemctl start resort-email-worker.service
 systemctl restart nginx
 
 print_section "SETTING UP SSL CERTIFICATE"
@@ -2,8 +2,15 @@
 # Production deployment on Vultr
 
 import os
+import glob
 import multiprocessing
 
+# Prometheus multiprocess mode: every worker writes its metric samples here and
+# /metrics aggregates them (app/utils/metrics.py). Must be set before the app is
+# preloaded; the email worker service points at the same directory.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/dev/shm/resort-metrics")
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
 # Server socket
 bind = "0.0.0.0:8000"
 backlog = 2048
@@ -55,6 +62,27 @@ worker_tmp_dir = "/dev/shm"
 max_requests_jitter = 50
 
 
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def on_starting(server):
+    """Called just before the master process is initialized."""
+    # Samples of a previous run would otherwise be added to the new totals. Only the
+    # files of processes that are gone: the email worker writes here too and may be running.
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        pid = os.path.basename(path)[:-len(".db")].rsplit("_", 1)[-1]
+        if pid.isdigit() and _pid_alive(int(pid)):
+            continue
+        os.remove(path)
+
+
 def when_ready(server):
     """Called just after the server is started."""
     server.log.info("Resort Management System is ready to serve requests")
@@ -75,6 +103,13 @@ def post_fork(server, worker):
     server.log.info("Worker spawned (pid: %s)", worker.pid)
 
 
+def child_exit(server, worker):
+    """Called in the master after a worker has exited."""
+    from prometheus_client import multiprocess
+    # Drop the dead worker's live gauges (in-flight requests, pool connections)
+    multiprocess.mark_process_dead(worker.pid)
+
+
 def pre_exec(server):
     """Called just before a new master process is forked."""
     server.log.info("Forked child, re-executing.")
@@ -0,0 +1,88 @@
+"""
+Shared fixtures. The environment is set up before anything under app/ is imported:
+a scratch SQLite database and cache directory per run, the request stats headers
+on, the cache bus off and the dashboard cache disabled.
+"""
+import os
+import tempfile
+from uuid import uuid4
+
+import pytest
+
+WORKDIR = tempfile.mkdtemp(prefix="resort-tests-")
+os.environ.update(
+    DATABASE_URL="sqlite:///" + os.path.join(WORKDIR, "tests.db"),
+    CACHE_DIR=os.path.join(WORKDIR, "cache"),
+    CACHE_BUS="off",
+    DASHBOARD_CACHE_TTL="0",
+    REQUEST_STATS_HEADERS="true",
+    SLOW_REQUEST_MS="0",
+)
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+# main.py mounts these relative to the working directory
+os.chdir(WORKDIR)
+os.makedirs("uploads", exist_ok=True)
+os.makedirs("static", exist_ok=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    # Not used as a context manager: the startup hooks (outbox sender, cache bus) stay off
+    return TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    credentials = {"email": "admin@example.com", "password": "tests"}
+    assert client.post("/api/users/setup-admin", json={"name": "Admin", **credentials}).status_code == 200
+    token = client.post("/api/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session")
+def seeded(auth_headers):
+    """The query budget data set (benchmarks/query_budgets.py) in the test database, 200 bookings."""
+    from app.database import engine
+    from benchmarks.query_budgets import seed
+
+    with engine.begin() as conn:
+        seed(conn, 200)
+
+
+@pytest.fixture
+def db(client):
+    """A session on the test database (the client fixture has created the tables)."""
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def new_room(seeded):
+    """Factory for rooms no other test books: new_room() -> room id."""
+    # Depends on seeded: the seed data uses explicit ids and needs the tables empty
+    from itertools import count
+
+    from app.database import SessionLocal
+    from app.models.room import Room
+
+    numbers = count(1)
+
+    def create(**fields):
+        session = SessionLocal()
+        try:
+            room = Room(**{"number": f"T{uuid4().hex[:8]}-{next(numbers)}", "type": "Test", "price": 1000, "status": "Available", **fields})
+            session.add(room)
+            session.commit()
+            return room.id
+        finally:
+            session.close()
+
+    return create
@@ -0,0 +1,102 @@
+"""A booking or food order that fails partway leaves nothing behind (app/api/booking.py, app/curd/foodorder.py)."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.api import booking as booking_api
+from app.models.booking import Booking, BookingRoom
+from app.models.email_outbox import EmailOutbox
+from app.models.foodorder import FoodOrder, FoodOrderItem
+from app.models.room_night import RoomNight
+from app.models.user import User
+
+CHECK_IN = date.today() + timedelta(days=120)
+
+
+@pytest.fixture
+def server_errors_as_responses():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def _booking_payload(room_ids, email):
+    return {
+        "room_ids": room_ids, "guest_name": "Atomic Guest", "guest_mobile": "9111111111", "guest_email": email,
+        "check_in": CHECK_IN.isoformat(), "check_out": (CHECK_IN + timedelta(days=2)).isoformat(),
+        "adults": 2, "children": 0,
+    }
+
+
+def _left_behind(db, room_ids, email):
+    db.expire_all()
+    return {
+        "bookings": db.scalar(select(func.count(Booking.id)).where(Booking.guest_email == email)),
+        "booking_rooms": db.scalar(select(func.count(BookingRoom.id)).where(BookingRoom.room_id.in_(room_ids))),
+        "room_nights": db.scalar(select(func.count(RoomNight.id)).where(RoomNight.room_id.in_(room_ids))),
+        "guest_users": db.scalar(select(func.count(User.id)).where(User.email == email)),
+        "emails": db.scalar(select(func.count(EmailOutbox.id)).where(EmailOutbox.to_email == email)),
+    }
+
+
+NOTHING = {"bookings": 0, "booking_rooms": 0, "room_nights": 0, "guest_users": 0, "emails": 0}
+
+
+def test_failure_after_the_ledger_insert_rolls_everything_back(
+    server_errors_as_responses, auth_headers, db, new_room, monkeypatch
+):
+    rooms = [new_room(), new_room()]
+    email = "atomic-late@example.com"
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("room status update failed")
+
+    monkeypatch.setattr(booking_api, "recompute_room_statuses", fail)
+    response = server_errors_as_responses.post("/api/bookings", headers=auth_headers, json=_booking_payload(rooms, email))
+    assert response.status_code == 500
+    assert _left_behind(db, rooms, email) == NOTHING
+
+    # The rooms are still free
+    monkeypatch.undo()
+    response = server_errors_as_responses.post("/api/bookings", headers=auth_headers, json=_booking_payload(rooms, email))
+    assert response.status_code == 200
+
+
+def test_double_booking_caught_by_the_ledger_rolls_everything_back(client, auth_headers, db, new_room, monkeypatch):
+    free, taken = new_room(), new_room()
+    held = client.post("/api/bookings", headers=auth_headers,
+                       json=_booking_payload([taken], "atomic-first@example.com"))
+    assert held.status_code == 200
+    email = "atomic-second@example.com"
+
+    # As if a concurrent request had passed the availability check first
+    monkeypatch.setattr(booking_api, "ensure_rooms_available", lambda *args, **kwargs: None)
+    response = client.post("/api/bookings", headers=auth_headers, json=_booking_payload([free, taken], email))
+    assert response.status_code == 400
+
+    left = _left_behind(db, [free], email)
+    assert left == NOTHING
+    # The first booking keeps its nights
+    assert db.scalar(select(func.count(RoomNight.id)).where(RoomNight.booking_id == held.json()["id"])) == 2
+
+
+def test_food_order_item_failure_leaves_no_order(server_errors_as_responses, auth_headers, db, new_room):
+    room_id = new_room()
+
+    def fail(mapper, connection, target):
+        raise RuntimeError("item insert failed")
+
+    event.listen(FoodOrderItem, "before_insert", fail)
+    try:
+        response = server_errors_as_responses.post("/api/food-orders/", headers=auth_headers, json={
+            "room_id": room_id, "amount": 300.0, "assigned_employee_id": 1,
+            "items": [{"food_item_id": 1, "quantity": 1}, {"food_item_id": 2, "quantity": 2}],
+        })
+    finally:
+        event.remove(FoodOrderItem, "before_insert", fail)
+    assert response.status_code == 500
+
+    db.expire_all()
+    assert db.scalar(select(func.count(FoodOrder.id)).where(FoodOrder.room_id == room_id)) == 0
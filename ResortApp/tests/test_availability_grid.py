@@ -0,0 +1,121 @@
+"""The room x date availability grid (app/utils/availability.py, GET /api/rooms/availability)."""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.booking import Booking
+from app.models.Package import PackageBooking
+from app.models.room import Room
+from app.utils import availability
+from app.utils.availability import MAX_GRID_DAYS
+from app.utils.booking_id import format_display_id
+from app.utils.room_nights import reserve_nights
+
+URL = "/api/rooms/availability"
+# Nights no other test books
+START = date(2032, 5, 1)
+END = START + timedelta(days=3)
+
+
+def _grid(client, start=START, end=END):
+    response = client.get(URL, params={"from": start.isoformat(), "to": end.isoformat()})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _row(grid, room_id):
+    """(states, display IDs) of one room."""
+    index = grid["rooms"]["id"].index(room_id)
+    return grid["states"][index], grid["bookings"][index]
+
+
+def test_grid_layout(client, db, new_room):
+    booked, packaged, maintenance, free = new_room(), new_room(), new_room(status="Maintenance"), new_room()
+    guest = {"guest_name": "Grid", "guest_mobile": "9000000003", "guest_email": "grid@example.com", "status": "booked"}
+    booking = Booking(check_in=START + timedelta(days=1), check_out=START + timedelta(days=3), **guest)
+    package_booking = PackageBooking(check_in=START, check_out=START + timedelta(days=2), **guest)
+    db.add_all([booking, package_booking])
+    db.flush()
+    reserve_nights(db, [booked], booking.check_in, booking.check_out, booking_id=booking.id)
+    reserve_nights(db, [packaged], package_booking.check_in, package_booking.check_out,
+                   package_booking_id=package_booking.id)
+    db.commit()
+
+    grid = _grid(client)
+    assert grid["from"] == START.isoformat() and grid["to"] == END.isoformat()
+    assert grid["dates"] == [(START + timedelta(days=i)).isoformat() for i in range(4)]
+    assert grid["legend"] == {"F": "free", "B": "booked", "P": "package", "M": "maintenance"}
+    assert len(grid["rooms"]["number"]) == len(grid["rooms"]["id"]) == len(grid["states"]) == len(grid["bookings"])
+    assert grid["rooms"]["number"] == sorted(grid["rooms"]["number"])
+
+    bk, pk = format_display_id(booking.id), format_display_id(package_booking.id, is_package=True)
+    assert bk.startswith("BK-") and pk.startswith("PK-")
+    assert _row(grid, booked) == ("FBBF", [None, bk, bk, None])
+    assert _row(grid, packaged) == ("PPFF", [pk, pk, None, None])
+    assert _row(grid, maintenance) == ("MMMM", [None] * 4)
+    assert _row(grid, free) == ("FFFF", [None] * 4)
+
+
+def test_single_night_and_longest_window(client):
+    assert len(_grid(client, START, START)["dates"]) == 1
+    assert len(_grid(client, START, START + timedelta(days=MAX_GRID_DAYS - 1))["dates"]) == MAX_GRID_DAYS
+
+
+@pytest.mark.parametrize("end", [START - timedelta(days=1), START + timedelta(days=MAX_GRID_DAYS)])
+def test_bad_windows_are_rejected(client, end):
+    response = client.get(URL, params={"from": START.isoformat(), "to": end.isoformat()})
+    assert response.status_code == 400
+
+
+def test_repeat_requests_come_from_the_cache(client, monkeypatch):
+    _grid(client)
+    builds = []
+    monkeypatch.setattr(availability, "build_availability_grid", lambda *args: builds.append(args))
+    _grid(client)
+    assert builds == []
+
+
+def test_ledger_change_invalidates(client, auth_headers, new_room):
+    room_id = new_room()
+    assert _row(_grid(client), room_id)[0] == "FFFF"
+
+    response = client.post("/api/bookings", headers=auth_headers, json={
+        "room_ids": [room_id], "guest_name": "Grid Guest", "guest_mobile": "9000000003",
+        "guest_email": "grid@example.com", "check_in": START.isoformat(),
+        "check_out": (START + timedelta(days=2)).isoformat(), "adults": 1, "children": 0,
+    })
+    assert response.status_code == 200
+    states, ids = _row(_grid(client), room_id)
+    assert states == "BBFF"
+    assert ids[:2] == [response.json()["display_id"]] * 2
+
+    assert client.put(f"/api/bookings/{response.json()['id']}/cancel", headers=auth_headers).status_code == 200
+    assert _row(_grid(client), room_id)[0] == "FFFF"
+
+
+def test_room_change_invalidates(client, db, new_room):
+    room_id = new_room()
+    assert _row(_grid(client), room_id)[0] == "FFFF"
+
+    room = db.get(Room, room_id)
+    room.status = "Maintenance"
+    db.commit()
+    assert _row(_grid(client), room_id)[0] == "MMMM"
+
+    room.number = room.number + "-renamed"
+    db.commit()
+    grid = _grid(client)
+    assert grid["rooms"]["number"][grid["rooms"]["id"].index(room_id)] == room.number
+
+
+def test_uncommitted_room_change_keeps_the_cached_grid(client, db, new_room, monkeypatch):
+    room_id = new_room()
+    _grid(client)
+    db.get(Room, room_id).status = "Maintenance"
+    db.flush()
+    db.rollback()
+
+    builds = []
+    monkeypatch.setattr(availability, "build_availability_grid", lambda *args: builds.append(args))
+    _grid(client)
+    assert builds == []
@@ -0,0 +1,18 @@
+"""GET /bill/batch against the single-room bill (app/api/checkout.py)."""
+
+
+def test_batch_bills_match_single_room_bills(client, auth_headers, seeded):
+    batch = client.get("/api/bill/batch?checkout_mode=single&include_booked=true", headers=auth_headers)
+    assert batch.status_code == 200
+    entries = batch.json()
+    assert entries
+    with_items = 0
+    for entry in entries:
+        single = client.get(f"/api/bill/{entry['room_number']}?checkout_mode=single", headers=auth_headers)
+        assert single.status_code == 200
+        expected = single.json()["charges"]
+        assert entry["charges"]["food_items"] == expected["food_items"]
+        assert entry["charges"]["service_items"] == expected["service_items"]
+        assert entry["charges"]["total_due"] == expected["total_due"]
+        with_items += bool(expected["food_items"] or expected["service_items"])
+    assert with_items
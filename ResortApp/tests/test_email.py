@@ -0,0 +1,35 @@
+"""SMTP configuration checks (app/utils/email.py)."""
+import pytest
+
+from app.utils.email import get_smtp_config, smtp_configured
+
+
+@pytest.fixture
+def smtp_env(monkeypatch):
+    for name in ("SMTP_HOST", "SMTP_USER", "SMTP_PASSWORD", "SMTP_NO_AUTH"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_not_configured_by_default(smtp_env):
+    assert not smtp_configured(get_smtp_config())
+
+
+def test_credentials_configure_smtp(smtp_env):
+    smtp_env.setenv("SMTP_USER", "mailer@example.com")
+    smtp_env.setenv("SMTP_PASSWORD", "app-password")
+    assert smtp_configured(get_smtp_config())
+
+
+def test_host_alone_is_not_enough(smtp_env):
+    smtp_env.setenv("SMTP_HOST", "smtp.example.com")
+    assert not smtp_configured(get_smtp_config())
+    smtp_env.setenv("SMTP_USER", "mailer@example.com")
+    assert not smtp_configured(get_smtp_config())
+
+
+def test_relay_without_login(smtp_env):
+    smtp_env.setenv("SMTP_NO_AUTH", "true")
+    assert not smtp_configured(get_smtp_config())
+    smtp_env.setenv("SMTP_HOST", "127.0.0.1")
+    assert smtp_configured(get_smtp_config())
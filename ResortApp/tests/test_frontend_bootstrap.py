@@ -0,0 +1,78 @@
+"""GET /frontend/bootstrap (app/api/frontend.py): per-encoding ETags, 304s and invalidation."""
+import pytest
+
+from app.models.room import Room
+
+URL = "/api/frontend/bootstrap"
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def primed(client):
+    """A fresh payload in the response cache."""
+    response = client.get(URL, headers=GZIP)
+    assert response.status_code == 200
+    return response
+
+
+def test_each_encoding_has_its_own_etag(client, primed):
+    identity = client.get(URL, headers=IDENTITY)
+    assert primed.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity.headers
+    assert "Accept-Encoding" in primed.headers["Vary"]
+    assert identity.headers["ETag"].endswith('-identity"')
+    assert primed.headers["ETag"] != identity.headers["ETag"]
+    # Same document either way
+    assert primed.json() == identity.json()
+    assert set(primed.json()) >= {"header_banner", "reviews", "packages", "room_types"}
+
+
+def test_if_none_match_returns_304(client, primed):
+    for headers in (GZIP, IDENTITY):
+        etag = client.get(URL, headers=headers).headers["ETag"]
+        response = client.get(URL, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    # The gzip representation's ETag does not validate the identity one
+    response = client.get(URL, headers={**IDENTITY, "If-None-Match": primed.headers["ETag"]})
+    assert response.status_code == 200
+
+
+def test_repeat_requests_are_cache_hits(client, primed):
+    response = client.get(URL, headers=GZIP)
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.headers["ETag"] == primed.headers["ETag"]
+
+
+def test_content_write_invalidates(client, auth_headers, primed):
+    review = {"name": "Bootstrap Guest", "comment": "Lovely stay", "rating": 5}
+    assert client.post("/api/reviews/", headers=auth_headers, json=review).status_code == 200
+
+    response = client.get(URL, headers=GZIP)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.headers["ETag"] != primed.headers["ETag"]
+    assert review["comment"] in [r["comment"] for r in response.json()["reviews"]]
+    # The old validator no longer matches
+    stale = client.get(URL, headers={**GZIP, "If-None-Match": primed.headers["ETag"]})
+    assert stale.status_code == 200
+
+
+def test_room_status_does_not_invalidate_but_price_does(client, db, new_room):
+    room_id = new_room()
+    before = client.get(URL, headers=GZIP)
+
+    room = db.get(Room, room_id)
+    room.status = "Occupied"
+    db.commit()
+    after_status = client.get(URL, headers=GZIP)
+    assert after_status.headers["X-Cache"] == "HIT"
+    assert after_status.headers["ETag"] == before.headers["ETag"]
+
+    room.price = 12345.0
+    db.commit()
+    after_price = client.get(URL, headers=GZIP)
+    assert after_price.headers["X-Cache"] == "MISS"
+    assert after_price.headers["ETag"] != before.headers["ETag"]
@@ -0,0 +1,65 @@
+"""Metadata stripping and variants of uploaded images (app/utils/images.py)."""
+import pytest
+
+from app.utils.images import prepare_upload, srcset, strip_metadata
+
+Image = pytest.importorskip("PIL.Image")
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+MAKE = 0x010F
+
+
+def _photo(path, size=(2000, 1000), orientation=1, fmt="JPEG"):
+    exif = Image.Exif()
+    exif[MAKE] = "PhoneCam"
+    exif[ORIENTATION] = orientation
+    exif.get_ifd(GPS_IFD)[2] = (12.0, 58.0, 0.0)  # GPSLatitude
+    Image.new("RGB", size, (200, 120, 40)).save(path, fmt, exif=exif)
+    return str(path)
+
+
+@pytest.mark.parametrize("fmt,suffix", [("JPEG", "jpg"), ("PNG", "png"), ("WEBP", "webp")])
+def test_strip_metadata_removes_exif(tmp_path, fmt, suffix):
+    path = _photo(tmp_path / f"upload.{suffix}", fmt=fmt)
+    assert strip_metadata(path)
+    with Image.open(path) as image:
+        assert image.format == fmt
+        assert len(image.getexif()) == 0
+        assert image.size == (2000, 1000)
+    # Nothing left to strip
+    assert not strip_metadata(path)
+
+
+def test_strip_metadata_applies_orientation(tmp_path):
+    # 6: rotate 90 degrees clockwise for display
+    path = _photo(tmp_path / "upload.jpg", orientation=6)
+    assert strip_metadata(path)
+    with Image.open(path) as image:
+        assert image.size == (1000, 2000)
+        assert ORIENTATION not in image.getexif()
+
+
+def test_strip_metadata_leaves_clean_files_alone(tmp_path):
+    path = tmp_path / "clean.jpg"
+    Image.new("RGB", (100, 100)).save(path, "JPEG")
+    before = path.read_bytes()
+    assert not strip_metadata(str(path))
+    assert path.read_bytes() == before
+
+
+def test_prepare_upload_strips_and_renders_variants(tmp_path):
+    path = _photo(tmp_path / "gallery.jpg")
+    variants = prepare_upload(path, {"thumb": 320, "medium": 800, "large": 1600}, 80)
+    assert {name: variant["width"] for name, variant in variants.items()} == {"thumb": 320, "medium": 800, "large": 1600}
+    with Image.open(path) as original:
+        assert len(original.getexif()) == 0
+    for variant in variants.values():
+        with Image.open(tmp_path / variant["file"]) as image:
+            assert image.format == "WEBP" and len(image.getexif()) == 0
+
+
+def test_srcset_orders_by_width():
+    variants = {"large": {"url": "/l.webp", "width": 1600}, "thumb": {"url": "/t.webp", "width": 320}}
+    assert srcset(variants) == "/t.webp 320w, /l.webp 1600w"
+    assert srcset(None) is None
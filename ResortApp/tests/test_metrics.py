@@ -0,0 +1,43 @@
+"""/metrics access and the database pool metrics (app/utils/metrics.py)."""
+from prometheus_client import REGISTRY
+
+from app.utils import metrics
+
+
+def test_metrics_refused_to_other_clients(client):
+    # TestClient requests come from "testclient", which is no allowlisted address
+    assert client.get("/metrics").status_code == 403
+
+
+def test_app_main_metrics_is_guarded_too(client):
+    # app/main.py is the entry point for `uvicorn app.main:app`
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    assert TestClient(app).get("/metrics").status_code == 403
+
+
+def test_metrics_with_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "http_request_duration_seconds" in response.text
+
+
+def test_client_allowlist():
+    assert metrics._client_allowed("127.0.0.1")
+    assert metrics._client_allowed("::1")
+    assert not metrics._client_allowed("203.0.113.7")
+    assert not metrics._client_allowed("testclient")
+    assert not metrics._client_allowed(None)
+
+
+def test_checkout_wait_observed_once_per_checkout(client, auth_headers, seeded):
+    def observed():
+        return REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count") or 0
+
+    before = observed()
+    response = client.get("/api/bookings?limit=20", headers=auth_headers)
+    assert response.status_code == 200
+    assert observed() - before == int(response.headers["X-DB-Checkouts"])
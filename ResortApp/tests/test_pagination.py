@@ -0,0 +1,82 @@
+"""Keyset cursors (app/utils/pagination.py) paging through ties and NULLs without skipping or repeating rows."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import Column, Integer, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, paginate
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+    score = Column(Integer, nullable=True)
+
+
+# Long runs of equal scores and a block of NULLs, interleaved by id
+SCORES = [5, None, 5, 3, None, 5, 3, 3, None, 1, 5, None, 3, 1, None, 5, 5, 3]
+
+
+@pytest.fixture(scope="module")
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Row(id=i, score=score) for i, score in enumerate(SCORES, start=1))
+        session.commit()
+        yield session
+
+
+def _expected(descending):
+    rows = list(enumerate(SCORES, start=1))
+    scored = sorted((r for r in rows if r[1] is not None), key=lambda r: (r[1], r[0]), reverse=descending)
+    nulls = sorted((r for r in rows if r[1] is None), key=lambda r: r[0], reverse=descending)
+    # NULL scores come last in both directions
+    return [row_id for row_id, _ in scored + nulls]
+
+
+class _Response:
+    def __init__(self):
+        self.headers = {}
+
+
+def _walk(session, order_column, descending, limit):
+    seen, cursor = [], None
+    while True:
+        response = _Response()
+        page = paginate(session.query(Row), order_column, Row.id, limit,
+                        cursor=cursor, descending=descending, response=response)
+        seen.extend(row.id for row in page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return seen
+        assert len(seen) <= len(SCORES), "pagination does not terminate"
+
+
+@pytest.mark.parametrize("descending", [True, False])
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 7, len(SCORES)])
+def test_cursor_walk_visits_every_row_once(session, descending, limit):
+    assert _walk(session, Row.score, descending, limit) == _expected(descending)
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_cursor_walk_by_id(session, descending):
+    assert _walk(session, Row.id, descending, 4) == sorted(range(1, len(SCORES) + 1), reverse=descending)
+
+
+@pytest.mark.parametrize("value", [None, 5, 2.5, "Room 101", date(2026, 1, 15), datetime(2026, 1, 15, 9, 30)])
+def test_cursor_round_trip(value):
+    assert decode_cursor(encode_cursor(value, 42)) == (value, 42)
+
+
+def test_bookings_total_defaults_to_estimate(client, auth_headers, monkeypatch):
+    from app.api import booking
+
+    modes = []
+    monkeypatch.setattr(booking, "count_total", lambda query, mode: modes.append(mode) or 0)
+    assert client.get("/api/bookings?limit=1", headers=auth_headers).status_code == 200
+    assert client.get("/api/bookings?limit=1&total=exact", headers=auth_headers).status_code == 200
+    assert modes == ["estimate", "exact"]
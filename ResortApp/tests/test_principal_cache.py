@@ -0,0 +1,80 @@
+"""The per-worker Principal cache of get_current_user (app/utils/auth.py) and its invalidation."""
+import json
+
+import pytest
+
+from app.models.user import Role, User
+from app.utils import auth, cache_bus
+from app.utils.cache import get_version
+
+
+@pytest.fixture
+def admin(client, auth_headers, db):
+    """The admin user, with its Principal cached by a first request."""
+    user_id = client.get("/api/users/me", headers=auth_headers).json()["id"]
+    assert auth._principal_cache.get(user_id) is not None
+    user = db.get(User, user_id)
+    name, permissions = user.name, user.role.permissions
+    yield user
+    # Put back what the test changed
+    db.rollback()
+    user = db.get(User, user_id)
+    user.name, user.role.permissions = name, permissions
+    db.commit()
+
+
+def _me(client, auth_headers):
+    return client.get("/api/users/me", headers=auth_headers).json()
+
+
+def test_cache_serves_repeat_requests(client, auth_headers, admin):
+    cached = auth._principal_cache.get(admin.id)
+    assert _me(client, auth_headers)["name"] == admin.name
+    # Same entry, not rebuilt from the database
+    assert auth._principal_cache.get(admin.id) is cached
+
+
+def test_committed_user_change_evicts(client, auth_headers, db, admin):
+    version = get_version(auth.PRINCIPAL_CACHE_NAMESPACE)
+    admin.name = "Renamed Admin"
+    db.commit()
+
+    assert auth._principal_cache.get(admin.id) is None
+    assert get_version(auth.PRINCIPAL_CACHE_NAMESPACE) == version + 1
+    assert _me(client, auth_headers)["name"] == "Renamed Admin"
+
+
+def test_uncommitted_user_change_keeps_entry(client, auth_headers, db, admin):
+    version = get_version(auth.PRINCIPAL_CACHE_NAMESPACE)
+    cached = auth._principal_cache.get(admin.id)
+    admin.name = "Not Committed"
+    db.flush()
+    db.rollback()
+
+    assert auth._principal_cache.get(admin.id) is cached
+    assert get_version(auth.PRINCIPAL_CACHE_NAMESPACE) == version
+    assert _me(client, auth_headers)["name"] != "Not Committed"
+
+
+def test_committed_role_change_clears_every_principal(client, auth_headers, db, admin):
+    role = db.get(Role, admin.role_id)
+    role.permissions = json.dumps(["dashboard", "bookings"])
+    db.commit()
+
+    assert len(auth._principal_cache) == 0
+    assert _me(client, auth_headers)["role"]["permissions"] == ["dashboard", "bookings"]
+
+
+def test_uncommitted_role_change_keeps_entries(client, auth_headers, db, admin):
+    cached = auth._principal_cache.get(admin.id)
+    db.get(Role, admin.role_id).permissions = json.dumps(["nothing"])
+    db.flush()
+    db.rollback()
+
+    assert auth._principal_cache.get(admin.id) is cached
+
+
+def test_bus_event_from_another_worker_evicts(client, auth_headers, admin):
+    # What the LISTEN / poll thread does with an event published elsewhere
+    cache_bus.dispatch([("users", admin.id)])
+    assert auth._principal_cache.get(admin.id) is None
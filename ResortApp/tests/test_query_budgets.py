@@ -0,0 +1,74 @@
+"""Statement fingerprints, query_budget() and the endpoint budgets of benchmarks/query_budgets.py."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.utils.query_budget import QueryBudgetExceeded, capture_queries, fingerprint, query_budget
+from benchmarks.query_budgets import BUDGETS, MAX_REPEATS
+
+
+@pytest.fixture
+def scratch_engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def test_fingerprint_takes_out_literals_and_parameters():
+    assert fingerprint("SELECT * FROM bookings WHERE id = 12 AND status = 'booked'") == (
+        "SELECT * FROM bookings WHERE id = ? AND status = ?"
+    )
+    assert fingerprint("SELECT  *\n FROM rooms WHERE id = :id_1") == "SELECT * FROM rooms WHERE id = ?"
+    assert fingerprint("SELECT * FROM rooms WHERE id = %(id_1)s") == fingerprint("SELECT * FROM rooms WHERE id = $1")
+
+
+def test_fingerprint_collapses_in_lists_of_any_length():
+    assert fingerprint("SELECT * FROM rooms WHERE id IN (?, ?)") == fingerprint(
+        "SELECT * FROM rooms WHERE id IN (?, ?, ?, ?)"
+    )
+
+
+def test_capture_queries_counts_statements(scratch_engine):
+    with capture_queries(scratch_engine) as log:
+        with scratch_engine.connect() as conn:
+            for i in range(3):
+                conn.execute(text("SELECT :n"), {"n": i})
+            conn.execute(text("SELECT 1, 2"))
+    assert log.statements == 4
+    assert log.repeated(3) == [("SELECT ?", 3)]
+    # Listeners are removed when the block ends
+    with scratch_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert log.statements == 4
+
+
+def test_query_budget_passes_within_budget(scratch_engine):
+    with query_budget(2, max_repeats=1, bind=scratch_engine) as log:
+        with scratch_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 1, 2"))
+    assert log.statements == 2
+
+
+def test_query_budget_fails_over_budget(scratch_engine):
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 statements, budget is 2"):
+        with query_budget(2, bind=scratch_engine):
+            with scratch_engine.connect() as conn:
+                for i in range(3):
+                    conn.execute(text("SELECT :n"), {"n": i})
+
+
+def test_query_budget_fails_on_repeated_statement(scratch_engine):
+    with pytest.raises(QueryBudgetExceeded, match=r"ran 3 times \(limit 2\): SELECT \?"):
+        with query_budget(10, max_repeats=2, bind=scratch_engine):
+            with scratch_engine.connect() as conn:
+                for i in range(3):
+                    conn.execute(text("SELECT :n"), {"n": i})
+
+
+@pytest.mark.parametrize("endpoint,budget", BUDGETS, ids=[endpoint for endpoint, _ in BUDGETS])
+def test_endpoint_within_query_budget(client, auth_headers, seeded, endpoint, budget):
+    # Warm the principal cache, as the benchmark does
+    client.get(endpoint, headers=auth_headers)
+    with query_budget(budget, max_repeats=MAX_REPEATS):
+        response = client.get(endpoint, headers=auth_headers)
+    assert response.status_code == 200
@@ -0,0 +1,25 @@
+"""The hot filter and join paths must read their tables through an index (benchmarks/query_plans.py)."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+from benchmarks.query_plans import QUERIES, explain, seed
+
+
+@pytest.fixture(scope="module")
+def plans_db(tmp_path_factory):
+    # A database of its own: seed() uses explicit ids
+    engine = create_engine("sqlite:///" + str(tmp_path_factory.mktemp("plans") / "plans.db"))
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        seed(conn, 1000)
+        conn.execute(text("ANALYZE"))
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name,table,statement", QUERIES, ids=[q[0] for q in QUERIES])
+def test_query_uses_index(plans_db, name, table, statement):
+    plan, scans = explain(plans_db, statement, table)
+    assert not scans, f"{name} scans {table}:\n{plan}"
@@ -0,0 +1,53 @@
+"""Per-request database counters of RequestStatsMiddleware (app/utils/request_stats.py)."""
+import pytest
+
+from app.utils import request_stats
+from app.utils.query_budget import capture_queries
+from app.utils.request_stats import (
+    CHECKOUTS_HEADER,
+    DB_TIME_HEADER,
+    PEAK_CONNECTIONS_HEADER,
+    STATEMENTS_HEADER,
+    add_timing,
+    current_request_stats,
+)
+
+
+@pytest.mark.parametrize("endpoint", ["/api/rooms/?limit=20", "/api/bookings?limit=20", "/api/dashboard/kpis"])
+def test_request_uses_one_connection(client, auth_headers, seeded, endpoint):
+    response = client.get(endpoint, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers[CHECKOUTS_HEADER] == "1"
+    assert response.headers[PEAK_CONNECTIONS_HEADER] == "1"
+
+
+def test_statements_header_matches_captured_statements(client, auth_headers, seeded):
+    client.get("/api/food-orders/?limit=20", headers=auth_headers)
+    with capture_queries() as log:
+        response = client.get("/api/food-orders/?limit=20", headers=auth_headers)
+    assert int(response.headers[STATEMENTS_HEADER]) == log.statements > 0
+    assert float(response.headers[DB_TIME_HEADER]) >= 0
+
+
+def test_health_check_does_no_database_work(client):
+    response = client.get("/health")
+    assert response.headers[CHECKOUTS_HEADER] == "0"
+    assert response.headers[STATEMENTS_HEADER] == "0"
+
+
+def test_counters_are_per_request_only():
+    assert current_request_stats() is None
+    # No request to charge: ignored rather than failing the caller
+    add_timing("images", 0.5)
+    assert current_request_stats() is None
+
+
+def test_server_timing_is_off_by_default(client):
+    assert "server-timing" not in client.get("/health").headers
+
+
+def test_server_timing_splits_the_request(client, auth_headers, seeded, monkeypatch):
+    monkeypatch.setattr(request_stats, "SERVER_TIMING", True)
+    value = client.get("/api/rooms/?limit=20", headers=auth_headers).headers["server-timing"]
+    entries = [entry.split(";")[0] for entry in value.split(", ")]
+    assert entries[0] == "db" and entries[-2:] == ["app", "total"]
@@ -0,0 +1,177 @@
+"""The cache backends (app/utils/cache_backends.py) and Cache.get_or_compute (app/utils/response_cache.py)."""
+import os
+import threading
+import time
+
+import pytest
+
+from app.utils.cache_backends import MemoryBackend, RedisBackend, SharedMemoryBackend
+from app.utils.response_cache import Cache
+
+
+@pytest.fixture(params=["memory", "shm", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend("tests")
+    if request.param == "shm":
+        return SharedMemoryBackend("tests", directory=str(tmp_path))
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisBackend("tests", client=fakeredis.FakeRedis())
+
+
+def test_set_and_get(backend):
+    assert backend.get("a") is None
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"", ttl=60)
+    assert backend.get("a") == b"1"
+    assert backend.get("b") == b""
+
+
+def test_entries_expire(backend):
+    backend.set("a", b"1", ttl=0.05)
+    assert backend.get("a") == b"1"
+    time.sleep(0.1)
+    assert backend.get("a") is None
+
+
+def test_delete_and_clear(backend):
+    for key in ("a", "b", "c"):
+        backend.set(key, key.encode(), ttl=60)
+    backend.delete("a")
+    backend.delete("missing")
+    assert backend.get("a") is None
+    assert backend.get("b") == b"b"
+    backend.clear()
+    assert backend.get("b") is None and backend.get("c") is None
+    # Still usable after a clear
+    backend.set("a", b"2", ttl=60)
+    assert backend.get("a") == b"2"
+
+
+def test_clear_is_per_namespace(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    for make in (
+        lambda ns: SharedMemoryBackend(ns, directory=str(tmp_path)),
+        lambda ns: RedisBackend(ns, client=client),
+    ):
+        first, second = make("first"), make("second")
+        first.set("a", b"1", ttl=60)
+        second.set("a", b"2", ttl=60)
+        first.clear()
+        assert first.get("a") is None
+        assert second.get("a") == b"2"
+
+
+def test_acquire_and_release(backend):
+    if isinstance(backend, MemoryBackend):
+        # In-process single flight only: the lock is always granted
+        assert backend.acquire("a", ttl=60) and backend.acquire("a", ttl=60)
+        return
+    assert backend.acquire("a", ttl=60)
+    assert not backend.acquire("a", ttl=60)
+    assert backend.acquire("b", ttl=60)
+    backend.release("a")
+    assert backend.acquire("a", ttl=60)
+
+
+def test_expired_lock_is_taken_over(backend):
+    if isinstance(backend, MemoryBackend):
+        pytest.skip("no cross-process lock")
+    assert backend.acquire("a", ttl=0.05)
+    time.sleep(1.1 if isinstance(backend, SharedMemoryBackend) else 0.1)
+    assert backend.acquire("a", ttl=1)
+
+
+def test_shared_memory_backend_prunes_to_maxsize(tmp_path):
+    backend = SharedMemoryBackend("tests", maxsize=4, directory=str(tmp_path))
+    for i in range(SharedMemoryBackend.PRUNE_EVERY):
+        backend.set(str(i), b"x", ttl=60)
+    assert len(list((tmp_path / "ns-tests").glob("*.entry"))) == 4
+
+
+def test_shared_memory_backend_prunes_least_recently_used(tmp_path):
+    backend = SharedMemoryBackend("tests", maxsize=4, directory=str(tmp_path))
+    last = SharedMemoryBackend.PRUNE_EVERY - 1
+    for i in range(last):
+        backend.set(str(i), b"x", ttl=60)
+        # Written in order, one second apart
+        os.utime(backend._path(str(i)), (time.time() - 100 + i,) * 2)
+    assert backend.get("0") == b"x"
+    backend.set(str(last), b"x", ttl=60)
+    assert backend.get("0") == b"x"
+    assert backend.get("1") is None
+    assert backend.get(str(last - 1)) == b"x"
+
+
+def test_get_or_compute_is_single_flight(backend):
+    cache = Cache("tests-single-flight", ttl=60, backend=backend)
+    calls = []
+    start = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return b"value"
+
+    results = []
+
+    def lookup():
+        start.wait()
+        results.append(cache.get_or_compute("key", compute))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(result for _, result in results) == ["coalesced"] * 7 + ["miss"]
+    assert {value for value, _ in results} == {b"value"}
+    assert cache.get_or_compute("key", compute) == (b"value", "hit")
+    assert cache.stats.as_dict()["hit_ratio"] == round(8 / 9, 3)
+
+
+def test_get_or_compute_waits_for_another_worker(backend):
+    if isinstance(backend, MemoryBackend):
+        pytest.skip("no cross-process lock")
+    cache = Cache("tests-other-worker", ttl=60, backend=backend, lock_timeout=2)
+    # Another worker holds the lock and stores its result a little later
+    assert backend.acquire("key", ttl=2)
+    threading.Timer(0.1, backend.set, args=("key", b"theirs", 60)).start()
+    assert cache.get_or_compute("key", lambda: b"ours") == (b"theirs", "coalesced")
+
+
+def test_clear_during_compute_does_not_store_stale_value(backend):
+    cache = Cache("tests-stale", ttl=60, backend=backend)
+
+    def compute():
+        cache.clear()
+        return b"stale"
+
+    assert cache.get_or_compute("key", compute) == (b"stale", "miss")
+    assert cache.get("key") is None
+
+
+def test_failing_backend_counts_as_miss():
+    class BrokenBackend(MemoryBackend):
+        def get(self, key):
+            raise ConnectionError("down")
+
+    cache = Cache("tests-broken", ttl=60, backend=BrokenBackend("tests-broken"))
+    assert cache.get_or_compute("key", lambda: b"value") == (b"value", "miss")
+    assert cache.stats.errors >= 1
+
+
+def test_dashboard_served_from_cache(client, auth_headers, seeded, monkeypatch):
+    from app.api import dashboard
+
+    monkeypatch.setattr(dashboard, "DASHBOARD_CACHE_TTL", 60)
+    monkeypatch.setattr(dashboard, "_cache", Cache("tests-dashboard", ttl=60, backend="memory"))
+    first = client.get("/api/dashboard/kpis", headers=auth_headers)
+    second = client.get("/api/dashboard/kpis", headers=auth_headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["X-DB-Statements"] == "0"
+    assert dashboard._cache.stats.hits == 1
@@ -0,0 +1,136 @@
+"""Incremental daily_rollups maintenance (app/utils/rollups.py)."""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.booking import Booking
+from app.models.daily_rollup import DailyRollup
+from app.models.expense import Expense
+from app.models.foodorder import FoodOrder
+from app.models.room import Room
+from app.utils.rollups import ROLLUP_FIELDS
+from app.utils.room_nights import release_nights, reserve_nights
+
+TODAY = date.today()
+# Days no other test writes to
+EXPENSE_DAY = date(2031, 3, 1)
+FOOD_DAY = date(2031, 3, 2)
+STAY_DAY = date(2031, 3, 3)
+
+
+def _rollup(db, day):
+    db.expire_all()
+    row = db.execute(select(DailyRollup).where(DailyRollup.date == day)).scalar_one_or_none()
+    return {field: getattr(row, field) if row else 0 for field in ROLLUP_FIELDS}
+
+
+def _changes(before, after):
+    return {field: after[field] - before[field] for field in ROLLUP_FIELDS if after[field] != before[field]}
+
+
+def test_expense_writes(db):
+    before = _rollup(db, EXPENSE_DAY)
+    expense = Expense(category="Test", amount=120.0, date=EXPENSE_DAY)
+    db.add(expense)
+    db.commit()
+    assert _changes(before, _rollup(db, EXPENSE_DAY)) == {"expenses": 120.0, "expense_count": 1}
+
+    expense.amount = 200.0
+    db.commit()
+    assert _changes(before, _rollup(db, EXPENSE_DAY)) == {"expenses": 200.0, "expense_count": 1}
+
+    # Moving it to another day moves its contribution
+    next_day = _rollup(db, EXPENSE_DAY + timedelta(days=10))
+    expense.date = EXPENSE_DAY + timedelta(days=10)
+    db.commit()
+    assert _changes(before, _rollup(db, EXPENSE_DAY)) == {}
+    assert _changes(next_day, _rollup(db, EXPENSE_DAY + timedelta(days=10))) == {"expenses": 200.0, "expense_count": 1}
+
+    db.delete(expense)
+    db.commit()
+    assert _changes(next_day, _rollup(db, EXPENSE_DAY + timedelta(days=10))) == {}
+
+
+def test_food_order_writes(db):
+    before = _rollup(db, FOOD_DAY)
+    order = FoodOrder(amount=450.0, created_at=datetime.combine(FOOD_DAY, datetime.min.time()) + timedelta(hours=13))
+    db.add(order)
+    db.commit()
+    assert _changes(before, _rollup(db, FOOD_DAY)) == {"food_orders": 1, "food_order_amount": 450.0}
+
+    order.amount = 500.0
+    db.commit()
+    assert _changes(before, _rollup(db, FOOD_DAY)) == {"food_orders": 1, "food_order_amount": 500.0}
+
+    db.delete(order)
+    db.commit()
+    assert _changes(before, _rollup(db, FOOD_DAY)) == {}
+
+
+def test_room_night_writes(db, new_room):
+    rooms = [new_room(), new_room()]
+    booking = Booking(guest_name="Rollup", check_in=STAY_DAY, check_out=STAY_DAY + timedelta(days=2))
+    db.add(booking)
+    db.flush()
+    nights = [STAY_DAY, STAY_DAY + timedelta(days=1)]
+    before = {night: _rollup(db, night) for night in nights}
+
+    reserve_nights(db, rooms, STAY_DAY, STAY_DAY + timedelta(days=2), booking_id=booking.id)
+    db.commit()
+    for night in nights:
+        assert _changes(before[night], _rollup(db, night)) == {"occupied_rooms": 2}
+
+    release_nights(db, booking_id=booking.id, room_ids=rooms[:1], from_night=nights[1])
+    db.commit()
+    assert _changes(before[nights[0]], _rollup(db, nights[0])) == {"occupied_rooms": 2}
+    assert _changes(before[nights[1]], _rollup(db, nights[1])) == {"occupied_rooms": 1}
+
+    release_nights(db, booking_id=booking.id)
+    db.commit()
+    for night in nights:
+        assert _changes(before[night], _rollup(db, night)) == {}
+
+
+def test_checkout_writes(client, auth_headers, db, new_room):
+    room_id = new_room()
+    response = client.post("/api/bookings", headers=auth_headers, json={
+        "room_ids": [room_id], "guest_name": "Rollup Guest", "guest_mobile": "9000000001",
+        "guest_email": "rollup@example.com", "check_in": (TODAY - timedelta(days=1)).isoformat(),
+        "check_out": (TODAY + timedelta(days=1)).isoformat(), "adults": 1, "children": 0,
+    })
+    assert response.status_code == 200
+    # Dated today or on the booked checkout day, whichever the bill settles on
+    before = {day: _rollup(db, day) for day in (TODAY, TODAY + timedelta(days=1))}
+
+    number = db.get(Room, room_id).number
+    response = client.post(f"/api/bill/checkout/{number}", headers=auth_headers,
+                           json={"payment_method": "Cash", "checkout_mode": "multiple"})
+    assert response.status_code == 200
+    day = date.fromisoformat(response.json()["checkout_date"][:10])
+    changes = _changes(before[day], _rollup(db, day))
+    assert changes["checkouts"] == 1
+    assert changes["grand_total"] == pytest.approx(response.json()["grand_total"])
+
+
+def test_rollback_drops_pending_deltas(db):
+    before = _rollup(db, EXPENSE_DAY)
+
+    # Applied inside the transaction, undone with it
+    db.add(Expense(category="Test", amount=75.0, date=EXPENSE_DAY))
+    db.flush()
+    assert _changes(before, _rollup(db, EXPENSE_DAY)) == {"expenses": 75.0, "expense_count": 1}
+    db.rollback()
+    assert _changes(before, _rollup(db, EXPENSE_DAY)) == {}
+
+    # A flush that fails leaves its collected deltas behind until the rollback drops them
+    db.add(Expense(category=None, amount=999.0, date=EXPENSE_DAY))
+    with pytest.raises(IntegrityError):
+        db.flush()
+    db.rollback()
+    assert "rollup_deltas" not in db.info
+
+    db.add(Expense(category="Test", amount=10.0, date=EXPENSE_DAY))
+    db.commit()
+    assert _changes(before, _rollup(db, EXPENSE_DAY)) == {"expenses": 10.0, "expense_count": 1}
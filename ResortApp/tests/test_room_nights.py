@@ -0,0 +1,122 @@
+"""The room_nights occupancy ledger (app/utils/room_nights.py) and the booking routes that keep it."""
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.models.booking import Booking
+from app.models.daily_rollup import DailyRollup
+from app.models.room import Room
+from app.models.room_night import RoomNight
+from app.utils.room_nights import backfill_room_nights, nights_between, reserve_nights
+
+TODAY = date.today()
+
+
+def _book(client, auth_headers, room_ids, check_in, check_out):
+    return client.post("/api/bookings", headers=auth_headers, json={
+        "room_ids": room_ids, "guest_name": "Ledger Guest", "guest_mobile": "9000000000",
+        "guest_email": "ledger@example.com", "check_in": check_in.isoformat(),
+        "check_out": check_out.isoformat(), "adults": 1, "children": 0,
+    })
+
+
+def _nights(db, booking_id):
+    return sorted(db.execute(select(RoomNight.room_id, RoomNight.night).where(RoomNight.booking_id == booking_id)).all())
+
+
+def test_unique_constraint_rejects_double_booking(db, new_room):
+    room_id = new_room()
+    night = TODAY + timedelta(days=40)
+    first, second = (Booking(guest_name=name, check_in=night, check_out=night + timedelta(days=3)) for name in "AB")
+    db.add_all([first, second])
+    db.flush()
+    reserve_nights(db, [room_id], night, night + timedelta(days=2), booking_id=first.id)
+
+    # Bypasses the availability check, as a concurrent request that passed it would
+    with pytest.raises(HTTPException) as exc:
+        reserve_nights(db, [room_id], night + timedelta(days=1), night + timedelta(days=3), booking_id=second.id)
+    assert exc.value.status_code == 400
+
+    # Only the failed insert was undone
+    assert _nights(db, first.id) == [(room_id, night), (room_id, night + timedelta(days=1))]
+    assert _nights(db, second.id) == []
+    db.rollback()
+
+
+def test_overlapping_booking_returns_400(client, auth_headers, new_room):
+    room_id = new_room()
+    check_in = TODAY + timedelta(days=50)
+    assert _book(client, auth_headers, [room_id], check_in, check_in + timedelta(days=3)).status_code == 200
+    clash = _book(client, auth_headers, [room_id], check_in + timedelta(days=2), check_in + timedelta(days=4))
+    assert clash.status_code == 400
+
+
+def test_cancel_releases_all_nights(client, auth_headers, db, new_room):
+    room_id = new_room()
+    check_in = TODAY + timedelta(days=60)
+    booking_id = _book(client, auth_headers, [room_id], check_in, check_in + timedelta(days=2)).json()["id"]
+    assert _nights(db, booking_id) == [(room_id, n) for n in nights_between(check_in, check_in + timedelta(days=2))]
+
+    assert client.put(f"/api/bookings/{booking_id}/cancel", headers=auth_headers).status_code == 200
+    assert _nights(db, booking_id) == []
+    # The room can be booked again
+    assert _book(client, auth_headers, [room_id], check_in, check_in + timedelta(days=2)).status_code == 200
+
+
+def test_extend_holds_the_extra_nights(client, auth_headers, db, new_room):
+    room_id = new_room()
+    check_in = TODAY + timedelta(days=70)
+    booking_id = _book(client, auth_headers, [room_id], check_in, check_in + timedelta(days=2)).json()["id"]
+
+    new_checkout = check_in + timedelta(days=4)
+    response = client.put(f"/api/bookings/{booking_id}/extend?new_checkout={new_checkout}", headers=auth_headers)
+    assert response.status_code == 200
+    assert _nights(db, booking_id) == [(room_id, n) for n in nights_between(check_in, new_checkout)]
+
+
+def test_extend_into_another_booking_is_rejected(client, auth_headers, db, new_room):
+    room_id = new_room()
+    check_in = TODAY + timedelta(days=80)
+    booking_id = _book(client, auth_headers, [room_id], check_in, check_in + timedelta(days=2)).json()["id"]
+    assert _book(client, auth_headers, [room_id], check_in + timedelta(days=3), check_in + timedelta(days=5)).status_code == 200
+
+    new_checkout = check_in + timedelta(days=4)
+    response = client.put(f"/api/bookings/{booking_id}/extend?new_checkout={new_checkout}", headers=auth_headers)
+    assert response.status_code == 400
+    assert _nights(db, booking_id) == [(room_id, n) for n in nights_between(check_in, check_in + timedelta(days=2))]
+
+
+def test_checkout_keeps_stayed_nights_and_releases_the_rest(client, auth_headers, db, new_room):
+    room_id = new_room()
+    check_in, check_out = TODAY - timedelta(days=2), TODAY + timedelta(days=3)
+    booking_id = _book(client, auth_headers, [room_id], check_in, check_out).json()["id"]
+    room_number = db.get(Room, room_id).number
+
+    response = client.post(f"/api/bill/checkout/{room_number}", headers=auth_headers,
+                           json={"payment_method": "Cash", "checkout_mode": "multiple"})
+    assert response.status_code == 200
+    assert _nights(db, booking_id) == [(room_id, n) for n in nights_between(check_in, TODAY)]
+
+
+def test_backfill_keeps_checked_out_history(client, auth_headers, db, new_room):
+    room_id = new_room()
+    check_in = TODAY - timedelta(days=3)
+    booking_id = _book(client, auth_headers, [room_id], check_in, TODAY + timedelta(days=1)).json()["id"]
+    room_number = db.get(Room, room_id).number
+    assert client.post(f"/api/bill/checkout/{room_number}", headers=auth_headers,
+                       json={"payment_method": "Cash", "checkout_mode": "multiple"}).status_code == 200
+    stayed = [(room_id, n) for n in nights_between(check_in, TODAY)]
+
+    backfill_room_nights(db)
+    db.expire_all()
+
+    assert _nights(db, booking_id) == stayed
+    # Past occupancy is still counted from the history left in the ledger
+    ledger = dict(db.execute(
+        select(RoomNight.night, func.count(RoomNight.id)).where(RoomNight.night >= check_in).group_by(RoomNight.night)
+    ).all())
+    rollups = dict(db.execute(select(DailyRollup.date, DailyRollup.occupied_rooms).where(DailyRollup.date >= check_in)).all())
+    for night in nights_between(check_in, TODAY):
+        assert rollups[night] == ledger[night] >= 1
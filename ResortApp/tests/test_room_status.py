@@ -0,0 +1,94 @@
+"""Room status kept by booking events (app/utils/room_status.py), never by the read paths."""
+from datetime import date, timedelta
+
+from app.database import engine
+from app.models.room import Room
+from app.utils.query_budget import capture_queries
+from app.utils.room_status import recompute_room_statuses
+
+TODAY = date.today()
+PHOTOS = {
+    "id_card_image": ("id.jpg", b"id card", "image/jpeg"),
+    "guest_photo": ("guest.jpg", b"guest", "image/jpeg"),
+}
+
+
+def _book(client, auth_headers, room_id, check_in, check_out):
+    response = client.post("/api/bookings", headers=auth_headers, json={
+        "room_ids": [room_id], "guest_name": "Status Guest", "guest_mobile": "9000000002",
+        "guest_email": "status@example.com", "check_in": check_in.isoformat(),
+        "check_out": check_out.isoformat(), "adults": 1, "children": 0,
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _status(db, room_id):
+    db.expire_all()
+    return db.get(Room, room_id).status
+
+
+def _set_status(db, room_id, status):
+    db.get(Room, room_id).status = status
+    db.commit()
+
+
+def test_check_in_and_checkout_flip_the_room(client, auth_headers, db, new_room):
+    room_id = new_room()
+    booking_id = _book(client, auth_headers, room_id, TODAY, TODAY + timedelta(days=2))
+    assert _status(db, room_id) == "Occupied"
+
+    # A status left stale by something outside the booking routes is put right by check-in
+    _set_status(db, room_id, "Available")
+    response = client.put(f"/api/bookings/{booking_id}/check-in", headers=auth_headers, files=PHOTOS)
+    assert response.status_code == 200
+    assert _status(db, room_id) == "Occupied"
+
+    number = db.get(Room, room_id).number
+    response = client.post(f"/api/bill/checkout/{number}", headers=auth_headers,
+                           json={"payment_method": "Cash", "checkout_mode": "multiple"})
+    assert response.status_code == 200
+    assert _status(db, room_id) == "Available"
+
+
+def test_future_booking_leaves_the_room_available(client, auth_headers, db, new_room):
+    room_id = new_room()
+    _book(client, auth_headers, room_id, TODAY + timedelta(days=90), TODAY + timedelta(days=92))
+    assert _status(db, room_id) == "Available"
+
+
+def test_maintenance_is_never_overwritten(client, auth_headers, db, new_room):
+    room_id = new_room()
+    _book(client, auth_headers, room_id, TODAY, TODAY + timedelta(days=1))
+    _set_status(db, room_id, "Maintenance")
+
+    assert recompute_room_statuses(db, [room_id]) == 0
+    db.commit()
+    assert _status(db, room_id) == "Maintenance"
+
+
+def test_day_rollover_frees_rooms_whose_stay_ended(client, auth_headers, db, new_room):
+    room_id = new_room()
+    check_out = TODAY + timedelta(days=1)
+    _book(client, auth_headers, room_id, TODAY, check_out)
+    assert _status(db, room_id) == "Occupied"
+
+    # The checkout day's night is not held
+    assert recompute_room_statuses(db, [room_id], today=check_out) == 1
+    db.commit()
+    assert _status(db, room_id) == "Available"
+
+
+def test_get_rooms_does_not_write(client, auth_headers, db, new_room):
+    room_id = new_room()
+    _book(client, auth_headers, room_id, TODAY, TODAY + timedelta(days=1))
+    # Stale on purpose: a read that recomputed statuses would put it right
+    _set_status(db, room_id, "Available")
+
+    for url in ("/api/rooms/", "/api/rooms/test?limit=1000"):
+        with capture_queries(engine) as log:
+            response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        writes = [fp for fp in log.fingerprints if fp.split()[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+        assert writes == []
+        assert _status(db, room_id) == "Available"
@@ -0,0 +1,51 @@
+"""A failed savepoint must not drop the outer transaction's pending cache work (app/utils/cache.py, cache_bus.py)."""
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.utils import cache_bus
+from app.utils.cache import LRUCache, get_version, mark_changed
+from app.utils.email import queue_email
+
+NAMESPACE = "savepoint_test"
+
+
+@pytest.fixture
+def bus_cache():
+    cache = cache_bus.register_cache("savepoint_test", LRUCache(), by_id=("savepoint_test",))
+    yield cache
+    cache_bus._registry.pop("savepoint_test", None)
+
+
+def _queue_failing_email(db):
+    # to_email is NOT NULL: the savepoint's insert fails
+    with pytest.raises(IntegrityError):
+        queue_email(db, to_email=None, subject="Booking", html_content="<p></p>")
+
+
+def test_failed_savepoint_keeps_outer_changes(db, bus_cache):
+    before = get_version(NAMESPACE)
+    bus_cache.set(1, "stale")
+    mark_changed(db, NAMESPACE)
+    cache_bus.publish(db, "savepoint_test", 1)
+
+    _queue_failing_email(db)
+    assert get_version(NAMESPACE) == before
+    db.commit()
+
+    assert get_version(NAMESPACE) == before + 1
+    assert bus_cache.get(1) is None
+
+
+def test_released_savepoint_waits_for_outer_commit(db, bus_cache):
+    before = get_version(NAMESPACE)
+    bus_cache.set(1, "stale")
+    mark_changed(db, NAMESPACE)
+    cache_bus.publish(db, "savepoint_test", 1)
+
+    queue_email(db, to_email="guest@example.com", subject="Booking", html_content="<p></p>")
+    assert get_version(NAMESPACE) == before
+    assert bus_cache.get(1) == "stale"
+
+    db.rollback()
+    assert get_version(NAMESPACE) == before
+    assert bus_cache.get(1) == "stale"
@@ -395,7 +395,7 @@ const Rooms = () => {
   // Calculate KPIs
   const totalRooms = rooms.length;
   const availableRooms = rooms.filter(r => r.status === 'Available').length;
-  const occupiedRooms = rooms.filter(r => r.status === 'Booked').length;
+  const occupiedRooms = rooms.filter(r => r.status === 'Occupied').length;
   const maintenanceRooms = rooms.filter(r => r.status === 'Maintenance').length;
   const occupancyRate = totalRooms > 0 ? ((occupiedRooms / totalRooms) * 100).toFixed(1) : 0;
 
@@ -573,7 +573,7 @@ const Rooms = () => {
             <select onChange={(e) => setFilter(prev => ({ ...prev, status: e.target.value }))} className="p-2 text-sm border border-gray-300 rounded-lg w-full sm:w-auto">
               <option value="all">All Statuses</option>
               <option value="Available">Available</option>
-              <option value="Booked">Booked</option>
+              <option value="Occupied">Occupied</option>
               <option value="Maintenance">Maintenance</option>
             </select>
           </div>
@@ -589,7 +589,7 @@ const Rooms = () => {
                   onClick={() => setSelectedImage(room.image_url)}
                 />
                 <span className={`absolute top-2 right-2 px-3 py-1 text-xs font-semibold text-white rounded-full ${
-                  room.status === 'Available' ? 'bg-green-500' : room.status === 'Booked' ? 'bg-red-500' : 'bg-yellow-500'
+                  room.status === 'Available' ? 'bg-green-500' : room.status === 'Occupied' ? 'bg-red-500' : 'bg-yellow-500'
                 }`}>{room.status}</span>
               </div>
               <div className="p-5 flex flex-col flex-grow">
@@ -615,7 +615,7 @@ const Rooms = () => {
                     <button onClick={() => handleDelete(room.id)} className="w-1/2 bg-red-100 text-red-700 text-sm font-semibold py-2 rounded-lg hover:bg-red-200 transition">Delete</button>
                   </div>
                   <button onClick={() => fetchBookings(room.number)} className="w-full bg-blue-100 text-blue-700 text-sm font-semibold py-2 rounded-lg hover:bg-blue-200 transition">View Bookings</button>
-                  {room.status !== "Booked" && (
+                  {room.status !== "Occupied" && (
                     <select
                       value={room.status}
                       onChange={(e) => handleStatusChange(room.id, e.target.value)}
@@ -807,15 +807,9 @@ export default function App() {
                 rooms: '/rooms/test',  // Use working test endpoint for real room data
                 bookings: '/bookings?limit=500&skip=0', // Reduced limit for better performance - only recent bookings needed
                 foodItems: '/food-items/',
-                packages: '/packages/',
-                resortInfo: '/resort-info/',
-                gallery: '/gallery/',
-                reviews: '/reviews/',
-                banners: '/header-banner/',
                 services: '/services/', // Fetch services (note: plural)
-                signatureExperiences: '/signature-experiences/',
-                planWeddings: '/plan-weddings/',
-                nearbyAttractions: '/nearby-attractions/'
+                // Banners, gallery, reviews, resort info, experiences, weddings, attractions and packages in one cached payload
+                bootstrap: '/frontend/bootstrap'
             };
 
             try {
@@ -831,11 +825,17 @@ export default function App() {
 
                 const data = await Promise.all(responses.map(res => res.json()));
 
-                const [
-                    roomsData, bookingsData, foodItemsData, packagesData,
-                    resortInfoData, galleryData, reviewsData, bannerData, servicesData,
-                    signatureExperiencesData, planWeddingsData, nearbyAttractionsData
-                ] = data;
+                const [roomsData, bookingsData, foodItemsData, servicesData, bootstrapData] = data;
+                const {
+                    packages: packagesData,
+                    resort_info: resortInfoData,
+                    gallery: galleryData,
+                    reviews: reviewsData,
+                    header_banner: bannerData,
+                    signature_experiences: signatureExperiencesData,
+                    plan_weddings: planWeddingsData,
+                    nearby_attractions: nearbyAttractionsData
+                } = bootstrapData;
 
                 setAllRooms(roomsData);
                 // Don't set rooms here - only show after dates are selected